@@ -1,23 +1,130 @@
-from sqlalchemy import select
-from sqlalchemy.exc import SQLAlchemyError
+import inspect
+from contextlib import asynccontextmanager
+from typing import (
+    Callable,
+    Optional,
+    Sequence
+)
+
+from sqlalchemy import (
+    insert,
+    select
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from database import async_session_maker
-from sqlalchemy import desc
+from database import (
+    async_session_maker,
+    read_session_maker,
+    mark_write
+)
+from sqlalchemy import desc, tuple_
+from DAO.pagination import (
+    Page,
+    encode_cursor,
+    decode_cursor
+)
+from DAO.projection import projection_class
+from DAO.bulk import (
+    Rows,
+    iter_batches,
+    unique_by_keys,
+    copy_batch,
+    executemany_batch
+)
+from config import settings
 
 
 class BaseDAO:
     model = None
+    # колонки, которые выбираются в режиме проекции в дополнение к полям представления
+    projection_extra: tuple[str, ...] = ('id', 'data_create_user')
+    # уникальные колонки, по которым upsert_many определяет конфликт
+    upsert_keys: tuple[str, ...] = ('id',)
+    _projections: dict = {}
+
+    @classmethod
+    @asynccontextmanager
+    async def _session(cls, session: Optional[AsyncSession] = None):
+        """
+        Функция для получения сессии чтения: переданная сессия запроса или новая сессия (реплика или основная БД)
+        :param session: сессия запроса (unit of work), None - открыть отдельную сессию
+        :return: контекстный менеджер сессии
+        """
+        if session is not None:
+            yield session
+            return
+        async with read_session_maker()() as own_session:
+            yield own_session
+
+    @classmethod
+    @asynccontextmanager
+    async def _transaction(cls, session: Optional[AsyncSession] = None):
+        """
+        Функция для получения сессии записи. Переданная сессия запроса фиксируется вместе с запросом,
+        иначе открывается отдельная транзакция на основной БД, которая фиксируется при выходе из блока
+        :param session: сессия запроса (unit of work), None - открыть отдельную транзакцию
+        :return: контекстный менеджер сессии
+        """
+        if session is not None:
+            yield session
+            return
+        async with async_session_maker() as own_session:
+            async with own_session.begin():
+                yield own_session
 
     @classmethod
-    async def find_all(cls, sort_by_date: bool = True, **filter_by):
+    def _projection(cls, view):
+        """
+        Функция для получения колонок таблицы и легкого класса под поля представления (pydantic-схемы)
+        :param view: pydantic-схема, поля которой нужно выбрать
+        :return: кортеж (список колонок для select, класс проекции)
+        """
+        key = (cls.model, view)
+        if key not in cls._projections:
+            columns = cls.model.__table__.columns
+            fields = tuple(dict.fromkeys([*cls.projection_extra, *view.model_fields]))
+            selected = [getattr(cls.model, field) for field in fields if field in columns]
+            defaults = {
+                name: field.get_default(call_default_factory=True)
+                for name, field in view.model_fields.items() if name not in columns
+            }
+            cls._projections[key] = (selected, projection_class(f'{view.__name__}Row', fields, defaults))
+        return cls._projections[key]
+
+    @classmethod
+    def _select(cls, view=None):
+        """
+        Функция для создания запроса к таблице
+        :param view: pydantic-схема; если передана, выбираются только колонки ее полей
+        :return: запрос select
+        """
+        if view is None:
+            return select(cls.model)
+        columns, _ = cls._projection(view)
+        return select(*columns)
+
+    @classmethod
+    def _to_view(cls, result, view) -> list:
+        """
+        Функция для преобразования строк результата запроса, созданного _select(view), в легкие объекты
+        :param result: результат выполнения запроса
+        :param view: pydantic-схема, по которой строился запрос
+        :return: список объектов класса проекции
+        """
+        _, row_class = cls._projection(view)
+        return [row_class(**row) for row in result.mappings()]
+
+    @classmethod
+    async def find_all(cls, sort_by_date: bool = True, session: Optional[AsyncSession] = None, **filter_by):
         """
         Функция для получения всех объектов из таблицы с возможностью фильтрации и сортировки.
         :param filter_by: фильтры для поиска
         :param sort_by_date: если True, сортирует по дате создания от новых к старым
+        :param session: сессия запроса, None - отдельная сессия
         :return: возвращает отфильтрованные и отсортированные объекты из таблицы
         """
-        async with async_session_maker() as session:
+        async with cls._session(session) as session:
             query = select(cls.model).filter_by(**filter_by)
 
             # Добавляем сортировку по дате создания
@@ -28,43 +135,173 @@ class BaseDAO:
             return result.scalars().all()
 
     @classmethod
-    async def find_by_id(cls, item_id: int):
+    def _keyset_query(cls, query, sort_by_date: bool, limit: int, cursor: Optional[str] = None):
+        """
+        Функция для добавления к запросу сортировки и условия keyset-пагинации по (data_create_user, id)
+        :param query: исходный запрос
+        :param sort_by_date: если True, сортирует по дате создания от новых к старым, иначе от старых к новым
+        :param limit: размер страницы
+        :param cursor: курсор предыдущей страницы
+        :return: запрос, выбирающий limit + 1 объект (лишний объект показывает наличие следующей страницы)
+        """
+        order = 'date_desc' if sort_by_date else 'date_asc'
+        key = tuple_(cls.model.data_create_user, cls.model.id)
+
+        if cursor is not None:
+            last_key = tuple_(*decode_cursor(cursor, order))
+            query = query.where(key < last_key if sort_by_date else key > last_key)
+
+        if sort_by_date:
+            query = query.order_by(desc(cls.model.data_create_user), desc(cls.model.id))
+        else:
+            query = query.order_by(cls.model.data_create_user, cls.model.id)
+        return query.limit(limit + 1)
+
+    @classmethod
+    def _make_page(cls, items: list, sort_by_date: bool, limit: int) -> Page:
+        """
+        Функция для формирования страницы из limit + 1 выбранных объектов
+        :param items: объекты, выбранные запросом из _keyset_query
+        :param sort_by_date: сортировка, с которой выполнялся запрос
+        :param limit: размер страницы
+        :return: страница с курсором на следующую страницу, если она есть
+        """
+        if len(items) <= limit:
+            return Page(items=list(items))
+        items = list(items[:limit])
+        last = items[-1]
+        order = 'date_desc' if sort_by_date else 'date_asc'
+        return Page(items=items, next_cursor=encode_cursor(order, [last.data_create_user, last.id]))
+
+    @classmethod
+    async def find_page(cls, limit: int, cursor: Optional[str] = None, sort_by_date: bool = True,
+                        exclude_id: Optional[int] = None, view=None, session: Optional[AsyncSession] = None,
+                        **filter_by) -> Page:
+        """
+        Функция для постраничного получения объектов из таблицы с keyset-пагинацией.
+        :param limit: размер страницы
+        :param cursor: курсор, полученный с предыдущей страницей, None для первой страницы
+        :param sort_by_date: если True, сортирует по дате создания от новых к старым
+        :param exclude_id: id объекта, который нужно исключить из выборки
+        :param view: pydantic-схема; если передана, выбираются только ее колонки (режим проекции)
+        :param session: сессия запроса, None - отдельная сессия
+        :param filter_by: фильтры для поиска
+        :return: страница объектов и курсор следующей страницы
+        """
+        async with cls._session(session) as session:
+            query = cls._select(view).filter_by(**filter_by)
+            if exclude_id is not None:
+                query = query.where(cls.model.id != exclude_id)
+            query = cls._keyset_query(query, sort_by_date, limit, cursor)
+
+            result = await session.execute(query)
+            items = cls._to_view(result, view) if view is not None else result.scalars().all()
+            return cls._make_page(items, sort_by_date, limit)
+
+    @classmethod
+    async def find_by_id(cls, item_id: int, view=None, session: Optional[AsyncSession] = None):
         """
         Функция для получение одного объекта по id с таблицы
         :param item_id: обязательный параменр для поиска в таблице
+        :param view: pydantic-схема; если передана, выбираются только ее колонки без загрузки связей
+        :param session: сессия запроса, None - отдельная сессия
         :return: объект из таблицы по указанному id
         """
-        async with async_session_maker() as session:
+        async with cls._session(session) as session:
+            if view is not None:
+                result = await session.execute(cls._select(view).filter_by(id=item_id))
+                items = cls._to_view(result, view)
+                return items[0] if items else None
+
             query = select(cls.model).filter_by(id=item_id).options(joinedload(cls.model.list_grade_history))
             result = await session.execute(query)
             return result.scalars().first()
 
     @classmethod
-    async def find_one_or_none(cls, **filter_by):
+    async def find_one_or_none(cls, session: Optional[AsyncSession] = None, **filter_by):
         """
         Функция для получение одного объекта с таблицы
+        :param session: сессия запроса, None - отдельная сессия
         :param filter_by: необязательный параметр, в случае передачи будет поиск по указанному фильтру
         :return: объект из таблицы, если передан фильтр то выдаст объект по фильтру или None
         """
-        async with async_session_maker() as session:
+        async with cls._session(session) as session:
             query = select(cls.model).filter_by(**filter_by)
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
     @classmethod
-    async def add(cls, **values):
+    async def add(cls, session: Optional[AsyncSession] = None, **values):
         """
-        Функция для создания нового объекта в таблице
+        Функция для создания нового объекта в таблице одним запросом INSERT ... RETURNING
+        (значения по умолчанию на стороне БД, например id и дата создания, возвращаются сразу)
+        :param session: сессия запроса, None - отдельная транзакция
         :param values: обязательные параменты, которые определенны при создании таблицы
         :return: возвращает созданный объект
         """
-        async with async_session_maker() as session:
-            async with session.begin():
-                new_instance = cls.model(**values)
-                session.add(new_instance)
-                try:
-                    await session.commit()
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    raise e
-                return new_instance
\ No newline at end of file
+        async with cls._transaction(session) as session:
+            result = await session.execute(insert(cls.model).values(**values).returning(cls.model))
+            new_instance = result.scalar_one()
+        mark_write()
+        return new_instance
+
+    @classmethod
+    async def _write_many(cls, rows: Rows, batch_size: Optional[int], progress: Optional[Callable],
+                          session: Optional[AsyncSession], conflict_keys: Optional[Sequence[str]] = None,
+                          update_columns: Optional[Sequence[str]] = None) -> int:
+        """
+        Функция для потоковой записи строк пачками. Без переданной сессии каждая пачка
+        записывается в своей транзакции, поэтому уже записанные пачки сохраняются при ошибке.
+        :return: количество записанных строк
+        """
+        written = processed = 0
+        async for batch in iter_batches(rows, batch_size or settings.BULK_BATCH_SIZE):
+            processed += len(batch)
+            if conflict_keys and update_columns:
+                batch = unique_by_keys(batch, conflict_keys)
+            columns = list(batch[0])
+
+            async with cls._transaction(session) as tx_session:
+                use_copy = settings.BULK_USE_COPY and tx_session.get_bind().dialect.driver == 'asyncpg'
+                write_batch = copy_batch if use_copy else executemany_batch
+                written += await write_batch(tx_session, cls.model.__table__, columns, batch,
+                                             conflict_keys, update_columns)
+            mark_write()
+
+            if progress is not None:
+                result = progress(processed, written)
+                if inspect.isawaitable(result):
+                    await result
+        return written
+
+    @classmethod
+    async def add_many(cls, rows: Rows, batch_size: Optional[int] = None, progress: Optional[Callable] = None,
+                       session: Optional[AsyncSession] = None) -> int:
+        """
+        Функция для массовой вставки строк (COPY на asyncpg, иначе executemany).
+        Все строки должны содержать одинаковый набор колонок, значения по умолчанию БД заполняются для остальных.
+        :param rows: итерируемый объект или асинхронный генератор словарей {колонка: значение}
+        :param batch_size: размер пачки, по умолчанию settings.BULK_BATCH_SIZE
+        :param progress: функция progress(обработано, записано), вызывается после каждой пачки (может быть async)
+        :param session: сессия запроса (все пачки в ее транзакции), None - транзакция на каждую пачку
+        :return: количество вставленных строк
+        """
+        return await cls._write_many(rows, batch_size, progress, session)
+
+    @classmethod
+    async def upsert_many(cls, rows: Rows, conflict_keys: Optional[Sequence[str]] = None,
+                          update_columns: Optional[Sequence[str]] = None, batch_size: Optional[int] = None,
+                          progress: Optional[Callable] = None, session: Optional[AsyncSession] = None) -> int:
+        """
+        Функция для массовой вставки строк с обработкой конфликтов по уникальным колонкам
+        :param rows: итерируемый объект или асинхронный генератор словарей {колонка: значение}
+        :param conflict_keys: уникальные колонки, по умолчанию upsert_keys модели
+        :param update_columns: колонки, которые обновляются при конфликте, None - существующие строки не меняются
+        :param batch_size: размер пачки, по умолчанию settings.BULK_BATCH_SIZE
+        :param progress: функция progress(обработано, записано), вызывается после каждой пачки (может быть async)
+        :param session: сессия запроса (все пачки в ее транзакции), None - транзакция на каждую пачку
+        :return: количество вставленных или обновленных строк
+        """
+        return await cls._write_many(rows, batch_size, progress, session,
+                                     conflict_keys=conflict_keys or cls.upsert_keys,
+                                     update_columns=update_columns)
@@ -0,0 +1,129 @@
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Optional,
+    Sequence,
+    Union
+)
+
+from sqlalchemy import (
+    Table,
+    column,
+    select,
+    table,
+    text
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+Rows = Union[Iterable[dict], AsyncIterable[dict]]
+
+
+async def iter_batches(rows: Rows, batch_size: int) -> AsyncIterator[list[dict]]:
+    """
+    Функция для разбиения потока строк на пачки, принимает обычный итерируемый объект или асинхронный генератор
+    :param rows: строки в виде словарей {колонка: значение}
+    :param batch_size: размер пачки
+    :return: асинхронный итератор пачек
+    """
+    batch = []
+    if hasattr(rows, '__aiter__'):
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def unique_by_keys(batch: list[dict], keys: Sequence[str]) -> list[dict]:
+    """
+    Функция убирает из пачки повторы по уникальным ключам (остается последняя строка),
+    иначе ON CONFLICT DO UPDATE не сможет обновить одну строку дважды
+    """
+    return list({tuple(row[key] for key in keys): row for row in batch}.values())
+
+
+def insert_statement(target: Table, columns: Sequence[str], source=None,
+                     conflict_keys: Optional[Sequence[str]] = None,
+                     update_columns: Optional[Sequence[str]] = None):
+    """
+    Функция для построения INSERT с обработкой конфликтов
+    :param target: таблица, в которую вставляются строки
+    :param columns: вставляемые колонки
+    :param source: промежуточная таблица для INSERT ... SELECT, None - вставка значений (executemany)
+    :param conflict_keys: уникальные колонки для ON CONFLICT, None - без обработки конфликтов
+    :param update_columns: колонки для ON CONFLICT DO UPDATE, None - DO NOTHING
+    :return: запрос insert
+    """
+    statement = pg_insert(target)
+    if source is not None:
+        statement = statement.from_select(columns, select(*[source.c[name] for name in columns]))
+    if conflict_keys:
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=conflict_keys,
+                set_={name: statement.excluded[name] for name in update_columns}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=conflict_keys)
+    return statement
+
+
+async def copy_batch(session: AsyncSession, target: Table, columns: Sequence[str], batch: list[dict],
+                     conflict_keys: Optional[Sequence[str]] = None,
+                     update_columns: Optional[Sequence[str]] = None) -> int:
+    """
+    Функция для записи пачки через COPY asyncpg: строки копируются во временную таблицу,
+    затем переносятся в целевую одним INSERT ... SELECT с обработкой конфликтов.
+    Выполняется в транзакции переданной сессии.
+    :param session: сессия с драйвером asyncpg
+    :param target: целевая таблица
+    :param columns: колонки строк
+    :param batch: пачка строк
+    :param conflict_keys: уникальные колонки для ON CONFLICT
+    :param update_columns: колонки для ON CONFLICT DO UPDATE
+    :return: количество вставленных (обновленных) строк
+    """
+    staging_name = f'_bulk_{target.name}'
+    column_list = ', '.join(f'"{name}"' for name in columns)
+    # запрос через сессию начинает транзакцию, в которой затем выполняется COPY;
+    # временная таблица предыдущей пачки той же транзакции удаляется, схема pg_temp указана явно,
+    # чтобы не удалить постоянную таблицу с таким же именем из search_path
+    await session.execute(text(f'DROP TABLE IF EXISTS pg_temp.{staging_name}'))
+    await session.execute(text(
+        f'CREATE TEMP TABLE {staging_name} ON COMMIT DROP AS '
+        f'SELECT {column_list} FROM {target.name} WITH NO DATA'
+    ))
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        staging_name,
+        schema_name='pg_temp',
+        records=[tuple(row[name] for name in columns) for row in batch],
+        columns=list(columns)
+    )
+
+    staging = table(staging_name, *[column(name) for name in columns], schema='pg_temp')
+    result = await session.execute(insert_statement(target, columns, staging, conflict_keys, update_columns))
+    return result.rowcount
+
+
+async def executemany_batch(session: AsyncSession, target: Table, columns: Sequence[str], batch: list[dict],
+                            conflict_keys: Optional[Sequence[str]] = None,
+                            update_columns: Optional[Sequence[str]] = None) -> int:
+    """
+    Функция для записи пачки одним INSERT с набором параметров (executemany), используется без COPY
+    :return: количество переданных строк (драйвер не сообщает число строк, пропущенных при конфликте)
+    """
+    await session.execute(insert_statement(target, columns, None, conflict_keys, update_columns), batch)
+    return len(batch)
@@ -0,0 +1,102 @@
+import base64
+import json
+import math
+from datetime import datetime
+from typing import (
+    Any,
+    NamedTuple,
+    Optional
+)
+
+
+class Page(NamedTuple):
+    """Страница результатов с курсором для получения следующей страницы"""
+    items: list
+    next_cursor: Optional[str] = None
+
+
+class InvalidCursor(ValueError):
+    """Исключение для некорректного или несовместимого с запросом курсора"""
+
+
+# типы значений ключа сортировки для каждого вида курсора (даты хранятся в БД без часового пояса)
+CURSOR_KEYS = {
+    'date_desc': (datetime, int),
+    'date_asc': (datetime, int),
+    'match': (datetime, int),
+    'distance': (float, int),
+    'score': (float, int),
+    'name': (float, int),
+}
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _decode_value(value: Any, kind: type) -> Any:
+    """
+    Функция для проверки и преобразования одного значения курсора
+    :param value: значение из JSON
+    :param kind: ожидаемый тип из CURSOR_KEYS
+    :return: значение ожидаемого типа
+    """
+    if kind is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get('dt'), str):
+            raise TypeError(value)
+        result = datetime.fromisoformat(value['dt'])
+        if result.tzinfo is not None:
+            raise ValueError(value)
+        return result
+    # bool - подкласс int, в курсоре его быть не может
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if kind is int:
+        if not isinstance(value, int):
+            raise TypeError(value)
+        # id в таблицах - integer PostgreSQL
+        if not INT_MIN <= value <= INT_MAX:
+            raise ValueError(value)
+        return value
+    if not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(value)
+    return float(value)
+
+
+def encode_cursor(order: str, values: list[Any]) -> str:
+    """
+    Функция для кодирования позиции последнего элемента страницы в непрозрачную строку
+    :param order: тип сортировки, для которой создан курсор
+    :param values: значения ключа сортировки последнего элемента страницы
+    :return: курсор в виде строки base64
+    """
+    payload = {
+        'o': order,
+        'v': [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, order: str) -> list[Any]:
+    """
+    Функция для декодирования курсора
+    :param cursor: курсор, полученный из encode_cursor
+    :param order: тип сортировки текущего запроса
+    :return: значения ключа сортировки
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except ValueError as e:
+        raise InvalidCursor('Некорректный курсор') from e
+    if not isinstance(payload, dict) or payload.get('o') != order:
+        raise InvalidCursor('Курсор получен для другой сортировки')
+
+    # значения проверяются по числу и типам для сортировки, иначе подделанный курсор дошел бы до SQL
+    kinds = CURSOR_KEYS[order]
+    values = payload.get('v')
+    if not isinstance(values, list) or len(values) != len(kinds):
+        raise InvalidCursor('Некорректный курсор')
+    try:
+        return [_decode_value(value, kind) for value, kind in zip(values, kinds)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Некорректный курсор') from e
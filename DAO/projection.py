@@ -0,0 +1,21 @@
+from copy import copy
+from typing import Any
+
+
+def projection_class(name: str, fields: tuple[str, ...], defaults: dict[str, Any]) -> type:
+    """
+    Функция для создания легкого класса со __slots__ под набор полей представления.
+    Объекты такого класса заполняются напрямую из строк запроса, без ORM и загрузки связей.
+    :param name: имя класса
+    :param fields: имена полей
+    :param defaults: значения по умолчанию для полей, которых нет в строке запроса
+    :return: класс проекции
+    """
+    def __init__(self, **values):
+        for field in fields:
+            setattr(self, field, values[field] if field in values else copy(defaults.get(field)))
+
+    def __repr__(self):
+        return f"{name}({', '.join(f'{field}={getattr(self, field)!r}' for field in fields)})"
+
+    return type(name, (), {'__slots__': fields, '__init__': __init__, '__repr__': __repr__})
@@ -0,0 +1,325 @@
+"""
+Нагрузочный тест API пользователей на синтетических данных (см. benchmarks.synthetic).
+Сценарии: регистрация, вход, /api/me/, /api/list/ без расстояния, с расстоянием и поиск по имени, лента рекомендаций,
+список взаимных симпатий, симпатия и взаимная симпатия.
+Приложение запускается в процессе через ASGITransport с БД из настроек (.env); геокодер заменяется
+офлайн-поставщиком, SMTP - заглушкой. Синтетические пользователи удаляются после замера (кроме --keep).
+/api/list/ показывает и пользователей, которые уже были в БД, поэтому для сравнения коммитов нужна отдельная БД.
+Результат - JSON с p50/p95/p99 (мс) и запросами в секунду по сценариям, --compare печатает разницу с прошлым замером.
+Запуск из корня проекта:
+python -m benchmarks.bench_api_load [--users 5000 --requests 300 --concurrency 16 --output result.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from benchmarks.synthetic import (
+    CITIES,
+    EMAIL_DOMAIN,
+    LAST_NAMES,
+    PASSWORD,
+    city_address,
+    cleanup,
+    generate,
+    load,
+    random_point,
+    district_centers
+)
+from config import settings
+from main import app
+from users.auth import create_access_token, get_password_hash
+from utils.geocoding import OfflineProvider, geocoder
+from utils.listing_cache import listing_cache
+from utils.send_email import outbox
+
+SCENARIOS = ('register', 'login', 'me', 'list', 'list_distance', 'name_search', 'recommendations', 'matches', 'like',
+             'match')
+# ответы, которые считаются успешными: пустой список в радиусе отдается с 404
+EXPECTED_STATUS = {'list': {200, 404}, 'list_distance': {200, 404}, 'name_search': {200, 404}}
+LIST_DISTANCE = 5000
+
+
+class StubSMTPSession:
+    """Заглушка SMTP-соединения: письма только считаются"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, message) -> None:
+        self.sent += 1
+
+    def close(self) -> None:
+        pass
+
+
+class Scenario:
+    """
+    Сценарий нагрузки
+    :param name: название сценария
+    :param request: функция request(client, номер запроса), возвращает ответ
+    """
+
+    def __init__(self, name: str, request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]):
+        self.name = name
+        self.request = request
+
+
+def auth_headers(user_id: int) -> dict:
+    return {'Cookie': f'users_access_token={create_access_token({"sub": str(user_id)})}'}
+
+
+def build_scenarios(data, ids: list[int], seed: int, warmup: int, total: int,
+                    run_id: str) -> tuple[list[Scenario], dict]:
+    """
+    Функция готовит сценарии и адреса для офлайн-геокодера
+    :param data: синтетические данные, загруженные в БД
+    :param ids: id синтетических пользователей
+    :param seed: начальное значение генератора
+    :param warmup: количество запросов прогрева
+    :param total: количество запросов каждого сценария вместе с прогревом
+    :param run_id: метка запуска для уникальных адресов почты при регистрации
+    :return: список сценариев и словарь адресов {адрес: [широта, долгота]}
+    """
+    rnd = random.Random(seed)
+    count = len(ids)
+    feed_users = max(1, min(warmup, count))
+    headers = [auth_headers(user_id) for user_id in ids]
+
+    # новые пользователи регистрируются по адресам в тех же городах и районах, что и синтетические
+    districts = district_centers(random.Random(seed))
+    register_cities = [rnd.randrange(len(CITIES)) for _ in range(total)]
+    addresses = {city_address(city, number): list(random_point(rnd, districts, city))
+                 for number, city in enumerate(register_cities)}
+
+    # симпатии ставят разные пользователи, поэтому дневной лимит не достигается
+    likers = rnd.sample(range(count), min(count, total))
+    edges = set(data.likes)
+    like_pairs = []
+    for liker in likers:
+        target = rnd.randrange(count)
+        while target == liker or (liker, target) in edges:
+            target = rnd.randrange(count)
+        like_pairs.append((liker, target))
+    # ответ на одностороннюю симпатию: возникает взаимная симпатия и отправляются письма
+    one_way = [(target, liker) for liker, target in data.likes if (target, liker) not in edges]
+    rnd.shuffle(one_way)
+    seen, match_pairs = set(), []
+    for liker, target in one_way:
+        if liker not in seen:
+            seen.add(liker)
+            match_pairs.append((liker, target))
+
+    def user(number: int) -> int:
+        return number * 7919 % count
+
+    async def register(client, number):
+        return await client.post('/api/clients/create/', data={
+            'address': city_address(register_cities[number], number),
+            'email': f'new-{run_id}-{number}@{EMAIL_DOMAIN}',
+            'first_name': 'Нагрузка', 'last_name': 'Тестов', 'gender': 'men' if number % 2 else 'women',
+            'password': PASSWORD, 'password_confirm': PASSWORD,
+        })
+
+    async def login(client, number):
+        return await client.post('/api/login/', data={'email': data.users[user(number)]['email'],
+                                                      'password': PASSWORD})
+
+    async def me(client, number):
+        return await client.get('/api/me/', headers=headers[user(number)])
+
+    async def list_users(client, number):
+        return await client.get('/api/list/', headers=headers[user(number)])
+
+    async def list_distance(client, number):
+        return await client.get('/api/list/', params={'distance': LIST_DISTANCE}, headers=headers[user(number)])
+
+    async def name_search(client, number):
+        # фамилия с опечаткой (пропущена одна буква) или ее начало
+        last_name = LAST_NAMES[number % len(LAST_NAMES)]
+        position = number % (len(last_name) - 1) + 1
+        query = last_name[:position] if number % 3 == 0 else last_name[:position] + last_name[position + 1:]
+        return await client.get('/api/list/', params={'name': query}, headers=headers[user(number)])
+
+    async def recommendations(client, number):
+        # ленты строятся при первом запросе, поэтому замеряются чтения лент пользователей, открытых при прогреве
+        return await client.get('/api/recommendations/', headers=headers[user(number % feed_users)])
+
+    async def matches(client, number):
+        return await client.get('/api/matches/', headers=headers[user(number)])
+
+    async def like(client, number):
+        liker, target = like_pairs[number % len(like_pairs)]
+        return await client.get(f'/api/clients/{ids[target]}/match/', headers=headers[liker])
+
+    async def match(client, number):
+        liker, target = match_pairs[number % len(match_pairs)]
+        return await client.get(f'/api/clients/{ids[target]}/match/', headers=headers[liker])
+
+    scenarios = [
+        Scenario('register', register),
+        Scenario('login', login),
+        Scenario('me', me),
+        Scenario('list', list_users),
+        Scenario('list_distance', list_distance),
+        Scenario('name_search', name_search),
+        Scenario('recommendations', recommendations),
+        Scenario('matches', matches),
+        Scenario('like', like),
+        Scenario('match', match),
+    ]
+    if not match_pairs:
+        scenarios = [scenario for scenario in scenarios if scenario.name != 'match']
+    return scenarios, addresses
+
+
+def percentile(values: list[float], q: int) -> float:
+    """
+    Функция возвращает q-й процентиль замеров
+    :param values: замеры
+    :param q: процентиль от 1 до 99
+    :return: процентиль; для одного замера - сам замер, для пустого списка - 0
+    """
+    # statistics.quantiles требует хотя бы двух значений
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, warmup: int, requests: int,
+                       concurrency: int) -> dict:
+    """
+    Функция выполняет сценарий: warmup запросов без замера, затем requests запросов с concurrency одновременно
+    :return: результаты сценария
+    """
+    expected = EXPECTED_STATUS.get(scenario.name, {200})
+    for number in range(warmup):
+        await scenario.request(client, number)
+
+    latencies, errors = [], 0
+    numbers = iter(range(warmup, warmup + requests))
+
+    async def worker():
+        nonlocal errors
+        for number in numbers:
+            start = time.perf_counter()
+            try:
+                response = await scenario.request(client, number)
+                ok = response.status_code in expected
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': round(requests / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(previous: dict, current: dict) -> None:
+    """Функция печатает изменение rps и p95 относительно прошлого замера"""
+    print(f'сравнение с {previous.get("commit")} -> {current.get("commit")}', file=sys.stderr)
+    for name, result in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        rps = (result['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0.0
+        p95 = (result['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0.0
+        print(f'{name:<14} rps {before["rps"]:>9.1f} -> {result["rps"]:>9.1f} ({rps:+6.1f}%)  '
+              f'p95 {before["p95_ms"]:>8.2f} -> {result["p95_ms"]:>8.2f} ms ({p95:+6.1f}%)', file=sys.stderr)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--likes-per-user', type=float, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--output', help='файл для результата, по умолчанию stdout')
+    parser.add_argument('--compare', help='JSON прошлого замера для сравнения')
+    parser.add_argument('--keep', action='store_true', help='не удалять синтетических пользователей')
+    args = parser.parse_args()
+    if args.requests < 1 or args.concurrency < 1:
+        parser.error('--requests и --concurrency должны быть не меньше 1')
+
+    # внешние сервисы не вызываются: адреса из словаря, письма только считаются
+    smtp = StubSMTPSession()
+    outbox.session = smtp
+    geocoder.store = None
+
+    await cleanup()
+    data = generate(args.users, args.likes_per_user, args.seed, get_password_hash(PASSWORD))
+    ids = await load(data, args.seed)
+    await listing_cache.invalidate()
+
+    total = args.warmup + args.requests
+    scenarios, addresses = build_scenarios(data, ids, args.seed, args.warmup, total,
+                                          run_id=str(int(time.time())))
+    geocoder.provider = OfflineProvider(addresses)
+
+    result = {
+        'commit': git_commit(),
+        'seed': args.seed,
+        'users': args.users,
+        'likes': len(data.likes),
+        'concurrency': args.concurrency,
+        'settings': {name: getattr(settings, name) for name in (
+            'BCRYPT_ROUNDS', 'HASH_POOL_WORKERS', 'DB_POOL_SIZE', 'SPATIAL_INDEX_ENABLED', 'NAME_INDEX_ENABLED',
+            'LISTING_CACHE_BACKEND', 'QUOTA_BACKEND', 'PAGE_SIZE_DEFAULT')},
+        'scenarios': {},
+    }
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench',
+                                         timeout=60) as client:
+                for scenario in scenarios:
+                    if scenario.name in args.scenarios:
+                        result['scenarios'][scenario.name] = await run_scenario(
+                            client, scenario, args.warmup, args.requests, args.concurrency)
+                        print(scenario.name, result['scenarios'][scenario.name], file=sys.stderr)
+        result['emails'] = smtp.sent
+    finally:
+        if not args.keep:
+            await cleanup()
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            print_comparison(json.load(file), result)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Бенчмарк отдачи аватаров через /api/avatars/{name}: первая загрузка (200, весь файл)
+против повторной загрузки с If-None-Match (304 без тела) и загрузки по частям (Range).
+Запросы идут через роутер users напрямую (ASGI), БД не используется.
+Запуск из корня проекта: python -m benchmarks.bench_avatar_serving [--requests 2000 --concurrency 32]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from PIL import Image
+
+from users.router import router
+from utils import avatars
+from utils.avatars import process_avatar
+from utils.img_watermark import image_executor
+
+OUTPUT_DIR = Path(tempfile.mkdtemp(prefix='bench_avatars_'))
+avatars.PROJECT_ROOT = OUTPUT_DIR
+
+app = FastAPI()
+app.include_router(router)
+
+
+def make_avatar(size: int) -> str:
+    """Создание вариантов аватара из изображения, похожего на фотографию"""
+    image = Image.effect_noise((size, size), 64).convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return process_avatar(buffer.getvalue(), max_pixels=size * size)
+
+
+async def run(client: httpx.AsyncClient, url: str, headers: dict, requests: int, concurrency: int) -> tuple[float, int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    received = 0
+
+    async def fetch():
+        nonlocal received
+        async with semaphore:
+            response = await client.get(url, headers=headers)
+            if response.is_error:
+                response.raise_for_status()
+            received += len(response.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(requests)))
+    return requests / (time.perf_counter() - start), received // requests
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--size', type=int, default=1600, help='сторона исходного изображения')
+    parser.add_argument('--variant', default='full', choices=sorted(avatars.AVATAR_VARIANTS))
+    args = parser.parse_args()
+
+    avatar = make_avatar(args.size)
+    url = avatars.avatar_variants(avatar)[args.variant]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        etag = (await client.get(url)).headers['etag']
+        scenarios = (
+            ('без кеша (200)', {}),
+            ('повторно (304)', {'if-none-match': etag}),
+            ('Range 64 КБ (206)', {'range': 'bytes=0-65535'}),
+        )
+        for title, headers in scenarios:
+            rate, size = await run(client, url, headers, args.requests, args.concurrency)
+            print(f'{title:<20} запросов в секунду: {rate:>8.1f}   байт на ответ: {size}')
+    image_executor.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Бенчмарк массовой записи пользователей, строк в секунду: BaseDAO.add по одной строке,
+add_many через executemany и add_many через COPY (asyncpg), а также upsert_many по email.
+Работает с БД из настроек (.env); каждый замер выполняется в транзакции, которая откатывается.
+Запуск из корня проекта: python -m benchmarks.bench_bulk_insert [--rows 10000 100000 1000000]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from config import settings
+from database import async_session_maker, dispose_engines
+from users.dao import UsersDAO
+
+# построчная вставка слишком медленная для больших объемов, скорость считается по первым строкам
+SINGLE_ROWS_LIMIT = 2000
+
+
+async def generate_users(count: int, prefix: str):
+    """Асинхронный генератор синтетических пользователей"""
+    rnd = random.Random(count)
+    for number in range(count):
+        yield {
+            'email': f'{prefix}-{number}@bulk.bench',
+            'password': 'x' * 60,
+            'first_name': f'Имя{number % 1000}',
+            'last_name': f'Фамилия{number % 997}',
+            'gender': 'men' if number % 2 else 'women',
+            'avatar': 'users/avatars/default_avatar.png',
+            'latitude': 55.75 + rnd.uniform(-1, 1),
+            'longitude': 37.62 + rnd.uniform(-1, 1),
+        }
+
+
+async def single_rows(count: int) -> float:
+    async with async_session_maker() as session:
+        async with session.begin():
+            start = time.perf_counter()
+            async for row in generate_users(count, uuid.uuid4().hex):
+                await UsersDAO.add(session=session, **row)
+            elapsed = time.perf_counter() - start
+            await session.rollback()
+    return count / elapsed
+
+
+async def bulk_rows(count: int, use_copy: bool, batch_size: int, upsert: bool) -> float:
+    settings.BULK_USE_COPY = use_copy
+    async with async_session_maker() as session:
+        async with session.begin():
+            start = time.perf_counter()
+            rows = generate_users(count, uuid.uuid4().hex)
+            if upsert:
+                await UsersDAO.upsert_many(rows, update_columns=['first_name', 'last_name'],
+                                           batch_size=batch_size, session=session)
+            else:
+                await UsersDAO.add_many(rows, batch_size=batch_size, session=session)
+            elapsed = time.perf_counter() - start
+            await session.rollback()
+    return count / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--batch-size', type=int, default=settings.BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    print(f"{'строк':>9} {'add по одной':>14} {'executemany':>13} {'COPY':>10} {'upsert COPY':>13}")
+    for count in args.rows:
+        single = await single_rows(min(count, SINGLE_ROWS_LIMIT))
+        executemany = await bulk_rows(count, use_copy=False, batch_size=args.batch_size, upsert=False)
+        copy = await bulk_rows(count, use_copy=True, batch_size=args.batch_size, upsert=False)
+        upsert = await bulk_rows(count, use_copy=True, batch_size=args.batch_size, upsert=True)
+        print(f'{count:>9} {single:>14.0f} {executemany:>13.0f} {copy:>10.0f} {upsert:>13.0f}')
+    await dispose_engines()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
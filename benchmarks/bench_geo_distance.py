@@ -0,0 +1,48 @@
+"""
+Микро-бенчмарк расчета расстояний: поштучный great_circle_distance против great_circle_distance_batch.
+Запуск из корня проекта: python -m benchmarks.bench_geo_distance
+"""
+import asyncio
+import random
+import time
+
+from utils.geo import (
+    great_circle_distance,
+    great_circle_distance_batch,
+    _great_circle_distance_python
+)
+
+ORIGIN = (55.7558, 37.6173)
+RADIUS = 50_000
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+def make_points(n: int, seed: int = 42) -> list[tuple[float, float]]:
+    """Генерация n случайных точек вокруг исходной"""
+    rnd = random.Random(seed)
+    return [(ORIGIN[0] + rnd.uniform(-5, 5), ORIGIN[1] + rnd.uniform(-5, 5)) for _ in range(n)]
+
+
+async def per_pair(points) -> list[float]:
+    """Текущий способ: одна корутина на каждую пару точек"""
+    return [await great_circle_distance(point, ORIGIN) for point in points]
+
+
+def timeit(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'points':>10} {'per-pair, s':>12} {'batch python, s':>16} {'batch numpy, s':>15}")
+    for n in SIZES:
+        points = make_points(n)
+        t_pair = timeit(asyncio.run, per_pair(points))
+        t_python = timeit(_great_circle_distance_python, ORIGIN, points, RADIUS)
+        t_batch = timeit(great_circle_distance_batch, ORIGIN, points, RADIUS)
+        print(f"{n:>10} {t_pair:>12.4f} {t_python:>16.4f} {t_batch:>15.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Сравнение количества SQL-запросов и строк, которые возвращает БД, для списка пользователей:
+ORM-режим с joinedload(list_grade_history) против режима проекции (только колонки SUserView).
+Работает с БД из настроек (.env). Флаг --seed добавляет синтетических пользователей и оценки.
+Запуск из корня проекта: python -m benchmarks.bench_listing_projection [--seed 1000 --likes 20]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import event, insert
+
+from database import engine, async_session_maker
+from users.dao import UsersDAO
+from users.models import User, Grade
+from users.schemas import SUserView
+
+PAGE_SIZE = 100
+
+
+class QueryCounter:
+    """Счетчик запросов и строк результата, подключается к событиям движка"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries += 1
+        # количество строк, переданных драйвером (для joinedload это пользователи x оценки)
+        self.rows += max(cursor.rowcount, 0)
+
+
+async def seed(users: int, likes: int):
+    """Добавление синтетических пользователей и оценок"""
+    rnd = random.Random(1)
+    async with async_session_maker() as session:
+        async with session.begin():
+            result = await session.execute(insert(User).returning(User.id, User.email), [
+                {
+                    'email': f'bench{rnd.random()}@example.com', 'password': '-', 'first_name': 'Bench',
+                    'last_name': str(i), 'gender': rnd.choice(['men', 'women']), 'avatar': '-',
+                    'latitude': 55.75 + rnd.uniform(-1, 1), 'longitude': 37.6 + rnd.uniform(-1, 1),
+                } for i in range(users)
+            ])
+            created = result.all()
+            await session.execute(insert(Grade), [
+                {'user_id': user.id, 'email': rnd.choice(created).email}
+                for user in created for _ in range(likes)
+            ])
+
+
+async def measure(title: str, coro_factory):
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, 'after_cursor_execute', counter.after_cursor_execute)
+    start = time.perf_counter()
+    try:
+        items = await coro_factory()
+    finally:
+        event.remove(engine.sync_engine, 'after_cursor_execute', counter.after_cursor_execute)
+    elapsed = time.perf_counter() - start
+    print(f'{title:<32} users={len(items):>6} queries={counter.queries:>3} '
+          f'db rows={counter.rows:>8} time={elapsed * 1000:>8.1f} ms')
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=0, help='сколько пользователей добавить')
+    parser.add_argument('--likes', type=int, default=20, help='сколько оценок у каждого добавленного пользователя')
+    args = parser.parse_args()
+
+    engine.echo = False
+    if args.seed:
+        await seed(args.seed, args.likes)
+
+    await measure('find_all (joinedload)', lambda: UsersDAO.find_all())
+    await measure('find_all projection (page)', lambda: _all_pages(view=SUserView))
+    await measure(f'find_page joinedload, {PAGE_SIZE}', lambda: _first_page(view=None))
+    await measure(f'find_page projection, {PAGE_SIZE}', lambda: _first_page(view=SUserView))
+    await engine.dispose()
+
+
+async def _first_page(view):
+    page = await UsersDAO.find_page(limit=PAGE_SIZE, view=view)
+    return page.items
+
+
+async def _all_pages(view):
+    items, cursor = [], None
+    while True:
+        page = await UsersDAO.find_page(limit=1000, cursor=cursor, view=view)
+        items.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return items
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
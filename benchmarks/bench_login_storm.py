@@ -0,0 +1,97 @@
+"""
+Бенчмарк задержки несвязанного эндпоинта во время потока входов в систему:
+bcrypt в event loop (как было) против хеширования в пуле hash_executor.
+БД не нужна: проверка пароля выполняется на заранее подготовленном хеше.
+Запуск из корня проекта: python -m benchmarks.bench_login_storm [--logins 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from users.auth import (
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+    hash_executor
+)
+
+PASSWORD = 'correct horse battery staple'
+PASSWORD_HASH = get_password_hash(PASSWORD)
+
+app = FastAPI()
+
+
+@app.get('/ping')
+async def ping():
+    return {'ok': True}
+
+
+@app.post('/login/blocking')
+async def login_blocking():
+    return {'ok': verify_password(PASSWORD, PASSWORD_HASH)}
+
+
+@app.post('/login/pooled')
+async def login_pooled():
+    return {'ok': await verify_password_async(PASSWORD, PASSWORD_HASH)}
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def storm(client: httpx.AsyncClient, path: str, logins: int, concurrency: int) -> list[float]:
+    """
+    Поток входов с параллельным опросом /ping по расписанию, возвращает задержки /ping в мс.
+    Задержка считается от запланированного времени запроса, поэтому учитывает простой event loop.
+    """
+    latencies = []
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            await client.post(path)
+
+    async def pinger():
+        interval = 0.005
+        scheduled = time.perf_counter()
+        while True:
+            await client.get('/ping')
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+            if done.is_set():
+                break
+            scheduled = max(scheduled + interval, time.perf_counter())
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+
+    ping_task = asyncio.create_task(pinger())
+    await asyncio.gather(*(login() for _ in range(logins)))
+    done.set()
+    await ping_task
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        for title, path in (('bcrypt в event loop', '/login/blocking'), ('bcrypt в пуле', '/login/pooled')):
+            start = time.perf_counter()
+            latencies = await storm(client, path, args.logins, args.concurrency)
+            elapsed = time.perf_counter() - start
+            print(f'{title:<22} logins/s={args.logins / elapsed:>7.1f}  /ping: n={len(latencies):>5} '
+                  f'p50={statistics.median(latencies):>8.2f} ms  p99={percentile(latencies, 0.99):>8.2f} ms  '
+                  f'max={max(latencies):>8.2f} ms')
+    hash_executor.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
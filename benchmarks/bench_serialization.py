@@ -0,0 +1,80 @@
+"""
+Бенчмарк сериализации страницы пользователей: текущий путь (response_model=SUserPage, валидация
+и преобразование каждого объекта pydantic) против FastJSONResponse (словари из строк проекции и orjson),
+а также FastJSONResponse с gzip. Строки проекции создаются в памяти, БД не используется.
+Запуск из корня проекта: python -m benchmarks.bench_serialization [--users 1000 10000 --requests 50]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI, Request
+
+from config import settings
+from database import Gender
+from users.dao import UsersDAO
+from users.schemas import SUserView, SUserPage
+from utils.serialization import FastJSONResponse, dump_views, orjson
+
+app = FastAPI()
+ROWS: list = []
+
+
+@app.get('/pydantic', response_model=SUserPage)
+async def list_pydantic() -> dict:
+    return {'items': ROWS, 'next_cursor': None}
+
+
+@app.get('/fast', response_model=SUserPage)
+async def list_fast(request: Request):
+    return FastJSONResponse({'items': dump_views(ROWS, SUserView), 'next_cursor': None}, request=request)
+
+
+def make_rows(count: int) -> list:
+    """Строки проекции SUserView, как их возвращает UsersDAO.find_page(view=SUserView)"""
+    _, row_class = UsersDAO._projection(SUserView)
+    rnd = random.Random(count)
+    now = datetime(2024, 1, 1)
+    return [
+        row_class(id=number, email=f'user{number}@example.com', first_name=f'Имя{number}',
+                  last_name=f'Фамилия{number}', gender=rnd.choice(list(Gender)),
+                  avatar=f'users/avatars/{number:064x}', data_create_user=now - timedelta(minutes=number),
+                  latitude=55 + rnd.random(), longitude=37 + rnd.random(), distance=rnd.random() * 1000)
+        for number in range(count)
+    ]
+
+
+async def run(client: httpx.AsyncClient, path: str, requests: int, headers: dict) -> tuple[float, int]:
+    # размер тела в том виде, в котором оно передается по сети (со сжатием)
+    size = (await client.get(path, headers=headers)).num_bytes_downloaded
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+    return (time.perf_counter() - start) / requests * 1000, size
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f'кодировщик: {"orjson" if orjson else "json"}, gzip от {settings.JSON_GZIP_MIN_SIZE} байт')
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        for count in args.users:
+            ROWS[:] = make_rows(count)
+            assert (await client.get('/pydantic')).json() == (await client.get('/fast')).json()
+            for title, path, headers in (('pydantic', '/pydantic', {'accept-encoding': 'identity'}),
+                                         ('orjson', '/fast', {'accept-encoding': 'identity'}),
+                                         ('orjson + gzip', '/fast', {'accept-encoding': 'gzip'})):
+                ms, size = await run(client, path, max(1, args.requests * 1000 // count), headers)
+                print(f'{count:>6} пользователей  {title:<14} {ms:>8.1f} мс на страницу  {size:>9} байт')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
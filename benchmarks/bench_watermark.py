@@ -0,0 +1,99 @@
+"""
+Бенчмарк регистраций с аватаром в секунду: обработка аватара как раньше (новый ThreadPoolExecutor
+и чтение watermark.png на каждый запрос, декодирование в event loop) против ingest_avatar
+(общий пул image_executor, водяной знак и варианты аватара разного размера).
+Каждый запрос загружает изображение с уникальным содержимым, чтобы ingest_avatar не пропускал уже сохраненные аватары.
+Запросы идут через FastAPI-эндпоинт с загрузкой файла, БД и геокодер не используются.
+Запуск из корня проекта: python -m benchmarks.bench_watermark [--requests 200 --concurrency 16]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, UploadFile, File
+from PIL import Image
+
+from utils import avatars
+from utils.avatars import ingest_avatar
+from utils.img_watermark import (
+    start_image_service,
+    image_executor,
+    watermark_image_path
+)
+
+# до запуска пула: процессы пула наследуют путь при fork
+OUTPUT_DIR = Path(tempfile.mkdtemp(prefix='bench_avatars_'))
+avatars.PROJECT_ROOT = OUTPUT_DIR
+
+app = FastAPI()
+
+
+async def watermark_photo_legacy(input_image: UploadFile, output_image_name: str):
+    """Реализация до изменений"""
+    loop = asyncio.get_running_loop()
+    output_image_path = OUTPUT_DIR / output_image_name
+    with ThreadPoolExecutor() as pool:
+        base_image = Image.open(input_image.file)
+        watermark = await loop.run_in_executor(pool, Image.open, watermark_image_path)
+        base_image.paste(watermark, (0, 0), watermark)
+        await loop.run_in_executor(pool, base_image.save, output_image_path)
+    return str(output_image_path)
+
+
+@app.post('/legacy')
+async def register_legacy(avatar: UploadFile = File(...)):
+    return {'avatar': await watermark_photo_legacy(avatar, f'{random.random()}.png')}
+
+
+@app.post('/pooled')
+async def register_pooled(avatar: UploadFile = File(...)):
+    return {'avatar': await ingest_avatar(avatar)}
+
+
+def make_photo(size: tuple[int, int]) -> bytes:
+    """Создание JPEG, похожего на фотографию с телефона"""
+    image = Image.effect_noise(size, 64).convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+async def run(client: httpx.AsyncClient, path: str, photo: bytes, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def register():
+        async with semaphore:
+            # данные после маркера конца JPEG игнорируются декодером, но меняют sha256 файла
+            unique_photo = photo + random.randbytes(16)
+            response = await client.post(path, files={'avatar': ('photo.jpg', unique_photo, 'image/jpeg')})
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(register() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--size', type=int, default=1600, help='сторона тестового изображения')
+    args = parser.parse_args()
+
+    photo = make_photo((args.size, args.size))
+    await start_image_service()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        for title, path in (('как раньше', '/legacy'), ('ingest_avatar', '/pooled')):
+            rate = await run(client, path, photo, args.requests, args.concurrency)
+            print(f'{title:<14} регистраций с аватаром в секунду: {rate:>8.1f}')
+    image_executor.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
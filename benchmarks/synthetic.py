@@ -0,0 +1,181 @@
+"""
+Генератор синтетических данных для нагрузочных тестов: пользователи с координатами, сгруппированными
+по городам и районам, и граф симпатий (популярные пользователи получают больше симпатий, симпатии
+в основном внутри города и к противоположному полу, часть симпатий взаимная).
+Результат полностью определяется seed, поэтому замеры на разных коммитах идут на одинаковых данных.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from database import async_session_maker
+from users.dao import LikesDAO, MatchesDAO, UsersDAO
+from users.models import Like, User
+from utils.geohash import encode as geohash_encode
+
+# домен почты синтетических пользователей, по нему они удаляются после замера
+EMAIL_DOMAIN = 'load.bench'
+PASSWORD = 'load-bench-password'
+
+# город, широта и долгота центра, доля пользователей
+CITIES = (
+    ('Москва', 55.7558, 37.6173, 0.38),
+    ('Санкт-Петербург', 59.9343, 30.3351, 0.18),
+    ('Новосибирск', 55.0084, 82.9357, 0.08),
+    ('Екатеринбург', 56.8389, 60.6057, 0.08),
+    ('Казань', 55.7961, 49.1064, 0.07),
+    ('Нижний Новгород', 56.2965, 43.9361, 0.06),
+    ('Краснодар', 45.0355, 38.9753, 0.06),
+    ('Самара', 53.1959, 50.1002, 0.05),
+    ('Владивосток', 43.1198, 131.8869, 0.04),
+)
+# районов в городе; разброс центров районов и пользователей вокруг центра района в градусах
+DISTRICTS_PER_CITY = 12
+DISTRICT_SPREAD = 0.12
+USER_SPREAD = 0.02
+
+FIRST_NAMES = {
+    'men': ('Александр', 'Дмитрий', 'Максим', 'Иван', 'Артем', 'Никита', 'Михаил', 'Егор', 'Андрей', 'Илья'),
+    'women': ('Анна', 'Мария', 'Елена', 'Дарья', 'Алиса', 'Полина', 'Виктория', 'Екатерина', 'София', 'Ольга'),
+}
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+              'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров')
+
+# доля симпатий к противоположному полу, внутри своего города и доля ответных симпатий
+OPPOSITE_GENDER_SHARE = 0.85
+SAME_CITY_SHARE = 0.9
+RECIPROCAL_SHARE = 0.2
+# симпатии созданы раньше, чем за сутки до замера, и не расходуют дневной лимит
+LIKES_MIN_AGE = timedelta(days=2)
+
+
+class SyntheticData:
+    """
+    Набор синтетических данных
+    :param users: строки таблицы users в порядке генерации
+    :param cities: индекс города каждого пользователя
+    :param likes: пары (индекс кто ставит, индекс кому ставит)
+    """
+
+    def __init__(self, users: list[dict], cities: list[int], likes: list[tuple[int, int]]):
+        self.users = users
+        self.cities = cities
+        self.likes = likes
+
+
+def district_centers(rnd: random.Random) -> list[list[tuple[float, float]]]:
+    """Функция выбирает центры районов каждого города"""
+    return [
+        [(rnd.gauss(latitude, DISTRICT_SPREAD), rnd.gauss(longitude, DISTRICT_SPREAD * 1.6))
+         for _ in range(DISTRICTS_PER_CITY)]
+        for _, latitude, longitude, _ in CITIES
+    ]
+
+
+def city_address(city: int, number: int) -> str:
+    """Функция возвращает адрес синтетического пользователя для офлайн-геокодера"""
+    return f'Россия, {CITIES[city][0]}, ул.Нагрузочная {number}'
+
+
+def random_point(rnd: random.Random, districts: list[list[tuple[float, float]]], city: int) -> tuple[float, float]:
+    """Функция выбирает точку в случайном районе города (районы ближе к центру популярнее)"""
+    index = min(int(rnd.expovariate(1 / 3)), DISTRICTS_PER_CITY - 1)
+    latitude, longitude = districts[city][index]
+    return rnd.gauss(latitude, USER_SPREAD), rnd.gauss(longitude, USER_SPREAD * 1.6)
+
+
+def generate(users: int, likes_per_user: float, seed: int, password_hash: str,
+             now: Optional[datetime] = None) -> SyntheticData:
+    """
+    Функция генерирует пользователей и граф симпатий
+    :param users: количество пользователей
+    :param likes_per_user: среднее количество симпатий, которые ставит пользователь
+    :param seed: начальное значение генератора случайных чисел
+    :param password_hash: хеш пароля, общий для всех пользователей (хеширование bcrypt не входит в генерацию)
+    :param now: момент, от которого отсчитываются даты регистрации и симпатий
+    :return: синтетические данные
+    """
+    rnd = random.Random(seed)
+    now = now or datetime.utcnow()
+    districts = district_centers(rnd)
+    weights = [city[3] for city in CITIES]
+
+    rows, cities = [], []
+    for number in range(users):
+        city = rnd.choices(range(len(CITIES)), weights)[0]
+        gender = 'men' if rnd.random() < 0.5 else 'women'
+        latitude, longitude = random_point(rnd, districts, city)
+        rows.append({
+            'email': f'user{number}@{EMAIL_DOMAIN}',
+            'password': password_hash,
+            'first_name': rnd.choice(FIRST_NAMES[gender]),
+            'last_name': rnd.choice(LAST_NAMES) + ('а' if gender == 'women' else ''),
+            'gender': gender,
+            'avatar': 'users/avatars/default_avatar.png',
+            'data_create_user': now - timedelta(seconds=rnd.randint(LIKES_MIN_AGE.days * 86400, 365 * 86400)),
+            'latitude': latitude,
+            'longitude': longitude,
+            'geohash': geohash_encode(latitude, longitude),
+        })
+        cities.append(city)
+
+    # пользователи по (город, пол) с весами популярности (распределение Парето: немногие получают много симпатий)
+    popularity = [rnd.paretovariate(1.5) for _ in range(users)]
+    groups: dict[tuple[int, str], list[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault((cities[index], row['gender']), []).append(index)
+    group_weights = {key: [popularity[index] for index in members] for key, members in groups.items()}
+    everyone = list(range(users))
+
+    edges: set[tuple[int, int]] = set()
+    for liker in range(users):
+        for _ in range(int(rnd.expovariate(1 / likes_per_user)) if likes_per_user > 0 else 0):
+            gender = rows[liker]['gender']
+            if rnd.random() < OPPOSITE_GENDER_SHARE:
+                gender = 'women' if gender == 'men' else 'men'
+            city = cities[liker] if rnd.random() < SAME_CITY_SHARE else rnd.choices(range(len(CITIES)), weights)[0]
+            members = groups.get((city, gender))
+            target = rnd.choices(members, group_weights[(city, gender)])[0] if members else rnd.choice(everyone)
+            if target == liker:
+                continue
+            edges.add((liker, target))
+            if rnd.random() < RECIPROCAL_SHARE:
+                edges.add((target, liker))
+
+    return SyntheticData(rows, cities, sorted(edges))
+
+
+async def load(data: SyntheticData, seed: int) -> list[int]:
+    """
+    Функция записывает синтетические данные в БД массовой вставкой (взаимные симпатии переносятся в matches)
+    :param data: синтетические данные
+    :param seed: начальное значение генератора дат симпатий
+    :return: id пользователей в порядке data.users
+    """
+    await UsersDAO.add_many(data.users)
+    async with async_session_maker() as session:
+        result = await session.execute(select(User.email, User.id).where(User.email.like(f'%@{EMAIL_DOMAIN}')))
+        ids_by_email = dict(result.all())
+    ids = [ids_by_email[row['email']] for row in data.users]
+
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+    await LikesDAO.add_many(
+        {'liker_id': ids[liker], 'target_id': ids[target],
+         'date': now - LIKES_MIN_AGE - timedelta(seconds=rnd.randint(0, 180 * 86400))}
+        for liker, target in data.likes
+    )
+    # взаимные симпатии из массовой вставки переносятся в matches так же, как при миграции данных
+    await MatchesDAO.backfill_range(1, await MatchesDAO.max_like_id())
+    return ids
+
+
+async def cleanup() -> None:
+    """Функция удаляет синтетических пользователей (симпатии удаляются каскадно)"""
+    async with async_session_maker() as session:
+        async with session.begin():
+            synthetic = select(User.id).where(User.email.like(f'%@{EMAIL_DOMAIN}'))
+            await session.execute(delete(Like).where(Like.liker_id.in_(synthetic) | Like.target_id.in_(synthetic)))
+            await session.execute(delete(User).where(User.email.like(f'%@{EMAIL_DOMAIN}')))
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from pydantic_settings import (
     BaseSettings,
@@ -38,6 +39,93 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
 
+    # реплики только для чтения (полные ссылки postgresql+asyncpg://...), пустой список - все запросы на основную БД
+    DB_REPLICA_URLS: list[str] = []
+    # после записи чтение в том же контексте и в следующих запросах клиента (cookie) идет с основной БД
+    # указанное число секунд
+    DB_STICKY_SECONDS: float = 5.0
+    # настройки пула соединений (одинаковые для основной БД и реплик)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # кеш подготовленных запросов asyncpg, 0 - отключить (нужно при pgbouncer в режиме transaction)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # журнал медленных запросов (логгер sql.slow) вместо echo: порог в миллисекундах и доля записываемых запросов
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    # массовая запись BaseDAO.add_many/upsert_many: размер пачки и COPY для asyncpg (иначе executemany)
+    BULK_BATCH_SIZE: int = 5000
+    BULK_USE_COPY: bool = True
+
+    # индекс ячеек geohash в памяти процесса для отбора кандидатов рекомендаций рядом; пользователи других
+    # процессов и импорта попадают в него при перестроении из БД раз в SPATIAL_INDEX_REFRESH_SECONDS (0 - только при старте)
+    SPATIAL_INDEX_ENABLED: bool = False
+    SPATIAL_INDEX_PRECISION: int = 6
+    SPATIAL_INDEX_REFRESH_SECONDS: float = 300.0
+    # поиск по имени и фамилии: минимальное сходство по триграммам для совпадения с опечатками
+    # и индекс имен в памяти процесса вместо pg_trgm (для PostgreSQL без этого расширения)
+    NAME_SEARCH_THRESHOLD: float = 0.3
+    NAME_INDEX_ENABLED: bool = False
+
+    # размер страницы списка пользователей
+    PAGE_SIZE_DEFAULT: int = 20
+    PAGE_SIZE_MAX: int = 100
+
+    # кэш расшифрованных токенов и данных авторизованных пользователей
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_SIZE: int = 10000
+
+    # хеширование паролей bcrypt в пуле потоков (thread) или процессов (process)
+    BCRYPT_ROUNDS: int = 12
+    HASH_POOL_KIND: str = 'thread'
+    HASH_POOL_WORKERS: int = 4
+    HASH_QUEUE_SIZE: int = 64
+
+    # получение координат по адресу: nominatim или offline (адреса из JSON-файла, для тестов)
+    GEOCODER_PROVIDER: str = 'nominatim'
+    GEOCODER_OFFLINE_PATH: Optional[str] = None
+    GEOCODER_CACHE_PATH: Optional[str] = 'geocode_cache.sqlite3'
+    GEOCODER_CACHE_SIZE: int = 10000
+    GEOCODER_RATE_LIMIT: float = 1.0
+    GEOCODER_USER_AGENT: str = 'FastAPI_Like/1.0'
+
+    # хранилище счетчиков дневного лимита симпатий: sql, memory или redis
+    QUOTA_BACKEND: str = 'sql'
+    # адрес Redis, memory:// - локальная замена в памяти процесса
+    REDIS_URL: str = 'memory://'
+
+    # кэш запросов списка пользователей: memory, redis (общий, по REDIS_URL) или off
+    LISTING_CACHE_BACKEND: str = 'memory'
+    LISTING_CACHE_TTL: float = 30
+    LISTING_CACHE_SIZE: int = 1000
+
+    # лента рекомендаций: размер ленты, радиус поиска кандидатов в метрах,
+    # количество ближайших пользователей, в ленты которых добавляется новый пользователь
+    RECOMMENDATION_FEED_SIZE: int = 500
+    RECOMMENDATION_RADIUS: int = 50_000
+    RECOMMENDATION_FANOUT: int = 200
+    # масштаб убывания оценки расстояния в метрах и шаг новизны в днях
+    RECOMMENDATION_DISTANCE_SCALE: float = 10_000
+    RECOMMENDATION_RECENCY_DAYS: float = 30
+    # веса составляющих оценки
+    RECOMMENDATION_WEIGHT_DISTANCE: float = 1.0
+    RECOMMENDATION_WEIGHT_GENDER: float = 1.0
+    RECOMMENDATION_WEIGHT_RECENCY: float = 0.05
+    RECOMMENDATION_WEIGHT_RECIPROCAL: float = 0.5
+
+    # пул обработки изображений: process или thread
+    IMAGE_POOL_KIND: str = 'process'
+    IMAGE_POOL_WORKERS: int = 2
+    IMAGE_QUEUE_SIZE: int = 32
+    # ограничения загружаемого аватара: размер файла в байтах и количество пикселей
+    AVATAR_MAX_BYTES: int = 10 * 1024 * 1024
+    AVATAR_MAX_PIXELS: int = 40_000_000
+
+    # сжатие gzip JSON-ответов списков от указанного размера в байтах, 0 - не сжимать
+    JSON_GZIP_MIN_SIZE: int = 16 * 1024
+    JSON_GZIP_LEVEL: int = 5
+
     model_config = SettingsConfigDict(
         env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".." ,".env")
     )
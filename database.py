@@ -1,7 +1,24 @@
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import (
+    CookieError,
+    SimpleCookie
+)
+from math import ceil
 from datetime import datetime
-from typing import Annotated
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Iterator,
+    Optional
+)
 from enum import Enum
-from sqlalchemy import func
+from sqlalchemy import (
+    event,
+    func
+)
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncAttrs,
@@ -14,10 +31,26 @@ from sqlalchemy.orm import (
     declared_attr
 )
 from config import settings
+from utils.metrics import instrument_engine
 
 DATABASE_URL = settings.get_db_url()
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+
+def make_engine(url: str):
+    """Функция создает асинхронный движок с настройками пула из Settings"""
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE}
+    )
+
+
+# основная БД: все записи и чтения сразу после записи
+engine = make_engine(DATABASE_URL)
 
 async_session_maker = sessionmaker(
     engine,
@@ -25,6 +58,201 @@ async_session_maker = sessionmaker(
     expire_on_commit=False
 )
 
+# реплики для чтения, выбираются по кругу (см. configure_replicas)
+replica_engines: list = []
+replica_session_makers: list = []
+_replica_cycle = itertools.cycle(replica_session_makers)
+
+class _Sticky:
+    """Момент (time.time), до которого чтение идет с основной БД; общий для всех задач одного запроса"""
+    __slots__ = ('until',)
+
+    def __init__(self, until: float = 0.0):
+        self.until = until
+
+
+# время по часам (time.time), а не time.monotonic: значение переходит между запросами и процессами в cookie
+_sticky: ContextVar[Optional[_Sticky]] = ContextVar('sticky', default=None)
+
+# cookie клиента со временем окончания чтения с основной БД после его последней записи
+STICKY_COOKIE = 'db_primary_until'
+# допустимое расхождение часов процессов при проверке cookie, секунды
+STICKY_CLOCK_SKEW = 1.0
+
+
+def mark_write() -> None:
+    """
+    Функция отмечает запись в текущем контексте, чтобы следующие чтения видели ее (read-your-writes).
+    В HTTP-запросе отметка через ReadYourWritesMiddleware сохраняется в cookie и действует
+    на следующие запросы того же клиента к любому процессу
+    """
+    until = time.time() + settings.DB_STICKY_SECONDS
+    sticky = _sticky.get()
+    if sticky is None:
+        _sticky.set(_Sticky(until))
+    else:
+        sticky.until = max(sticky.until, until)
+
+
+def read_session_maker():
+    """
+    Функция выбирает фабрику сессий для чтения: реплика, если они настроены
+    и в текущем контексте (или у клиента запроса) недавно не было записи, иначе основная БД
+    :return: фабрика сессий
+    """
+    sticky = _sticky.get()
+    if not replica_session_makers or (sticky is not None and time.time() < sticky.until):
+        return async_session_maker
+    return next(_replica_cycle)
+
+
+def _cookie_until(headers) -> float:
+    """Функция достает из заголовков запроса время из cookie STICKY_COOKIE (0, если его нет или оно испорчено)"""
+    for name, value in headers:
+        if name != b'cookie':
+            continue
+        cookies = SimpleCookie()
+        try:
+            cookies.load(value.decode('latin-1'))
+        except CookieError:
+            continue
+        if STICKY_COOKIE in cookies:
+            try:
+                until = float(cookies[STICKY_COOKIE].value)
+            except ValueError:
+                return 0.0
+            # значение дальше одного окна (с запасом на расхождение часов процессов) не могло быть выдано
+            # сервером: подделанная cookie не закрепляет клиента за основной БД
+            if not until <= time.time() + settings.DB_STICKY_SECONDS + STICKY_CLOCK_SKEW:
+                return 0.0
+            return until
+    return 0.0
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware: переносит read-your-writes между запросами одного клиента.
+    Если при обработке запроса была запись (mark_write), в ответ добавляется короткоживущая cookie
+    со временем окончания окна DB_STICKY_SECONDS; пока оно не истекло, чтения следующих запросов
+    клиента (например, вход или /api/me сразу после регистрации) идут с основной БД, а не с отстающей реплики.
+    Без реплик middleware ничего не делает.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not replica_session_makers:
+            await self.app(scope, receive, send)
+            return
+
+        received_until = _cookie_until(scope['headers'])
+        sticky = _Sticky(received_until)
+        token = _sticky.set(sticky)
+
+        async def send_wrapper(message):
+            # заголовки уходят после эндпоинта, записи фоновых задач в cookie не попадают:
+            # они выполняются после ответа и клиент узнает о них только из следующих запросов
+            if message['type'] == 'http.response.start' and sticky.until > received_until:
+                cookie = SimpleCookie()
+                cookie[STICKY_COOKIE] = f'{sticky.until:.3f}'
+                cookie[STICKY_COOKIE]['max-age'] = ceil(settings.DB_STICKY_SECONDS)
+                cookie[STICKY_COOKIE]['path'] = '/'
+                cookie[STICKY_COOKIE]['httponly'] = True
+                cookie[STICKY_COOKIE]['samesite'] = 'lax'
+                header = cookie.output(header='').strip().encode('latin-1')
+                message = {**message, 'headers': [*message.get('headers', []), (b'set-cookie', header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _sticky.reset(token)
+
+
+# счетчик выдачи соединений из пулов в текущем контексте, см. count_checkouts
+_checkout_counter: ContextVar[Optional[list[int]]] = ContextVar('checkout_counter', default=None)
+
+
+def _on_checkout(*args) -> None:
+    """Обработчик события checkout пула: увеличивает счетчик текущего контекста, если он включен"""
+    counter = _checkout_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def _watch_engine(db_engine) -> None:
+    """Функция подключает к движку подсчет выдач соединений и метрики SQL-запросов"""
+    event.listen(db_engine.sync_engine.pool, 'checkout', _on_checkout)
+    instrument_engine(db_engine)
+
+
+def configure_replicas(urls: list[str]) -> list:
+    """
+    Функция создает движки реплик для чтения (при импорте - по settings.DB_REPLICA_URLS).
+    Списки replica_engines и replica_session_makers изменяются на месте, ссылки на них остаются действительными
+    :param urls: полные ссылки postgresql+asyncpg:// на реплики, пустой список - чтение с основной БД
+    :return: прежние движки реплик, их соединения нужно закрыть (dispose)
+    """
+    global _replica_cycle
+    previous = list(replica_engines)
+    replica_engines[:] = [make_engine(url) for url in urls]
+    for replica in replica_engines:
+        _watch_engine(replica)
+    replica_session_makers[:] = [
+        sessionmaker(replica, class_=AsyncSession, expire_on_commit=False) for replica in replica_engines
+    ]
+    _replica_cycle = itertools.cycle(list(replica_session_makers))
+    return previous
+
+
+_watch_engine(engine)
+configure_replicas(settings.DB_REPLICA_URLS)
+
+
+@contextmanager
+def count_checkouts() -> Iterator[list[int]]:
+    """
+    Контекстный менеджер для подсчета соединений, взятых из пулов (основной БД и реплик) внутри блока
+    :return: список из одного элемента - количество выдач соединений
+    """
+    counter = [0]
+    token = _checkout_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _checkout_counter.reset(token)
+
+
+def unique_violation(error: Exception) -> Optional[str]:
+    """
+    Функция для получения имени уникального ограничения, нарушение которого вызвало ошибку IntegrityError
+    :param error: исключение sqlalchemy
+    :return: имя ограничения либо None, если ошибка не связана с уникальностью (например, NOT NULL)
+    """
+    # исключение драйвера asyncpg доступно через адаптер sqlalchemy (error.orig) как его причина
+    driver_error = getattr(getattr(error, 'orig', None), '__cause__', None)
+    if getattr(driver_error, 'sqlstate', None) != '23505':
+        return None
+    return getattr(driver_error, 'constraint_name', None)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость FastAPI: одна сессия основной БД на запрос (unit of work).
+    Все методы DAO, которым передана эта сессия, выполняются в одной транзакции на одном соединении;
+    транзакция фиксируется после успешного выполнения эндпоинта и откатывается при исключении.
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            yield session
+
+
+async def dispose_engines() -> None:
+    """Функция закрывает соединения пулов основной БД и реплик"""
+    for db_engine in (engine, *replica_engines):
+        await db_engine.dispose()
+
 # настройка аннотаций
 int_pk = Annotated[int, mapped_column(primary_key=True)]
 str_uniq = Annotated[str, mapped_column(unique=True, nullable=False)]
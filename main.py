@@ -1,7 +1,82 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from config import settings
+from database import (
+    ReadYourWritesMiddleware,
+    dispose_engines
+)
+from users.auth import hash_executor
+from users.dao import UsersDAO
+from users.dependencies import get_cache_stats
 from users.router import router as router_user
+from utils.executor import ExecutorUnavailable
+from utils.geocoding import geocoder
+from utils.listing_cache import listing_cache
+from utils.metrics import (
+    MetricsMiddleware,
+    registry
+)
+from utils.img_watermark import (
+    image_executor,
+    start_image_service
+)
+from utils.name_search import name_index
+from utils.send_email import outbox
+from utils.spatial_index import spatial_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Действия при запуске и остановке приложения"""
+    # построение индекса ячеек geohash в памяти процесса
+    if settings.SPATIAL_INDEX_ENABLED:
+        spatial_index.rebuild(await UsersDAO.find_geohashes())
+        spatial_index.start_refresh(UsersDAO.find_geohashes, settings.SPATIAL_INDEX_REFRESH_SECONDS)
+    # индекс имен в памяти процесса для поиска по имени без pg_trgm
+    if settings.NAME_INDEX_ENABLED:
+        name_index.rebuild(await UsersDAO.find_names())
+    # фоновая отправка писем из очереди
+    outbox.start()
+    # запуск пула обработки изображений с загруженным водяным знаком
+    await start_image_service()
+    yield
+    await spatial_index.stop_refresh()
+    await outbox.stop()
+    hash_executor.shutdown()
+    image_executor.shutdown()
+    await geocoder.close()
+    await dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+
+
+def _runtime_metrics():
+    """Значения очереди писем и пулов блокирующих задач на момент запроса /metrics"""
+    email = outbox.metrics()
+    yield 'email_queue_depth', 'Писем в очереди отправки', 'gauge', email['queue_depth']
+    yield 'email_sent_total', 'Отправлено писем', 'counter', email['sent']
+    yield 'email_failed_total', 'Писем, не отправленных после всех попыток', 'counter', email['failed']
+    yield 'email_retries_total', 'Повторных попыток отправки писем', 'counter', email['retries']
+    yield 'email_dropped_total', 'Писем, отброшенных из-за переполнения очереди', 'counter', email['dropped']
+    yield 'password_hash_pending', 'Задач хеширования паролей в работе и в очереди', 'gauge', hash_executor.pending
+    yield 'image_pending', 'Задач обработки изображений в работе и в очереди', 'gauge', image_executor.pending
+
+
+registry.register_collector(_runtime_metrics)
+
+
+@app.exception_handler(ExecutorUnavailable)
+async def executor_unavailable_handler(request: Request, exc: ExecutorUnavailable):
+    """Ответ 503, если очередь пула блокирующих задач переполнена или его процесс аварийно завершился"""
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={'detail': 'Сервер перегружен, повторите запрос позже'})
 
-app = FastAPI()
 
 @app.get("/")
 async def root():
@@ -12,4 +87,22 @@ async def root():
 async def say_hello(name: str):
     return {"message": f"Hello {name}"}
 
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """эндпоинт со счетчиками попаданий и промахов кэшей авторизации и кэша списков пользователей"""
+    return {**get_cache_stats(), 'listing': listing_cache.stats()}
+
+
+@app.get("/email/stats")
+async def email_stats():
+    """эндпоинт с размером очереди писем и метриками отправки"""
+    return outbox.metrics()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """эндпоинт с метриками в текстовом формате Prometheus: время запросов по маршрутам, SQL-запросы, операции"""
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
 app.include_router(router_user)
@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
 from database import DATABASE_URL, Base
-from users.models import User
+from users.models import User, Grade, Like, Match, Recommendation, RecommendationFeed
 
 
 # this is the Alembic Config object, which provides
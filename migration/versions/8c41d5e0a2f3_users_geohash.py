@@ -0,0 +1,51 @@
+"""users geohash
+
+Revision ID: 8c41d5e0a2f3
+Revises: 3f9a1c2b7d10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d5e0a2f3'
+down_revision: Union[str, None] = '3f9a1c2b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index('ix_users_geohash', 'users', ['geohash'], unique=False,
+                    postgresql_ops={'geohash': 'varchar_pattern_ops'})
+
+    # заполнение geohash для существующих пользователей пачками по id
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text("SELECT id, latitude, longitude FROM users "
+                    "WHERE id > :last_id AND latitude IS NOT NULL AND longitude IS NOT NULL "
+                    "ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            sa.text("UPDATE users SET geohash = :geohash WHERE id = :id"),
+            [{'id': row.id, 'geohash': encode(row.latitude, row.longitude)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_geohash', table_name='users')
+    op.drop_column('users', 'geohash')
@@ -0,0 +1,34 @@
+"""users name trigram index
+
+Revision ID: a4c7e2d9b815
+Revises: f2b8d4a6c913
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e2d9b815'
+down_revision: Union[str, None] = 'f2b8d4a6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# выражение должно совпадать с UsersDAO._name_expression, иначе планировщик не использует индекс
+NAME_COLUMNS = ('first_name', 'last_name')
+
+
+def upgrade() -> None:
+    # GIN-индексы по триграммам поддерживают и LIKE 'префикс%', и оператор сходства %
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in NAME_COLUMNS:
+        op.execute(f"CREATE INDEX ix_users_{column}_trgm ON users "
+                   f"USING gin (replace(lower({column}), 'ё', 'е') gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    for column in NAME_COLUMNS:
+        op.drop_index(f'ix_users_{column}_trgm', table_name='users')
@@ -0,0 +1,34 @@
+"""recommendation feeds table
+
+Revision ID: b6d1f8e3a427
+Revises: a4c7e2d9b815
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f8e3a427'
+down_revision: Union[str, None] = 'a4c7e2d9b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # отметки не переносятся: ленты, в которые до этого только добавлялись кандидаты, неполные,
+    # поэтому все ленты заново строятся при первом запросе или командой python -m users.recommendations
+    op.create_table(
+        'recommendation_feeds',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('built_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('recommendation_feeds')
@@ -0,0 +1,48 @@
+"""likes table
+
+Revision ID: b7e2f94c1d05
+Revises: 8c41d5e0a2f3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f94c1d05'
+down_revision: Union[str, None] = '8c41d5e0a2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'likes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('liker_id', sa.Integer(), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['liker_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['target_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('liker_id', 'target_id', name='uq_likes_liker_id_target_id'),
+    )
+    op.create_index('ix_likes_target_id_liker_id', 'likes', ['target_id', 'liker_id'], unique=False)
+
+    # перенос оценок: в grades хранится id поставившего оценку и email получателя
+    op.execute(
+        "INSERT INTO likes (liker_id, target_id, date) "
+        "SELECT g.user_id, u.id, MIN(g.date) FROM grades g "
+        "JOIN users u ON u.email = g.email "
+        "WHERE g.user_id <> u.id "
+        "GROUP BY g.user_id, u.id "
+        "ON CONFLICT ON CONSTRAINT uq_likes_liker_id_target_id DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_likes_target_id_liker_id', table_name='likes')
+    op.drop_table('likes')
@@ -0,0 +1,26 @@
+"""likes liker_id date index
+
+Revision ID: d93a6b8e4f27
+Revises: b7e2f94c1d05
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93a6b8e4f27'
+down_revision: Union[str, None] = 'b7e2f94c1d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_likes_liker_id_date', 'likes', ['liker_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_likes_liker_id_date', table_name='likes')
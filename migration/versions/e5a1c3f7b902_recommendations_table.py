@@ -0,0 +1,43 @@
+"""recommendations table
+
+Revision ID: e5a1c3f7b902
+Revises: d93a6b8e4f27
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c3f7b902'
+down_revision: Union[str, None] = 'd93a6b8e4f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'recommendations',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('distance_score', sa.Float(), nullable=False),
+        sa.Column('gender_score', sa.Float(), nullable=False),
+        sa.Column('recency_score', sa.Float(), nullable=False),
+        sa.Column('reciprocal_score', sa.Float(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['candidate_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'candidate_id'),
+    )
+    op.create_index('ix_recommendations_user_id_score', 'recommendations',
+                    ['user_id', 'score', 'candidate_id'], unique=False)
+    op.create_index('ix_recommendations_candidate_id', 'recommendations', ['candidate_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recommendations_candidate_id', table_name='recommendations')
+    op.drop_index('ix_recommendations_user_id_score', table_name='recommendations')
+    op.drop_table('recommendations')
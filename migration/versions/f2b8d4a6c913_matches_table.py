@@ -0,0 +1,37 @@
+"""matches table
+
+Revision ID: f2b8d4a6c913
+Revises: e5a1c3f7b902
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4a6c913'
+down_revision: Union[str, None] = 'e5a1c3f7b902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'matches',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['match_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'match_id'),
+    )
+    op.create_index('ix_matches_user_id_date', 'matches', ['user_id', 'date', 'match_id'], unique=False)
+    # существующие взаимные симпатии переносятся пакетной задачей: python -m users.matches
+
+
+def downgrade() -> None:
+    op.drop_index('ix_matches_user_id_date', table_name='matches')
+    op.drop_table('matches')
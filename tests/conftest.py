@@ -0,0 +1,104 @@
+"""
+Общие фикстуры тестов.
+Тесты с БД выполняются на отдельных локальных БД PostgreSQL: основной TEST_DB_NAME (по умолчанию fastlike_test)
+и реплике TEST_REPLICA_DB_NAME (fastlike_test_replica, без потоковой репликации - отдельная БД с той же схемой).
+Сервер и учетные данные берутся из .env, БД создаются при первом запуске, таблицы - по моделям.
+Если PostgreSQL недоступен, тесты с БД пропускаются.
+"""
+import os
+
+import pytest
+
+from config import settings
+
+TEST_DB_NAME = os.environ.get('TEST_DB_NAME', 'fastlike_test')
+TEST_REPLICA_DB_NAME = os.environ.get('TEST_REPLICA_DB_NAME', 'fastlike_test_replica')
+
+# движки и сервисы создаются при импорте модулей приложения, поэтому настройки меняются до их импорта
+settings.DB_NAME = TEST_DB_NAME
+settings.DB_REPLICA_URLS = []
+settings.BCRYPT_ROUNDS = 4
+settings.GEOCODER_PROVIDER = 'offline'
+settings.GEOCODER_CACHE_PATH = None
+settings.LISTING_CACHE_BACKEND = 'off'
+
+
+def db_url(name: str) -> str:
+    """Функция возвращает ссылку на локальную БД с учетными данными из настроек"""
+    return (f'postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@'
+            f'{settings.DB_HOST}:{settings.DB_PORT}/{name}')
+
+
+@pytest.fixture(scope='session')
+def anyio_backend():
+    # один event loop на все тесты: соединения пулов привязаны к циклу, в котором созданы
+    return 'asyncio'
+
+
+async def _prepare_database(name: str) -> None:
+    """Функция создает БД, если ее нет, и таблицы по моделям"""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from database import Base
+    import users.models  # noqa: F401 - регистрация моделей в Base.metadata
+
+    server = create_async_engine(db_url('postgres'), isolation_level='AUTOCOMMIT')
+    try:
+        async with server.connect() as connection:
+            exists = await connection.scalar(text('SELECT 1 FROM pg_database WHERE datname = :name'),
+                                             {'name': name})
+            if not exists:
+                await connection.execute(text(f'CREATE DATABASE "{name}"'))
+    finally:
+        await server.dispose()
+
+    target = create_async_engine(db_url(name))
+    try:
+        async with target.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    finally:
+        await target.dispose()
+
+
+@pytest.fixture(scope='session')
+async def databases(anyio_backend):
+    """Основная БД и БД реплики для тестов: имена (основная, реплика)"""
+    try:
+        for name in (TEST_DB_NAME, TEST_REPLICA_DB_NAME):
+            await _prepare_database(name)
+    except (OSError, ConnectionError) as e:
+        pytest.skip(f'Локальный PostgreSQL недоступен: {e}')
+
+    yield TEST_DB_NAME, TEST_REPLICA_DB_NAME
+
+    from database import dispose_engines
+    await dispose_engines()
+
+
+async def truncate_all(url: str) -> None:
+    """Функция очищает все таблицы БД"""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from database import Base
+
+    names = ', '.join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+    target = create_async_engine(url)
+    try:
+        async with target.begin() as connection:
+            await connection.execute(text(f'TRUNCATE {names} RESTART IDENTITY CASCADE'))
+    finally:
+        await target.dispose()
+
+
+@pytest.fixture
+async def clean_db(databases):
+    """Пустые таблицы основной БД и БД реплики, пустые кэши авторизации"""
+    from users.dependencies import token_cache, user_view_cache
+
+    for name in databases:
+        await truncate_all(db_url(name))
+    token_cache.clear()
+    user_view_cache.clear()
+    return databases
@@ -0,0 +1,17 @@
+"""
+Расчет процентилей нагрузочного теста (benchmarks.bench_api_load.percentile) для малого количества замеров.
+"""
+from benchmarks.bench_api_load import percentile
+
+
+def test_percentile_of_few_samples():
+    assert percentile([], 95) == 0.0
+    assert percentile([12.5], 50) == percentile([12.5], 99) == 12.5
+    assert percentile([10.0, 20.0], 50) == 15.0
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 102)]
+    assert percentile(values, 50) == 51.0
+    assert percentile(values, 95) == 96.0
+    assert percentile(values, 99) == 100.0
@@ -0,0 +1,74 @@
+"""
+Индекс имен в памяти процесса (utils.name_search.NameIndex): поиск по префиксу, с опечатками и по нескольким словам,
+порядок результатов и добавление пользователей после построения индекса.
+"""
+import pytest
+
+from utils.name_search import (
+    NameIndex,
+    query_words
+)
+
+THRESHOLD = 0.3
+
+USERS = [
+    (1, 'Иван', 'Петров'),
+    (2, 'Иванна', 'Сидорова'),
+    (3, 'Пётр', 'Иванов'),
+    (4, 'Мария', 'Петрова'),
+    (5, 'Анна', 'Смирнова'),
+]
+
+
+@pytest.fixture
+def index() -> NameIndex:
+    index = NameIndex()
+    index.rebuild(USERS)
+    return index
+
+
+def search(index: NameIndex, query: str) -> list[int]:
+    return [user_id for _, user_id in index.search(query_words(query), THRESHOLD)]
+
+
+def test_not_ready_and_empty_query():
+    index = NameIndex()
+    assert index.search(['иван'], THRESHOLD) is None
+    index.rebuild([])
+    assert index.search([], THRESHOLD) == []
+    assert index.search(['иван'], THRESHOLD) == []
+
+
+def test_prefix(index):
+    # 'ива' ближе к 'иван', чем к 'иванна' и 'иванов'; при равной оценке порядок по id
+    assert search(index, 'Ива') == [1, 2, 3]
+    assert search(index, 'смир') == [5]
+
+
+def test_typo(index):
+    # пропущенная и переставленные буквы
+    assert search(index, 'Смирнва') == [5]
+    assert search(index, 'Сидорвоа') == [2]
+    assert search(index, 'Зайцев') == []
+
+
+def test_multiple_words_and_ranking(index):
+    ranked = index.search(query_words('иван петров'), THRESHOLD)
+    # оба слова совпадают точно у пользователя 1; у пользователя 3 'иван' - префикс фамилии, 'петров' похоже на 'пётр'
+    assert [user_id for _, user_id in ranked] == [1, 3]
+    assert ranked[0][0] == 1.0 and ranked[0][0] > ranked[1][0]
+    # каждое слово должно совпасть: у пользователя 4 нет имени, похожего на 'иван'
+    assert search(index, 'Мария Иван') == []
+    # ё и е не различаются; у пользователя 1 'петр' - префикс фамилии, 'иванов' похоже на имя
+    assert search(index, 'Пётр Иванов') == search(index, 'петр иванов') == [3, 1]
+
+
+def test_add_after_rebuild(index):
+    index.add(6, 'Иван', 'Смирнов')
+    index.add(7, 'Алексей', 'Иваненко')
+
+    assert search(index, 'иван смирнов') == [6]
+    assert search(index, 'ива') == [1, 6, 2, 3, 7]
+    assert search(index, 'Алексй') == [7]
+    # список для поиска по префиксу остается отсортированным
+    assert index._sorted_names == sorted(index._sorted_names)
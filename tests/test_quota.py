@@ -0,0 +1,73 @@
+"""
+Хранилища счетчиков дневного лимита (utils.quota): отмена действия уменьшает счетчик того окна,
+в котором действие было учтено, даже если окно уже сменилось.
+"""
+import time
+
+import pytest
+
+from utils.quota import (
+    InMemoryCounterStore,
+    RedisCounterStore
+)
+from utils.redis_client import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+WINDOW = 100
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Часы time.time, которые тест переводит вручную"""
+    now = [199.9]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+async def test_redis_release_after_window_change(clock):
+    client = FakeRedis()
+    store = RedisCounterStore(client)
+
+    hit = await store.hit('likes:1', 5, WINDOW)
+    assert hit == 'quota:likes:1:1'
+
+    # окно сменилось между учетом действия и его отменой
+    clock[0] = 200.1
+    await store.release('likes:1', hit)
+    assert await client.get('quota:likes:1:1') == b'0'
+    assert await client.get('quota:likes:1:2') is None
+
+
+async def test_redis_release_of_expired_window(clock):
+    client = FakeRedis()
+    store = RedisCounterStore(client)
+
+    hit = await store.hit('likes:1', 5, WINDOW)
+    await client.delete(hit)
+    # счетчик истекшего окна не остается со значением -1 без срока жизни
+    await store.release('likes:1', hit)
+    assert await client.get(hit) is None
+
+
+async def test_redis_limit(clock):
+    store = RedisCounterStore(FakeRedis())
+    hits = [await store.hit('likes:1', 2, WINDOW) for _ in range(3)]
+    assert hits[0] is not None and hits[1] is not None and hits[2] is None
+
+    await store.release('likes:1', hits[0])
+    assert await store.hit('likes:1', 2, WINDOW) is not None
+
+
+async def test_memory_release_removes_own_hit():
+    store = InMemoryCounterStore()
+    first = await store.hit('likes:1', 2, WINDOW)
+    second = await store.hit('likes:1', 2, WINDOW)
+    assert await store.hit('likes:1', 2, WINDOW) is None
+
+    await store.release('likes:1', first)
+    assert list(store._hits['likes:1']) == [second]
+    await store.release('likes:1', second)
+    assert 'likes:1' not in store._hits
+    # повторная отмена и отмена по неизвестному ключу ничего не делают
+    await store.release('likes:1', second)
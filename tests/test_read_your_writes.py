@@ -0,0 +1,127 @@
+"""
+Маршрутизация чтений между основной БД и репликой (database.read_session_maker, ReadYourWritesMiddleware).
+Реплика - отдельная БД без репликации, поэтому по найденным строкам видно, с какой БД было чтение.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+import database
+from config import settings
+from database import (
+    STICKY_COOKIE,
+    ReadYourWritesMiddleware,
+    configure_replicas,
+    mark_write
+)
+from tests.conftest import db_url
+from users.dao import UsersDAO
+from users.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+def user_values(email: str) -> dict:
+    return dict(email=email, password='x', first_name='Тест', last_name='Реплик', gender='men',
+                avatar='users/avatars/default_avatar.png', latitude=55.75, longitude=37.61)
+
+
+@pytest.fixture
+async def replica(clean_db):
+    """Реплика из TEST_REPLICA_DB_NAME с пользователем, которого нет в основной БД"""
+    _, replica_name = clean_db
+    url = db_url(replica_name)
+    for previous in configure_replicas([url]):
+        await previous.dispose()
+    settings.DB_REPLICA_URLS = [url]
+    async with database.replica_engines[0].begin() as connection:
+        await connection.execute(insert(User).values(**user_values('replica-only@test.io')))
+
+    yield
+
+    settings.DB_REPLICA_URLS = []
+    for previous in configure_replicas([]):
+        await previous.dispose()
+
+
+async def in_new_context(func):
+    """Функция выполняет корутину в отдельной задаче без отметки о записи (как новый запрос)"""
+    async def run():
+        database._sticky.set(None)
+        return await func()
+    return await asyncio.create_task(run())
+
+
+async def find(email: str) -> bool:
+    return await UsersDAO.find_one_or_none(email=email) is not None
+
+
+async def test_reads_go_to_replica(replica):
+    async def scenario():
+        return await find('replica-only@test.io'), database.read_session_maker() is database.async_session_maker
+
+    assert await in_new_context(scenario) == (True, False)
+
+
+async def test_read_after_write_goes_to_primary(replica):
+    async def scenario():
+        await UsersDAO.add(**user_values('written@test.io'))
+        return await find('written@test.io'), await find('replica-only@test.io')
+
+    # запись видна сразу, а строки, которые есть только в реплике, - нет
+    assert await in_new_context(scenario) == (True, False)
+
+
+async def test_mark_write_sticks_reads_to_primary(replica):
+    async def scenario():
+        before = database.read_session_maker() is database.async_session_maker
+        mark_write()
+        return before, database.read_session_maker() is database.async_session_maker
+
+    assert await in_new_context(scenario) == (False, True)
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post('/users/')
+    async def create(email: str):
+        await UsersDAO.add(**user_values(email))
+        return {}
+
+    @app.get('/users/')
+    async def exists(email: str):
+        return {'found': await find(email)}
+
+    return app
+
+
+async def test_next_request_of_writer_reads_primary(replica, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_STICKY_SECONDS', 1.0)
+    transport = httpx.ASGITransport(app=make_app())
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as writer, \
+            httpx.AsyncClient(transport=transport, base_url='http://test') as other:
+        response = await writer.post('/users/', params={'email': 'cookie@test.io'})
+        assert response.status_code == 200
+        assert STICKY_COOKIE in writer.cookies
+
+        # следующий запрос того же клиента видит запись, другой клиент читает с реплики
+        assert (await writer.get('/users/', params={'email': 'cookie@test.io'})).json() == {'found': True}
+        assert (await other.get('/users/', params={'email': 'cookie@test.io'})).json() == {'found': False}
+        assert (await other.get('/users/', params={'email': 'replica-only@test.io'})).json() == {'found': True}
+
+        # после окна DB_STICKY_SECONDS чтения клиента снова идут с реплики
+        await asyncio.sleep(1.1)
+        assert (await writer.get('/users/', params={'email': 'cookie@test.io'})).json() == {'found': False}
+
+
+async def test_forged_cookie_is_ignored(replica):
+    transport = httpx.ASGITransport(app=make_app())
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        headers = {'Cookie': f'{STICKY_COOKIE}=99999999999'}
+        assert (await client.get('/users/', params={'email': 'replica-only@test.io'},
+                                 headers=headers)).json() == {'found': True}
@@ -0,0 +1,117 @@
+"""
+Очередь писем (utils.send_email.EmailOutbox) с локальным SMTP-сервером aiosmtpd:
+пачки через одно соединение, повтор после временной ошибки сервера, отбрасывание писем при переполнении очереди.
+"""
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from utils.send_email import (
+    EmailOutbox,
+    SMTPSession
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingHandler:
+    """Обработчик aiosmtpd: запоминает получателей и адрес клиента (одно соединение - один адрес)"""
+
+    def __init__(self, fail_first: int = 0):
+        self.received: list[tuple[str, tuple]] = []
+        self.fail_first = fail_first
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_first:
+            self.fail_first -= 1
+            return '451 Временная ошибка, повторите позже'
+        self.received.append((envelope.rcpt_tos[0], session.peer))
+        return '250 OK'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """Запуск aiosmtpd в отдельном потоке; возвращает функцию, создающую очередь писем к этому серверу"""
+    controllers = []
+
+    def start(handler: RecordingHandler, **outbox_options) -> EmailOutbox:
+        controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+        controller.start()
+        controllers.append(controller)
+        session = SMTPSession(controller.hostname, controller.port, None, None, use_ssl=False)
+        options = dict(queue_size=100, batch_size=10, max_retries=3, retry_delay=0.01)
+        return EmailOutbox(session, **{**options, **outbox_options})
+
+    yield start
+
+    for controller in controllers:
+        controller.stop()
+
+
+def message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg['Subject'] = 'Вам пришло оповещение'
+    msg['From'] = 'noreply@test.io'
+    msg['To'] = to
+    msg.set_content('Вы понравились участнику!')
+    return msg
+
+
+async def test_batches_over_one_connection(smtp_server):
+    handler = RecordingHandler()
+    outbox = smtp_server(handler, batch_size=3)
+    batches = []
+    send_batch = outbox._send_batch
+    outbox._send_batch = lambda batch, loop: (batches.append(len(batch)), send_batch(batch, loop))
+
+    recipients = [f'user{i}@test.io' for i in range(7)]
+    for to in recipients:
+        await outbox.enqueue(message(to))
+    outbox.start()
+    await outbox.stop()
+
+    assert [to for to, _ in handler.received] == recipients
+    assert batches == [3, 3, 1]
+    # все письма ушли через одно SMTP-соединение
+    assert len({peer for _, peer in handler.received}) == 1
+    assert outbox.metrics()['sent'] == 7 and outbox.metrics()['failed'] == 0
+
+
+async def test_transient_failure_is_retried(smtp_server):
+    handler = RecordingHandler(fail_first=1)
+    outbox = smtp_server(handler)
+
+    await outbox.enqueue(message('retry@test.io'))
+    await outbox.enqueue(message('ok@test.io'))
+    outbox.start()
+    await outbox.stop()
+
+    # первое письмо отклонено ответом 451 и доставлено повторной попыткой
+    assert sorted(to for to, _ in handler.received) == ['ok@test.io', 'retry@test.io']
+    metrics = outbox.metrics()
+    assert metrics['retries'] == 1 and metrics['sent'] == 2 and metrics['failed'] == 0
+    assert metrics['queue_depth'] == 0
+
+
+async def test_full_queue_drops_without_blocking(smtp_server):
+    handler = RecordingHandler()
+    outbox = smtp_server(handler, queue_size=2)
+
+    # обработчик не запущен, очередь заполняется; enqueue не ждет места
+    await asyncio.wait_for(asyncio.gather(*(outbox.enqueue(message(f'user{i}@test.io')) for i in range(5))), 1)
+    assert outbox.metrics()['dropped'] == 3
+    assert outbox.metrics()['queue_depth'] == 2
+
+    outbox.start()
+    await outbox.stop()
+    assert [to for to, _ in handler.received] == ['user0@test.io', 'user1@test.io']
+    assert outbox.metrics()['sent'] == 2
@@ -0,0 +1,104 @@
+"""
+Сессия запроса (database.get_session): эндпоинты регистрации и симпатии берут из пула одно соединение,
+регистрация записывает пользователя одним INSERT ... RETURNING без повторного чтения.
+Эндпоинты вызываются напрямую с сессией из get_session, фоновые задачи не выполняются.
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import (
+    BackgroundTasks,
+    HTTPException
+)
+from sqlalchemy import event
+
+from database import (
+    Gender,
+    count_checkouts,
+    engine,
+    get_session
+)
+from users.dao import UsersDAO
+from users.router import (
+    create_users,
+    grade_user
+)
+from users.schemas import SUserView
+from utils.geocoding import (
+    OfflineProvider,
+    geocoder
+)
+
+pytestmark = pytest.mark.anyio
+
+ADDRESS = 'Россия, Москва, ул.Тестовая 1'
+
+
+@pytest.fixture
+def offline_geocoder(monkeypatch):
+    monkeypatch.setattr(geocoder, 'provider', OfflineProvider({ADDRESS: [55.7558, 37.6173]}))
+    monkeypatch.setattr(geocoder, 'store', None)
+    geocoder.cache.clear()
+
+
+async def call_in_request(endpoint, **kwargs):
+    """
+    Функция вызывает эндпоинт с сессией запроса и считает выдачи соединений из пулов и SQL-запросы
+    :return: кортеж (результат или HTTPException, количество соединений, количество SQL-запросов)
+    """
+    statements = []
+
+    def on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', on_execute)
+    try:
+        with count_checkouts() as checkouts:
+            try:
+                async with asynccontextmanager(get_session)() as session:
+                    result = await endpoint(session=session, **kwargs)
+            except HTTPException as e:
+                result = e
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', on_execute)
+    return result, checkouts[0], statements
+
+
+async def register(email: str):
+    return await call_in_request(
+        create_users, background_tasks=BackgroundTasks(), address=ADDRESS, email=email, first_name='Тест',
+        last_name='Сессий', gender=Gender.men, password='password', password_confirm='password', avatar=None)
+
+
+async def test_create_users_uses_one_connection_and_no_refetch(clean_db, offline_geocoder):
+    user, checkouts, statements = await register('uow@test.io')
+
+    assert user.email == 'uow@test.io' and user.data_create_user is not None
+    assert checkouts == 1
+    # проверка email и INSERT ... RETURNING, повторного SELECT пользователя нет
+    assert len(statements) == 2
+    assert statements[1].lstrip().upper().startswith('INSERT') and 'RETURNING' in statements[1].upper()
+
+    error, checkouts, _ = await register('uow@test.io')
+    assert isinstance(error, HTTPException) and error.status_code == 409
+    assert checkouts == 1
+
+
+async def test_grade_user_uses_one_connection(clean_db, offline_geocoder):
+    await register('liker@test.io')
+    await register('target@test.io')
+    liker = await UsersDAO.find_one_or_none(email='liker@test.io')
+    target = await UsersDAO.find_one_or_none(email='target@test.io')
+    liker_view = await UsersDAO.find_by_id(liker.id, view=SUserView)
+    target_view = await UsersDAO.find_by_id(target.id, view=SUserView)
+
+    result, checkouts, _ = await call_in_request(grade_user, user_id=target.id, background_tasks=BackgroundTasks(),
+                                                 current_user=liker_view)
+    assert result == {'message': 'Оценка добавлена'}
+    assert checkouts == 1
+
+    # ответная симпатия: проверка лимита, симпатия и взаимная симпатия в той же транзакции
+    result, checkouts, _ = await call_in_request(grade_user, user_id=liker.id, background_tasks=BackgroundTasks(),
+                                                 current_user=target_view)
+    assert result == {'message': 'Взаимная симпатия!'}
+    assert checkouts == 1
@@ -1,6 +1,12 @@
 from users.setting_import.auth_import import *
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# пул для хеширования и проверки паролей вне event loop
+hash_executor = BoundedExecutor(name='password-hash',
+                                kind=settings.HASH_POOL_KIND,
+                                workers=settings.HASH_POOL_WORKERS,
+                                queue_size=settings.HASH_QUEUE_SIZE)
 
 
 def get_password_hash(password: str) -> str:
@@ -13,6 +19,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+@timed('password_hash')
+async def get_password_hash_async(password: str) -> str:
+    """Асинхронная функция хеширования пароля в пуле hash_executor, не блокирует event loop"""
+    return await hash_executor.run(get_password_hash, password)
+
+
+@timed('password_verify')
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Асинхронная функция проверки пароля в пуле hash_executor, не блокирует event loop"""
+    return await hash_executor.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict) -> str:
     """Функция создания токена для пользователя"""
     to_encode = data.copy()
@@ -26,6 +44,6 @@ def create_access_token(data: dict) -> str:
 async def authenticate_user(email: str, password: str):
     """Функция аутефикации пользователя"""
     user = await UsersDAO.find_one_or_none(email=email)
-    if not user or verify_password(plain_password=password, hashed_password=user.password) is False:
+    if not user or await verify_password_async(plain_password=password, hashed_password=user.password) is False:
         return None
-    return user
\ No newline at end of file
+    return user
@@ -3,29 +3,48 @@ from users.setting_import.dao_import import *
 
 class UsersDAO(BaseDAO):
     model = User
+    # координаты нужны для расчета расстояния даже если их нет в представлении
+    projection_extra = ('id', 'data_create_user', 'latitude', 'longitude')
+    upsert_keys = ('email',)
+    # имя ограничения уникальности email в БД (назначено PostgreSQL для unique=True)
+    email_constraint = 'users_email_key'
 
     @classmethod
-    async def find_one_or_none(cls, email: str):
+    async def find_one_or_none(cls, email: str, session: Optional[AsyncSession] = None):
         """
         Функция для получение объектa из таблицы по указанному email либо None
         :param email: email пользователя для поиска
+        :param session: сессия запроса, None - отдельная сессия
         :return: возвращает объект из таблицы
         """
-        async with async_session_maker() as session:
+        async with cls._session(session) as session:
             query = select(cls.model).filter_by(email=email)
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
     @classmethod
-    async def find_all(cls, sort_by_date: bool = True, **filter_by):
+    async def email_exists(cls, email: str, session: Optional[AsyncSession] = None) -> bool:
+        """
+        Функция для быстрой проверки, зарегистрирован ли email (только по индексу, без загрузки пользователя)
+        :param email: email пользователя
+        :param session: сессия запроса, None - отдельная сессия
+        :return: True, если пользователь с таким email уже есть
+        """
+        async with cls._session(session) as session:
+            result = await session.execute(select(exists().where(cls.model.email == email)))
+            return bool(result.scalar())
+
+    @classmethod
+    async def find_all(cls, sort_by_date: bool = True, session: Optional[AsyncSession] = None, **filter_by):
         """
         Переопределение функции, добавлена загрузка list_grade_history
         Функция для получения всех объектов из таблицы с возможностью фильтрации и сортировки.
         :param filter_by: фильтры для поиска
         :param sort_by_date: если True, сортирует по дате создания от новых к старым
+        :param session: сессия запроса, None - отдельная сессия
         :return: возвращает отфильтрованные и отсортированные объекты из таблицы
         """
-        async with async_session_maker() as session:
+        async with cls._session(session) as session:
             query = select(cls.model).options(joinedload(User.list_grade_history)).filter_by(**filter_by)
 
             # Добавляем сортировку по дате создания
@@ -35,3 +54,677 @@ class UsersDAO(BaseDAO):
             result = await session.execute(query)
             return result.unique().scalars().all()
 
+    @classmethod
+    async def find_page(cls, limit: int, cursor: Optional[str] = None, sort_by_date: bool = True,
+                        exclude_id: Optional[int] = None, view=None, session: Optional[AsyncSession] = None,
+                        **filter_by) -> Page:
+        """
+        Переопределение функции, добавлена загрузка list_grade_history (если не используется режим проекции)
+        Функция для постраничного получения объектов из таблицы с keyset-пагинацией.
+        :param limit: размер страницы
+        :param cursor: курсор, полученный с предыдущей страницей, None для первой страницы
+        :param sort_by_date: если True, сортирует по дате создания от новых к старым
+        :param exclude_id: id пользователя, которого нужно исключить из выборки
+        :param view: pydantic-схема; если передана, выбираются только ее колонки без загрузки связей
+        :param session: сессия запроса, None - отдельная сессия
+        :param filter_by: фильтры для поиска
+        :return: страница пользователей и курсор следующей страницы
+        """
+        if view is not None:
+            return await super().find_page(limit=limit, cursor=cursor, sort_by_date=sort_by_date,
+                                           exclude_id=exclude_id, view=view, session=session, **filter_by)
+
+        async with cls._session(session) as session:
+            query = select(cls.model).options(joinedload(User.list_grade_history)).filter_by(**filter_by)
+            if exclude_id is not None:
+                query = query.where(cls.model.id != exclude_id)
+            query = cls._keyset_query(query, sort_by_date, limit, cursor)
+
+            result = await session.execute(query)
+            return cls._make_page(result.unique().scalars().all(), sort_by_date, limit)
+
+    @classmethod
+    async def find_in_radius(cls, latitude: float, longitude: float, distance: float,
+                             sort_by_date: bool = True, exclude_id: Optional[int] = None, view=None,
+                             session: Optional[AsyncSession] = None, **filter_by):
+        """
+        Функция для поиска пользователей в пределах указанного расстояния.
+        Сначала кандидаты отбираются в БД по прямоугольнику координат (индекс ix_users_latitude_longitude)
+        и по ячейкам geohash (индекс ix_users_geohash либо индекс ячеек в памяти процесса),
+        затем точное расстояние по формуле haversine считается только для них.
+        :param latitude: широта точки, от которой считается расстояние
+        :param longitude: долгота точки, от которой считается расстояние
+        :param distance: радиус поиска в метрах
+        :param sort_by_date: если True, сортирует по дате создания от новых к старым
+        :param exclude_id: id пользователя, которого нужно исключить из выборки
+        :param view: pydantic-схема; если передана, выбираются только ее колонки без загрузки связей
+        :param session: сессия запроса, None - отдельная сессия
+        :param filter_by: фильтры для поиска
+        :return: пользователи в пределах расстояния с заполненным атрибутом distance
+        """
+        if latitude is None or longitude is None:
+            return []
+
+        min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, distance)
+        conditions = [
+            cls.model.latitude.between(min_lat, max_lat),
+            or_(*[cls.model.longitude.between(min_lon, max_lon) for min_lon, max_lon in lon_ranges])
+        ]
+
+        # кандидаты из индекса ячеек в памяти процесса, если он включен,
+        # иначе отбор по префиксам geohash ячейки пользователя и ее соседей
+        candidate_ids = spatial_index.candidates(latitude, longitude, distance)
+        if candidate_ids is not None:
+            if not candidate_ids:
+                return []
+            conditions.append(cls.model.id.in_(candidate_ids))
+        else:
+            cells = cells_for_radius(latitude, longitude, distance)
+            if cells:
+                conditions.append(or_(*[cls.model.geohash.startswith(cell) for cell in cells]))
+
+        async with cls._session(session) as session:
+            query = cls._select(view) if view is not None else \
+                select(cls.model).options(joinedload(User.list_grade_history))
+            query = query.filter_by(**filter_by).where(*conditions)
+            if exclude_id is not None:
+                query = query.where(cls.model.id != exclude_id)
+
+            # Добавляем сортировку по дате создания
+            if sort_by_date:
+                query = query.order_by(desc(cls.model.data_create_user))
+
+            result = await session.execute(query)
+            candidates = cls._to_view(result, view) if view is not None else result.unique().scalars().all()
+
+        return cls.within_distance(candidates, latitude, longitude, distance)
+
+    @classmethod
+    def within_distance(cls, candidates: list, latitude: float, longitude: float, distance: float,
+                        exclude_id: Optional[int] = None) -> list:
+        """
+        Функция для точного отбора кандидатов по расстоянию (формула haversine, одним вызовом для всех)
+        :param candidates: пользователи или строки проекции с координатами
+        :param latitude: широта точки, от которой считается расстояние
+        :param longitude: долгота точки, от которой считается расстояние
+        :param distance: радиус в метрах
+        :param exclude_id: id пользователя, которого нужно исключить
+        :return: пользователи в пределах расстояния с заполненным атрибутом distance
+        """
+        if exclude_id is not None:
+            candidates = [user for user in candidates if user.id != exclude_id]
+        distances, mask = great_circle_distance_batch(
+            [latitude, longitude],
+            [(user.latitude, user.longitude) for user in candidates],
+            radius=distance
+        )
+        users_within_distance = []
+        for user, user_distance, within in zip(candidates, distances, mask):
+            if within:
+                user.distance = float(user_distance)
+                users_within_distance.append(user)
+        return users_within_distance
+
+    @classmethod
+    async def find_page_in_radius(cls, latitude: float, longitude: float, distance: float, limit: int,
+                                  cursor: Optional[str] = None, exclude_id: Optional[int] = None,
+                                  view=None, session: Optional[AsyncSession] = None, **filter_by) -> Page:
+        """
+        Функция для постраничного поиска пользователей в пределах расстояния,
+        страницы упорядочены по возрастанию расстояния (keyset-пагинация по (distance, id)).
+        Отбор по прямоугольнику координат (индекс ix_users_latitude_longitude), точное расстояние,
+        сортировка и ограничение страницы выполняются в одном запросе, в процесс попадает только страница.
+        :param latitude: широта точки, от которой считается расстояние
+        :param longitude: долгота точки, от которой считается расстояние
+        :param distance: радиус поиска в метрах
+        :param limit: размер страницы
+        :param cursor: курсор, полученный с предыдущей страницей, None для первой страницы
+        :param exclude_id: id пользователя, которого нужно исключить из выборки
+        :param view: pydantic-схема, колонки которой нужно выбрать
+        :param session: сессия запроса, None - отдельная сессия
+        :param filter_by: фильтры для поиска
+        :return: страница пользователей с заполненным distance и курсор следующей страницы
+        """
+        last_key = decode_cursor(cursor, 'distance') if cursor is not None else None
+        if latitude is None or longitude is None:
+            return Page(items=[])
+
+        columns, row_class = cls._projection(view)
+        user_distance = cls._distance_expression(latitude, longitude)
+        conditions = cls._radius_conditions(latitude, longitude, distance)
+        if exclude_id is not None:
+            conditions.append(cls.model.id != exclude_id)
+        if last_key is not None:
+            # то же выражение с теми же параметрами дает то же значение, поэтому равенство по расстоянию точное
+            last_distance, last_id = last_key
+            conditions.append(or_(user_distance > last_distance,
+                                  and_(user_distance == last_distance, cls.model.id > last_id)))
+
+        query = (
+            select(*columns, user_distance.label('distance'))
+            .filter_by(**filter_by)
+            .where(*conditions)
+            .order_by('distance', cls.model.id)
+            .limit(limit + 1)
+        )
+        async with cls._session(session) as session:
+            result = await session.execute(query)
+            users = [row_class(**row) for row in result.mappings()]
+
+        if len(users) <= limit:
+            return Page(items=users)
+        users = users[:limit]
+        return Page(items=users, next_cursor=encode_cursor('distance', [users[-1].distance, users[-1].id]))
+
+    @classmethod
+    def _name_expression(cls, column):
+        """Функция возвращает выражение, по которому построены триграммные индексы имени и фамилии"""
+        return func.replace(func.lower(column), 'ё', 'е')
+
+    @classmethod
+    def _distance_expression(cls, latitude: float, longitude: float):
+        """
+        Функция возвращает SQL-выражение расстояния в метрах от точки до пользователя (формула haversine,
+        та же, что в utils.geo.great_circle_distance_batch)
+        :param latitude: широта точки
+        :param longitude: долгота точки
+        :return: выражение sqlalchemy
+        """
+        lat1, lon1 = math.radians(latitude), math.radians(longitude)
+        lat2, lon2 = func.radians(cls.model.latitude), func.radians(cls.model.longitude)
+        a = (func.power(func.sin((lat2 - lat1) / 2), 2) +
+             math.cos(lat1) * func.cos(lat2) * func.power(func.sin((lon2 - lon1) / 2), 2))
+        return EARTH_CIRCUMFERENCE * 2 * func.atan2(func.sqrt(a), func.sqrt(1 - a))
+
+    @classmethod
+    def _radius_conditions(cls, latitude: float, longitude: float, distance: float) -> list:
+        """
+        Функция возвращает условия отбора пользователей в пределах расстояния: прямоугольник координат
+        (индекс ix_users_latitude_longitude) и точное расстояние
+        """
+        min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, distance)
+        return [
+            cls.model.latitude.between(min_lat, max_lat),
+            or_(*[cls.model.longitude.between(min_lon, max_lon) for min_lon, max_lon in lon_ranges]),
+            cls._distance_expression(latitude, longitude) < distance,
+        ]
+
+    @classmethod
+    async def find_page_by_name(cls, words: list[str], limit: int, cursor: Optional[str] = None,
+                                exclude_id: Optional[int] = None, origin: Optional[tuple[float, float]] = None,
+                                distance: Optional[float] = None, view=None, session: Optional[AsyncSession] = None,
+                                **filter_by) -> Page:
+        """
+        Функция для постраничного поиска пользователей по имени и фамилии: каждому слову должно соответствовать имя
+        или фамилия, которые начинаются с него или похожи на него (сходство по триграммам не меньше
+        settings.NAME_SEARCH_THRESHOLD). Страницы упорядочены по убыванию оценки и возрастанию id
+        (keyset-пагинация по (оценка, id)), фильтры, исключение пользователя и расстояние применяются в том же запросе.
+        Кандидаты отбираются по GIN-индексам pg_trgm (ix_users_first_name_trgm, ix_users_last_name_trgm)
+        либо по индексу имен в памяти процесса, если он включен (PostgreSQL без расширения pg_trgm).
+        :param words: нормализованные слова поиска (utils.name_search.query_words)
+        :param limit: размер страницы
+        :param cursor: курсор, полученный с предыдущей страницей, None для первой страницы
+        :param exclude_id: id пользователя, которого нужно исключить из выборки
+        :param origin: широта и долгота точки, от которой считается расстояние
+        :param distance: радиус поиска в метрах (вместе с origin), None - без ограничения
+        :param view: pydantic-схема, колонки которой нужно выбрать
+        :param session: сессия запроса, None - отдельная сессия
+        :param filter_by: фильтры для поиска
+        :return: страница пользователей (с заполненным distance при поиске рядом) и курсор следующей страницы
+        """
+        if not words:
+            return Page(items=[])
+        last_key = decode_cursor(cursor, 'name') if cursor is not None else None
+        conditions = []
+        if exclude_id is not None:
+            conditions.append(cls.model.id != exclude_id)
+        columns, row_class = cls._projection(view)
+        if origin is not None:
+            columns = [*columns, cls._distance_expression(*origin).label('distance')]
+            if distance is not None:
+                conditions.extend(cls._radius_conditions(*origin, distance))
+
+        ranked = name_index.search(words, settings.NAME_SEARCH_THRESHOLD)
+        async with cls._session(session) as session:
+            if ranked is not None:
+                found = await cls._rows_by_rank(session, ranked, last_key, limit + 1, columns, row_class,
+                                                conditions, filter_by)
+            else:
+                found = await cls._search_by_trigrams(session, words, last_key, limit + 1, columns, row_class,
+                                                      conditions, filter_by)
+
+        if len(found) <= limit:
+            return Page(items=[row for _, row in found])
+        found = found[:limit]
+        score, last = found[-1]
+        return Page(items=[row for _, row in found], next_cursor=encode_cursor('name', [score, last.id]))
+
+    @classmethod
+    async def _search_by_trigrams(cls, session: AsyncSession, words: list[str], last_key: Optional[list],
+                                  limit: int, columns: list, row_class, conditions: list,
+                                  filter_by: dict) -> list[tuple[float, object]]:
+        """Функция выбирает страницу поиска по имени в БД по триграммным индексам, см. find_page_by_name"""
+        first_name = cls._name_expression(cls.model.first_name)
+        last_name = cls._name_expression(cls.model.last_name)
+        conditions = list(conditions)
+        for word in words:
+            # LIKE 'слово%' и оператор % (сходство не меньше pg_trgm.similarity_threshold) используют GIN-индекс
+            conditions.append(or_(first_name.startswith(word, autoescape=True), first_name.op('%')(word),
+                                  last_name.startswith(word, autoescape=True), last_name.op('%')(word)))
+        word_scores = [func.greatest(func.similarity(first_name, word), func.similarity(last_name, word))
+                       for word in words]
+        score = sum(word_scores[1:], word_scores[0]) / literal(float(len(words)), Float)
+        if last_key is not None:
+            last_score, last_id = last_key
+            conditions.append(or_(score < last_score, and_(score == last_score, cls.model.id > last_id)))
+
+        # порог оператора % действует до конца транзакции сессии
+        await session.execute(select(func.set_config('pg_trgm.similarity_threshold',
+                                                     str(settings.NAME_SEARCH_THRESHOLD), True)))
+        query = select(*columns, score.label('name_score')).filter_by(**filter_by).where(*conditions)
+        query = query.order_by(desc('name_score'), cls.model.id).limit(limit)
+        result = await session.execute(query)
+        return [(row['name_score'], row_class(**row)) for row in result.mappings()]
+
+    @classmethod
+    async def _rows_by_rank(cls, session: AsyncSession, ranked: list[tuple[float, int]], last_key: Optional[list],
+                            limit: int, columns: list, row_class, conditions: list,
+                            filter_by: dict) -> list[tuple[float, object]]:
+        """
+        Функция выбирает страницу поиска по имени по оценкам из индекса имен в памяти процесса:
+        строки читаются из БД по id пачками в порядке оценки, пока не наберется limit строк, прошедших условия
+        """
+        if last_key is not None:
+            last_score, last_id = last_key
+            ranked = [(score, user_id) for score, user_id in ranked if (-score, user_id) > (-last_score, last_id)]
+        found = []
+        for start in range(0, len(ranked), limit):
+            chunk = ranked[start:start + limit]
+            query = select(*columns).filter_by(**filter_by).where(
+                cls.model.id.in_([user_id for _, user_id in chunk]), *conditions)
+            rows = {row.id: row for row in (row_class(**row) for row in (await session.execute(query)).mappings())}
+            found.extend((score, rows[user_id]) for score, user_id in chunk if user_id in rows)
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    @classmethod
+    async def find_names(cls, session: Optional[AsyncSession] = None) -> list[tuple[int, str, str]]:
+        """
+        Функция для получения имен и фамилий всех пользователей, используется для построения индекса имен
+        :param session: сессия запроса, None - отдельная сессия
+        :return: список троек (id пользователя, имя, фамилия)
+        """
+        async with cls._session(session) as session:
+            result = await session.execute(select(cls.model.id, cls.model.first_name, cls.model.last_name))
+            return [tuple(row) for row in result.all()]
+
+    @classmethod
+    async def find_geohashes(cls, session: Optional[AsyncSession] = None) -> list[tuple[int, str]]:
+        """
+        Функция для получения geohash всех пользователей, используется для построения индекса ячеек
+        :param session: сессия запроса, None - отдельная сессия
+        :return: список пар (id пользователя, geohash)
+        """
+        async with cls._session(session) as session:
+            query = select(cls.model.id, cls.model.geohash).where(cls.model.geohash.is_not(None))
+            result = await session.execute(query)
+            return [tuple(row) for row in result.all()]
+
+    @classmethod
+    async def find_ids(cls, after_id: int, limit: int, session: Optional[AsyncSession] = None) -> list[int]:
+        """
+        Функция для постраничного перебора id пользователей (пакетные задачи)
+        :param after_id: id, после которого начинается страница
+        :param limit: размер страницы
+        :param session: сессия запроса, None - отдельная сессия
+        :return: id пользователей по возрастанию
+        """
+        async with cls._session(session) as session:
+            query = select(cls.model.id).where(cls.model.id > after_id).order_by(cls.model.id).limit(limit)
+            result = await session.execute(query)
+            return list(result.scalars().all())
+
+
+class LikesDAO(BaseDAO):
+    model = Like
+
+    @classmethod
+    async def add_like(cls, liker_id: int, target_id: int, daily_limit: Optional[int] = None,
+                       window: timedelta = timedelta(days=1),
+                       session: Optional[AsyncSession] = None) -> tuple[bool, bool]:
+        """
+        Функция для записи симпатии и проверки взаимной симпатии одним запросом.
+        Пара пользователей блокируется advisory-блокировкой до конца транзакции, поэтому
+        одновременные встречные симпатии не могут обе пропустить взаимность.
+        Если передан daily_limit, в той же транзакции под блокировкой пользователя проверяется
+        количество его симпатий за window (индекс ix_likes_liker_id_date), поэтому лимит соблюдается
+        при одновременных запросах из разных процессов.
+        Возникшая взаимная симпатия записывается в matches (MatchesDAO.add_pair) в той же транзакции.
+        :param liker_id: id пользователя, который ставит симпатию
+        :param target_id: id пользователя, которому ставится симпатия
+        :param daily_limit: максимальное количество симпатий за window, None - без ограничения
+        :param window: период, за который считается лимит
+        :param session: сессия запроса (блокировки держатся до ее фиксации), None - отдельная транзакция
+        :return: кортеж (симпатия добавлена впервые, симпатия взаимная)
+        """
+        now = datetime.utcnow()
+        inserted = (
+            pg_insert(cls.model)
+            .values(liker_id=liker_id, target_id=target_id, date=now)
+            .on_conflict_do_nothing(constraint='uq_likes_liker_id_target_id')
+            .returning(cls.model.id)
+            .cte('inserted')
+        )
+        reciprocal = select(cls.model.id).where(cls.model.liker_id == target_id, cls.model.target_id == liker_id)
+        query = select(exists(select(inserted.c.id)), exists(reciprocal))
+
+        async with cls._transaction(session) as session:
+            if daily_limit is not None:
+                await session.execute(select(func.pg_advisory_xact_lock(QUOTA_LOCK_NAMESPACE, liker_id)))
+                count = (await session.execute(
+                    select(func.count()).select_from(cls.model)
+                    .where(cls.model.liker_id == liker_id, cls.model.date >= now - window)
+                )).scalar_one()
+                if count >= daily_limit:
+                    raise QuotaExceeded('Лимит оценок в день исчерпан')
+
+            await session.execute(select(func.pg_advisory_xact_lock(pair_lock_key(liker_id, target_id))))
+            created, mutual = (await session.execute(query)).one()
+            # новая взаимная симпатия сохраняется в той же транзакции под блокировкой пары
+            if created and mutual:
+                await MatchesDAO.add_pair(liker_id, target_id, now, session=session)
+        if created:
+            mark_write()
+        return created, mutual
+
+
+# пространство ключей advisory-блокировок (двухключевая форма) для лимита симпатий пользователя
+QUOTA_LOCK_NAMESPACE = 1
+
+
+def pair_lock_key(user_a: int, user_b: int) -> int:
+    """
+    Функция для получения ключа advisory-блокировки пары пользователей (не зависит от порядка id)
+    :return: 64-битный ключ блокировки
+    """
+    low, high = sorted((user_a, user_b))
+    return low << 32 | high
+
+
+class RecommendationsDAO(BaseDAO):
+    model = Recommendation
+    upsert_keys = ('user_id', 'candidate_id')
+
+    @classmethod
+    async def like_counts(cls, user_ids: list[int], session: Optional[AsyncSession] = None) -> dict[int, dict[str, int]]:
+        """
+        Функция для подсчета симпатий пользователей по полу получателя (для оценки предпочтений)
+        :param user_ids: id пользователей
+        :param session: сессия запроса, None - отдельная сессия
+        :return: словарь {id пользователя: {пол: количество симпатий}}
+        """
+        if not user_ids:
+            return {}
+        async with cls._session(session) as session:
+            query = (
+                select(Like.liker_id, User.gender, func.count())
+                .join(User, User.id == Like.target_id)
+                .where(Like.liker_id.in_(user_ids))
+                .group_by(Like.liker_id, User.gender)
+            )
+            counts: dict[int, dict[str, int]] = {}
+            for liker_id, gender, count in (await session.execute(query)).all():
+                counts.setdefault(liker_id, {})[Gender(gender).value] = count
+            return counts
+
+    @classmethod
+    async def like_neighbours(cls, user_id: int, session: Optional[AsyncSession] = None) -> tuple[set[int], set[int]]:
+        """
+        Функция для получения симпатий пользователя в обе стороны
+        :param user_id: id пользователя
+        :param session: сессия запроса, None - отдельная сессия
+        :return: кортеж (id тех, кому пользователь поставил симпатию, id тех, кто поставил симпатию ему)
+        """
+        async with cls._session(session) as session:
+            liked = await session.execute(select(Like.target_id).where(Like.liker_id == user_id))
+            likers = await session.execute(select(Like.liker_id).where(Like.target_id == user_id))
+            return set(liked.scalars().all()), set(likers.scalars().all())
+
+    @classmethod
+    async def replace_feed(cls, user_id: int, rows: list[dict], session: Optional[AsyncSession] = None) -> None:
+        """
+        Функция для замены ленты пользователя, лента отмечается построенной (даже пустая)
+        :param user_id: id пользователя
+        :param rows: строки ленты (user_id, candidate_id и составляющие оценки)
+        :param session: сессия запроса, None - отдельная транзакция
+        """
+        mark = pg_insert(RecommendationFeed).values(user_id=user_id, built_at=datetime.utcnow())
+        mark = mark.on_conflict_do_update(index_elements=['user_id'], set_={'built_at': mark.excluded.built_at})
+        async with cls._transaction(session) as session:
+            await session.execute(delete(cls.model).where(cls.model.user_id == user_id))
+            if rows:
+                await session.execute(pg_insert(cls.model), rows)
+            await session.execute(mark)
+        mark_write()
+
+    @classmethod
+    async def feed_built(cls, user_id: int, session: Optional[AsyncSession] = None) -> bool:
+        """
+        Функция для проверки, построена ли лента пользователя (поиск по первичному ключу recommendation_feeds)
+        :param user_id: id пользователя
+        :param session: сессия запроса, None - отдельная сессия
+        :return: True, если лента построена
+        """
+        async with cls._session(session) as session:
+            result = await session.execute(select(exists().where(RecommendationFeed.user_id == user_id)))
+            return bool(result.scalar())
+
+    @classmethod
+    async def push(cls, rows: list[dict], feed_size: int, session: Optional[AsyncSession] = None) -> None:
+        """
+        Функция для добавления кандидатов в ленты разных пользователей с обрезкой лент до feed_size
+        (кандидат с оценкой ниже последнего в полной ленте сразу удаляется).
+        Строки для лент, которые еще не построены, пропускаются: такая лента строится целиком при первом запросе
+        :param rows: строки ленты (user_id, candidate_id и составляющие оценки)
+        :param feed_size: максимальный размер ленты
+        :param session: сессия запроса, None - отдельная транзакция
+        """
+        if not rows:
+            return
+        statement = pg_insert(cls.model)
+        statement = statement.on_conflict_do_update(
+            index_elements=cls.upsert_keys,
+            set_={name: statement.excluded[name] for name in rows[0] if name not in cls.upsert_keys}
+        )
+        async with cls._transaction(session) as session:
+            built = await session.execute(select(RecommendationFeed.user_id).where(
+                RecommendationFeed.user_id.in_({row['user_id'] for row in rows})))
+            built = set(built.scalars().all())
+            rows = [row for row in rows if row['user_id'] in built]
+            if not rows:
+                return
+            ranked = (
+                select(cls.model.user_id, cls.model.candidate_id,
+                       func.row_number().over(partition_by=cls.model.user_id,
+                                              order_by=(desc(cls.model.score), desc(cls.model.candidate_id)))
+                       .label('position'))
+                .where(cls.model.user_id.in_(built))
+                .subquery()
+            )
+            await session.execute(statement, rows)
+            await session.execute(
+                delete(cls.model).where(tuple_(cls.model.user_id, cls.model.candidate_id).in_(
+                    select(ranked.c.user_id, ranked.c.candidate_id).where(ranked.c.position > feed_size)
+                ))
+            )
+        mark_write()
+
+    @classmethod
+    async def apply_like(cls, liker_id: int, target_id: int, preferences: dict[str, float],
+                         session: Optional[AsyncSession] = None) -> None:
+        """
+        Функция для обновления лент после симпатии liker_id -> target_id:
+        получатель удаляется из ленты поставившего, оценки его ленты пересчитываются по новым предпочтениям,
+        в лентах других пользователей обновляется вероятность ответной симпатии поставившего,
+        в ленте получателя поставивший получает максимальную вероятность ответной симпатии
+        :param liker_id: id пользователя, который поставил симпатию
+        :param target_id: id пользователя, которому поставлена симпатия
+        :param preferences: новые предпочтения поставившего по полу (users.scoring.gender_preferences)
+        :param session: сессия запроса, None - отдельная транзакция
+        """
+        model = cls.model
+        preference = case(*[(User.gender == gender, value) for gender, value in preferences.items()])
+        async with cls._transaction(session) as session:
+            await session.execute(delete(model).where(model.user_id == liker_id, model.candidate_id == target_id))
+            # пол кандидата берется из users
+            await session.execute(
+                update(model)
+                .where(model.user_id == liker_id, model.candidate_id == User.id)
+                .values(gender_score=preference,
+                        score=recommendation_score(model.distance_score, preference,
+                                                   model.recency_score, model.reciprocal_score))
+                .execution_options(synchronize_session=False)
+            )
+            # пол владельца ленты берется из users; кандидаты, уже поставившие симпатию, не меняются
+            await session.execute(
+                update(model)
+                .where(model.candidate_id == liker_id, model.user_id == User.id, model.reciprocal_score < 1)
+                .values(reciprocal_score=preference,
+                        score=recommendation_score(model.distance_score, model.gender_score,
+                                                   model.recency_score, preference))
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(
+                update(model)
+                .where(model.user_id == target_id, model.candidate_id == liker_id)
+                .values(reciprocal_score=1.0,
+                        score=recommendation_score(model.distance_score, model.gender_score,
+                                                   model.recency_score, 1.0))
+                .execution_options(synchronize_session=False)
+            )
+        mark_write()
+
+    @classmethod
+    async def find_feed_page(cls, user_id: int, limit: int, cursor: Optional[str] = None, view=None,
+                             session: Optional[AsyncSession] = None) -> Page:
+        """
+        Функция для получения страницы ленты по убыванию оценки (keyset-пагинация по (score, candidate_id)
+        по индексу ix_recommendations_user_id_score, стоимость зависит только от размера страницы)
+        :param user_id: id владельца ленты
+        :param limit: размер страницы
+        :param cursor: курсор, полученный с предыдущей страницей, None для первой страницы
+        :param view: pydantic-схема, колонки которой выбираются из users
+        :param session: сессия запроса, None - отдельная сессия
+        :return: страница строк проекции кандидатов и курсор следующей страницы
+        """
+        columns, row_class = UsersDAO._projection(view)
+        key = tuple_(cls.model.score, cls.model.candidate_id)
+        query = (
+            select(cls.model.score, *columns)
+            .join(User, User.id == cls.model.candidate_id)
+            .where(cls.model.user_id == user_id)
+            .order_by(desc(cls.model.score), desc(cls.model.candidate_id))
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            query = query.where(key < tuple_(*decode_cursor(cursor, 'score')))
+
+        async with cls._session(session) as session:
+            result = await session.execute(query)
+            rows = [(row.pop('score'), row_class(**row)) for row in map(dict, result.mappings())]
+
+        if len(rows) <= limit:
+            return Page(items=[item for _, item in rows])
+        rows = rows[:limit]
+        score, last = rows[-1]
+        return Page(items=[item for _, item in rows], next_cursor=encode_cursor('score', [score, last.id]))
+
+
+class MatchesDAO(BaseDAO):
+    model = Match
+
+    @classmethod
+    async def add_pair(cls, user_a: int, user_b: int, date: datetime,
+                       session: Optional[AsyncSession] = None) -> None:
+        """
+        Функция для записи взаимной симпатии двумя симметричными строками
+        :param user_a: id первого пользователя
+        :param user_b: id второго пользователя
+        :param date: момент возникновения взаимной симпатии
+        :param session: сессия запроса, None - отдельная транзакция
+        """
+        statement = pg_insert(cls.model).values([
+            {'user_id': user_a, 'match_id': user_b, 'date': date},
+            {'user_id': user_b, 'match_id': user_a, 'date': date},
+        ]).on_conflict_do_nothing()
+        async with cls._transaction(session) as session:
+            await session.execute(statement)
+        mark_write()
+
+    @classmethod
+    async def find_matches_page(cls, user_id: int, limit: int, cursor: Optional[str] = None, view=None,
+                                session: Optional[AsyncSession] = None) -> Page:
+        """
+        Функция для получения страницы взаимных симпатий пользователя от новых к старым
+        (keyset-пагинация по (date, match_id) по индексу ix_matches_user_id_date)
+        :param user_id: id пользователя
+        :param limit: размер страницы
+        :param cursor: курсор, полученный с предыдущей страницей, None для первой страницы
+        :param view: pydantic-схема, колонки которой выбираются из users
+        :param session: сессия запроса, None - отдельная сессия
+        :return: страница строк проекции пользователей и курсор следующей страницы
+        """
+        columns, row_class = UsersDAO._projection(view)
+        query = (
+            select(cls.model.date.label('match_date'), *columns)
+            .join(User, User.id == cls.model.match_id)
+            .where(cls.model.user_id == user_id)
+            .order_by(desc(cls.model.date), desc(cls.model.match_id))
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            query = query.where(tuple_(cls.model.date, cls.model.match_id) < tuple_(*decode_cursor(cursor, 'match')))
+
+        async with cls._session(session) as session:
+            result = await session.execute(query)
+            rows = [(row.pop('match_date'), row_class(**row)) for row in map(dict, result.mappings())]
+
+        if len(rows) <= limit:
+            return Page(items=[item for _, item in rows])
+        rows = rows[:limit]
+        date, last = rows[-1]
+        return Page(items=[item for _, item in rows], next_cursor=encode_cursor('match', [date, last.id]))
+
+    @classmethod
+    async def max_like_id(cls, session: Optional[AsyncSession] = None) -> int:
+        """Функция возвращает наибольший id симпатии (граница пакетного переноса)"""
+        async with cls._session(session) as session:
+            return (await session.execute(select(func.max(Like.id)))).scalar() or 0
+
+    @classmethod
+    async def backfill_range(cls, first_id: int, last_id: int, session: Optional[AsyncSession] = None) -> int:
+        """
+        Функция для переноса взаимных симпатий в matches для симпатий с id из диапазона [first_id, last_id].
+        Каждая симпатия пары дает свою строку, поэтому обе симметричные строки появляются, даже если
+        симпатии пары попали в разные пачки; повторный запуск ничего не дублирует.
+        :param first_id: первый id симпатии
+        :param last_id: последний id симпатии
+        :param session: сессия запроса, None - отдельная транзакция
+        :return: количество добавленных строк
+        """
+        reciprocal = Like.__table__.alias('reciprocal')
+        source = (
+            select(Like.liker_id, Like.target_id, func.greatest(Like.date, reciprocal.c.date))
+            .join(reciprocal, (reciprocal.c.liker_id == Like.target_id) & (reciprocal.c.target_id == Like.liker_id))
+            .where(Like.id.between(first_id, last_id))
+        )
+        statement = (
+            pg_insert(cls.model)
+            .from_select(['user_id', 'match_id', 'date'], source)
+            .on_conflict_do_nothing()
+        )
+        async with cls._transaction(session) as session:
+            result = await session.execute(statement)
+        mark_write()
+        return result.rowcount
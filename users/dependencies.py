@@ -1,5 +1,19 @@
 from users.setting_import.dep_import import *
 
+# кэши расшифрованных токенов и данных пользователей
+token_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+user_view_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    """
+    Возвращает счетчики попаданий и промахов кэшей авторизации
+    """
+    return {
+        'token': token_cache.stats(),
+        'user_view': user_view_cache.stats(),
+    }
+
 
 def get_token(request: Request):
     """
@@ -11,13 +25,21 @@ def get_token(request: Request):
     return token
 
 
-async def get_current_user(token: str = Depends(get_token)):
+async def get_current_user_id(token: str = Depends(get_token)) -> int:
     """
     Декодирует токен с использованием секретного ключа и алгоритма из конфигурации.
+    Зависимость асинхронная: проверка подписи занимает микросекунды, переход в пул потоков дороже.
     Проверяет срок действия токена. Если токен истек, выбрасывается исключение .
     Извлекает ID пользователя из токена. Если ID отсутствует, выбрасывается исключение .
-    Ищет пользователя в базе данных по ID. Если пользователь не найден, выбрасывается исключение .
+    Результат расшифровки кэшируется до истечения срока действия токена.
     """
+    cached = token_cache.get(token)
+    if cached is not None:
+        user_id, expire_time = cached
+        if expire_time >= datetime.now(timezone.utc):
+            return user_id
+        token_cache.delete(token)
+
     try:
         auth_data = settings.get_auth_data()
         payload = jwt.decode(token, auth_data['secret_key'], algorithms=[auth_data['algorithm']])
@@ -33,8 +55,22 @@ async def get_current_user(token: str = Depends(get_token)):
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Не найден ID пользователя')
 
-    user = await UsersDAO.find_by_id(int(user_id))
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f'Не найден пользователь с ID {user_id}')
+    ttl = min(settings.AUTH_CACHE_TTL, (expire_time - datetime.now(timezone.utc)).total_seconds())
+    token_cache.set(token, (int(user_id), expire_time), ttl=ttl)
+    return int(user_id)
+
+
+async def get_current_user_view(user_id: int = Depends(get_current_user_id)):
+    """
+    Ищет пользователя в базе данных по ID из токена, выбирая только колонки SUserView
+    (и координаты) без загрузки истории оценок. Если пользователь не найден, выбрасывается исключение .
+    """
+    user = user_view_cache.get(user_id)
+    if user is None:
+        user = await UsersDAO.find_by_id(user_id, view=SUserView)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail=f'Не найден пользователь с ID {user_id}')
+        user_view_cache.set(user_id, user)
 
     return user
@@ -0,0 +1,295 @@
+"""
+Импорт пользователей из CSV или JSONL (по одной записи JSON в строке).
+Поля записи: email, first_name, last_name, gender, password или password_hash (готовый bcrypt-хеш),
+address или latitude/longitude, avatar (путь к изображению относительно файла импорта, необязательно).
+
+Записи читаются потоком и проходят этапы с ограниченными очередями: координаты (get_geo),
+хеширование пароля (hash_executor), обработка аватара (image_executor), затем пачками
+записываются через UsersDAO.upsert_many (существующие email пропускаются).
+После каждой пачки сохраняется контрольная точка <файл>.checkpoint: при повторном запуске
+уже обработанные записи пропускаются.
+
+Для больших объемов координаты лучше передавать в файле или использовать GEOCODER_PROVIDER=offline
+(Nominatim ограничен одним запросом в секунду), а пароли - готовыми хешами (bcrypt намеренно медленный).
+Индексы ячеек и имен в памяти работающего сервера (SPATIAL_INDEX_ENABLED, NAME_INDEX_ENABLED) увидят
+новых пользователей после перезапуска.
+
+Запуск из корня проекта: python -m users.importer users.csv [--batch-size 5000 --geo-workers 32]
+"""
+from users.setting_import.importer_import import *
+
+
+class ImportRecord:
+    """Запись импорта, проходящая через этапы конвейера"""
+    __slots__ = ('index', 'data', 'values', 'error')
+
+    def __init__(self, index: int, data: dict):
+        self.index = index
+        self.data = data
+        self.values = {}
+        self.error: Optional[str] = None
+
+
+class ImportStats:
+    """Счетчики импорта и время работы этапов для отчета о пропускной способности"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.read = 0
+        self.written = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.stage_time = {'geo': 0.0, 'hash': 0.0, 'avatar': 0.0, 'write': 0.0}
+
+    def report(self, final: bool = False) -> str:
+        """Функция формирует строку отчета"""
+        elapsed = time.perf_counter() - self.started
+        rate = self.read / elapsed if elapsed else 0.0
+        line = (f'прочитано {self.read}, записано {self.written}, уже были {self.duplicates}, '
+                f'ошибок {self.errors}, {elapsed:.1f} с, {rate:.0f} записей/с')
+        if final:
+            stages = ', '.join(f'{name} {seconds:.1f} с' for name, seconds in self.stage_time.items())
+            line += f'\nсуммарное время этапов: {stages}'
+        return line
+
+
+class Checkpoint:
+    """
+    Контрольная точка импорта: количество записей с начала файла, которые полностью обработаны.
+    Этапы выполняются параллельно и могут менять порядок записей, поэтому сохраняется
+    только непрерывный префикс завершенных записей.
+    """
+
+    def __init__(self, path: Path, offset: int = 0):
+        self.path = path
+        self.offset = offset
+        self._done: set[int] = set()
+
+    @classmethod
+    def load(cls, source: Path) -> 'Checkpoint':
+        path = source.with_name(source.name + '.checkpoint')
+        offset = json.loads(path.read_text())['offset'] if path.exists() else 0
+        return cls(path, offset)
+
+    def complete(self, indexes) -> None:
+        """Функция отмечает записи обработанными и сдвигает контрольную точку"""
+        self._done.update(indexes)
+        while self.offset in self._done:
+            self._done.remove(self.offset)
+            self.offset += 1
+
+    def save(self) -> None:
+        """Функция атомарно записывает контрольную точку на диск"""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_text(json.dumps({'offset': self.offset}))
+        os.replace(tmp_path, self.path)
+
+
+def read_records(source: Path, offset: int) -> Iterator[dict]:
+    """
+    Функция потокового чтения записей из CSV или JSONL
+    :param source: путь к файлу, формат определяется по расширению (.jsonl/.ndjson или .csv)
+    :param offset: количество записей с начала файла, которые нужно пропустить
+    :return: итератор записей в виде словарей
+    """
+    with open(source, newline='', encoding='utf-8') as file:
+        if source.suffix.lower() in ('.jsonl', '.ndjson'):
+            records = (json.loads(line) for line in file if line.strip())
+        else:
+            records = csv.DictReader(file)
+        for index, record in enumerate(records):
+            if index >= offset:
+                yield record
+
+
+async def geocode_stage(record: ImportRecord) -> None:
+    """Этап координат: координаты из записи или get_geo по адресу"""
+    data = record.data
+    missing = [field for field in REQUIRED_FIELDS if not data.get(field)]
+    if missing:
+        record.error = f'нет полей {", ".join(missing)}'
+        return
+    if data['gender'] not in Gender.__members__:
+        record.error = f'неизвестный пол {data["gender"]}'
+        return
+
+    if data.get('latitude') not in (None, '') and data.get('longitude') not in (None, ''):
+        latitude, longitude = float(data['latitude']), float(data['longitude'])
+    else:
+        geo = await get_geo(data.get('address') or '')
+        latitude, longitude = geo.get('latitude'), geo.get('longitude')
+    if latitude is None or longitude is None:
+        record.error = f'координаты не найдены для адреса {data.get("address")!r}'
+        return
+
+    record.values.update(
+        email=data['email'].strip(),
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        gender=data['gender'],
+        latitude=latitude,
+        longitude=longitude,
+        geohash=geohash_encode(latitude, longitude)
+    )
+
+
+async def hash_stage(record: ImportRecord) -> None:
+    """Этап пароля: готовый bcrypt-хеш из записи или хеширование в пуле hash_executor"""
+    password_hash = record.data.get('password_hash')
+    if password_hash:
+        if pwd_context.identify(password_hash) is None:
+            record.error = 'password_hash не является bcrypt-хешем'
+            return
+        record.values['password'] = password_hash
+    elif record.data.get('password'):
+        record.values['password'] = await get_password_hash_async(record.data['password'])
+    else:
+        record.error = 'нет пароля'
+
+
+def avatar_stage(base_dir: Path):
+    """Этап аватара: чтение файла и создание вариантов в пуле image_executor"""
+
+    async def process(record: ImportRecord) -> None:
+        avatar_path = record.data.get('avatar')
+        if not avatar_path:
+            record.values['avatar'] = DEFAULT_AVATAR
+            return
+        try:
+            data = await asyncio.to_thread((base_dir / avatar_path).read_bytes)
+            record.values['avatar'] = await ingest_avatar_bytes(data)
+        except (OSError, AvatarRejected) as e:
+            record.error = f'аватар {avatar_path}: {e}'
+
+    return process
+
+
+async def run_stage(name: str, handler, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                    workers: int, next_workers: int, stats: ImportStats) -> None:
+    """
+    Функция запускает workers обработчиков этапа: записи берутся из inbox, обрабатываются и передаются в outbox.
+    Записи с ошибкой проходят этап без обработки, чтобы контрольная точка учитывала их.
+    :param name: название этапа для отчета
+    :param handler: асинхронная функция обработки записи
+    :param next_workers: количество обработчиков следующего этапа (столько маркеров DONE будет передано)
+    """
+    async def worker():
+        while (record := await inbox.get()) is not DONE:
+            if record.error is None:
+                start = time.perf_counter()
+                try:
+                    await handler(record)
+                except Exception as e:
+                    logger.exception('Ошибка этапа %s для записи %s', name, record.index)
+                    record.error = f'{name}: {e}'
+                stats.stage_time[name] += time.perf_counter() - start
+            await outbox.put(record)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    for _ in range(next_workers):
+        await outbox.put(DONE)
+
+
+async def write_stage(inbox: asyncio.Queue, batch_size: int, checkpoint: Checkpoint, stats: ImportStats) -> None:
+    """Этап записи: пачки пользователей через UsersDAO.upsert_many и сохранение контрольной точки"""
+    batch: list[ImportRecord] = []
+
+    async def flush():
+        valid = [record for record in batch if record.error is None]
+        for record in batch:
+            if record.error is not None:
+                stats.errors += 1
+                logger.warning('Запись %s пропущена: %s', record.index, record.error)
+        if valid:
+            start = time.perf_counter()
+            written = await UsersDAO.upsert_many([record.values for record in valid], batch_size=len(valid))
+            stats.stage_time['write'] += time.perf_counter() - start
+            stats.written += written
+            stats.duplicates += len(valid) - written
+        checkpoint.complete(record.index for record in batch)
+        checkpoint.save()
+        batch.clear()
+
+    while (record := await inbox.get()) is not DONE:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+
+
+async def import_users(source: Path, batch_size: int, geo_workers: int, hash_workers: int,
+                       avatar_workers: int, queue_size: int) -> ImportStats:
+    """
+    Функция импорта пользователей из файла
+    :param source: путь к CSV или JSONL
+    :param batch_size: размер пачки записи в БД
+    :param geo_workers: количество одновременных запросов координат
+    :param hash_workers: количество одновременных задач хеширования
+    :param avatar_workers: количество одновременных задач обработки аватаров
+    :param queue_size: размер очереди между этапами
+    :return: итоговая статистика
+    """
+    checkpoint = Checkpoint.load(source)
+    stats = ImportStats()
+    if checkpoint.offset:
+        print(f'продолжение импорта с записи {checkpoint.offset}')
+
+    to_geo, to_hash, to_avatar, to_write = (asyncio.Queue(maxsize=queue_size) for _ in range(4))
+
+    async def reader():
+        index = checkpoint.offset
+        # чтение файла выполняется частями в отдельном потоке, чтобы не блокировать event loop
+        records = read_records(source, checkpoint.offset)
+        while chunk := await asyncio.to_thread(lambda: [record for _, record in zip(range(1000), records)]):
+            for data in chunk:
+                await to_geo.put(ImportRecord(index, data))
+                index += 1
+                stats.read += 1
+        for _ in range(geo_workers):
+            await to_geo.put(DONE)
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            print(stats.report())
+
+    report_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(
+            reader(),
+            run_stage('geo', geocode_stage, to_geo, to_hash, geo_workers, hash_workers, stats),
+            run_stage('hash', hash_stage, to_hash, to_avatar, hash_workers, avatar_workers, stats),
+            run_stage('avatar', avatar_stage(source.parent), to_avatar, to_write, avatar_workers, 1, stats),
+            write_stage(to_write, batch_size, checkpoint, stats),
+        )
+    finally:
+        report_task.cancel()
+        # общий кэш списков (LISTING_CACHE_BACKEND=redis) сбрасывается для всех процессов сервера
+        await listing_cache.invalidate()
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Импорт пользователей из CSV или JSONL')
+    parser.add_argument('source', type=Path, help='путь к файлу .csv или .jsonl')
+    parser.add_argument('--batch-size', type=int, default=settings.BULK_BATCH_SIZE)
+    parser.add_argument('--geo-workers', type=int, default=16)
+    parser.add_argument('--hash-workers', type=int, default=settings.HASH_POOL_WORKERS * 2)
+    parser.add_argument('--avatar-workers', type=int, default=settings.IMAGE_POOL_WORKERS * 2)
+    parser.add_argument('--queue-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+    try:
+        stats = await import_users(args.source, args.batch_size, args.geo_workers, args.hash_workers,
+                                   args.avatar_workers, args.queue_size)
+        print(stats.report(final=True))
+    finally:
+        hash_executor.shutdown()
+        image_executor.shutdown()
+        await geocoder.close()
+        await dispose_engines()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
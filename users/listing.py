@@ -0,0 +1,87 @@
+"""
+Списки пользователей для /api/list/ (по дате, по расстоянию и поиск по имени); списки по дате
+кэшируются (utils.listing_cache).
+В кэше хранятся строки, общие для всех пользователей с одинаковыми фильтрами; исключение текущего
+пользователя и формирование страницы выполняются для каждого запроса после чтения кэша.
+"""
+from users.setting_import.listing_import import *
+
+
+def _rows_to_dicts(rows: list) -> list[dict]:
+    """Функция преобразует строки проекции в словари для хранения в кэше"""
+    return [{field: getattr(row, field) for field in row.__slots__} for row in rows]
+
+
+def _dicts_to_rows(items: list[dict]) -> list:
+    """Функция создает новые строки проекции SUserView из словарей кэша (кэш не изменяется)"""
+    _, row_class = UsersDAO._projection(SUserView)
+    return [row_class(**item) for item in items]
+
+
+async def find_users_page(viewer_id: int, limit: int, cursor: Optional[str] = None,
+                          sort_by_date: bool = True, **filters) -> Page:
+    """
+    Функция для получения страницы пользователей по фильтрам, упорядоченной по дате регистрации.
+    Из БД (или кэша) выбирается на одну строку больше, чтобы после исключения текущего пользователя
+    страница оставалась полной.
+    :param viewer_id: id текущего пользователя, исключается из списка
+    :param limit: размер страницы
+    :param cursor: курсор предыдущей страницы
+    :param sort_by_date: если True, сортирует по дате создания от новых к старым
+    :param filters: фильтры first_name, last_name, gender
+    :return: страница строк проекции SUserView
+    """
+    key = listing_cache.make_key('date', sort_by_date=sort_by_date, limit=limit, cursor=cursor, **filters)
+    cached, generation = await listing_cache.get(key)
+    if cached is None:
+        page = await UsersDAO.find_page(limit=limit + 1, cursor=cursor, sort_by_date=sort_by_date,
+                                        view=SUserView, **filters)
+        cached = {'rows': _rows_to_dicts(page.items), 'more': page.next_cursor is not None}
+        await listing_cache.set(key, cached, generation)
+
+    users = [user for user in _dicts_to_rows(cached['rows']) if user.id != viewer_id]
+    if len(users) <= limit and not cached['more']:
+        return Page(items=users)
+    users = users[:limit]
+    order = 'date_desc' if sort_by_date else 'date_asc'
+    return Page(items=users, next_cursor=encode_cursor(order, [users[-1].data_create_user, users[-1].id]))
+
+
+async def find_users_page_in_radius(viewer, distance: float, limit: int, cursor: Optional[str] = None,
+                                    **filters) -> Page:
+    """
+    Функция для получения страницы пользователей в пределах расстояния, упорядоченной по расстоянию.
+    Результаты не кэшируются: страница выбирается keyset-запросом по (расстояние, id), расстояние
+    считается в БД от координат текущего пользователя.
+    :param viewer: текущий пользователь (id и координаты)
+    :param distance: радиус поиска в метрах
+    :param limit: размер страницы
+    :param cursor: курсор предыдущей страницы
+    :param filters: фильтры first_name, last_name, gender
+    :return: страница строк проекции SUserView с заполненным distance
+    """
+    return await UsersDAO.find_page_in_radius(latitude=viewer.latitude, longitude=viewer.longitude,
+                                              distance=distance, limit=limit, cursor=cursor,
+                                              exclude_id=viewer.id, view=SUserView, **filters)
+
+
+async def find_users_page_by_name(viewer, name: str, limit: int, cursor: Optional[str] = None,
+                                  distance: Optional[float] = None, **filters) -> Page:
+    """
+    Функция для поиска пользователей по имени и фамилии (по префиксу и с опечатками),
+    страницы упорядочены по убыванию сходства. Результаты не кэшируются: страница выбирается
+    keyset-запросом вместе с фильтрами и расстоянием, поэтому ее стоимость не зависит от числа совпадений.
+    :param viewer: текущий пользователь (id и координаты), исключается из списка
+    :param name: строка поиска
+    :param limit: размер страницы
+    :param cursor: курсор предыдущей страницы
+    :param distance: радиус поиска в метрах, None - без ограничения расстояния
+    :param filters: фильтры first_name, last_name, gender
+    :return: страница строк проекции SUserView (с заполненным distance, если известны координаты пользователя)
+    """
+    origin = (viewer.latitude, viewer.longitude) \
+        if viewer.latitude is not None and viewer.longitude is not None else None
+    if distance is not None and origin is None:
+        return Page(items=[])
+    return await UsersDAO.find_page_by_name(query_words(name), limit=limit, cursor=cursor, exclude_id=viewer.id,
+                                            origin=origin, distance=distance, view=SUserView, **filters)
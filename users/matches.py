@@ -0,0 +1,39 @@
+"""
+Пакетный перенос взаимных симпатий, записанных до появления таблицы matches:
+python -m users.matches [--batch-size 50000]
+Симпатии обрабатываются диапазонами id, каждый диапазон - отдельная транзакция,
+поэтому задачу можно прервать и запустить снова (уже перенесенные пары пропускаются).
+"""
+from users.setting_import.matches_import import *
+
+
+async def backfill_matches(batch_size: int, first_id: int = 1) -> int:
+    """
+    Функция переносит взаимные симпатии в matches пачками
+    :param batch_size: количество симпатий в пачке (по id)
+    :param first_id: id симпатии, с которого начинается перенос
+    :return: количество добавленных строк matches
+    """
+    last_like_id = await MatchesDAO.max_like_id()
+    added, start = 0, time.perf_counter()
+    for range_start in range(first_id, last_like_id + 1, batch_size):
+        range_end = min(range_start + batch_size - 1, last_like_id)
+        added += await MatchesDAO.backfill_range(range_start, range_end)
+        print(f'симпатии до id {range_end} из {last_like_id}: добавлено строк {added} '
+              f'({time.perf_counter() - start:.1f} с)')
+    return added
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Перенос взаимных симпатий в таблицу matches')
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--first-id', type=int, default=1, help='id симпатии, с которого продолжить перенос')
+    args = parser.parse_args()
+    try:
+        await backfill_matches(args.batch_size, args.first_id)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -11,6 +11,82 @@ class Grade(Base):
     extend_existing = True
 
 
+class Like(Base):
+    """Класс для хранения симпатий: пользователь liker_id поставил симпатию пользователю target_id"""
+    id: Mapped[int_pk]
+    liker_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    target_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # уникальность пары, индекс используется для поиска симпатий пользователя
+        UniqueConstraint('liker_id', 'target_id', name='uq_likes_liker_id_target_id'),
+        # обратное направление: кто поставил симпатию пользователю
+        Index('ix_likes_target_id_liker_id', 'target_id', 'liker_id'),
+        # подсчет симпатий пользователя за период для дневного лимита
+        Index('ix_likes_liker_id_date', 'liker_id', 'date'),
+    )
+
+    extend_existing = True
+
+
+class Match(Base):
+    """
+    Класс для хранения взаимных симпатий: на каждую пару две строки (user_id, match_id) и (match_id, user_id),
+    поэтому совпадения пользователя читаются по индексу без просмотра симпатий в обе стороны
+    """
+    __tablename__ = 'matches'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    match_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # момент возникновения взаимности: дата более поздней из двух симпатий
+    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # страница совпадений пользователя от новых к старым
+        Index('ix_matches_user_id_date', 'user_id', 'date', 'match_id'),
+    )
+
+    extend_existing = True
+
+
+class Recommendation(Base):
+    """
+    Класс для хранения ленты рекомендаций: кандидат candidate_id в ленте пользователя user_id.
+    Составляющие оценки хранятся отдельно, чтобы при новой симпатии пересчитывать только изменившиеся.
+    """
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    candidate_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    distance_score: Mapped[float]
+    gender_score: Mapped[float]
+    recency_score: Mapped[float]
+    reciprocal_score: Mapped[float]
+    score: Mapped[float]
+
+    __table_args__ = (
+        # страница ленты по убыванию оценки читается по индексу
+        Index('ix_recommendations_user_id_score', 'user_id', 'score', 'candidate_id'),
+        # ленты, в которых находится пользователь, обновляются при его новой симпатии
+        Index('ix_recommendations_candidate_id', 'candidate_id'),
+    )
+
+    extend_existing = True
+
+
+class RecommendationFeed(Base):
+    """
+    Класс для отметки построенных лент рекомендаций: строка появляется при полном построении ленты,
+    в том числе пустой. Кандидаты добавляются (RecommendationsDAO.push) только в построенные ленты,
+    иначе у пользователя без ленты оказалась бы неполная лента из одних добавленных строк.
+    """
+    __tablename__ = 'recommendation_feeds'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    built_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    extend_existing = True
+
+
 class User(Base):
     """Класс для хранения данных пользователя"""
     id: Mapped[int_pk]
@@ -23,12 +99,21 @@ class User(Base):
     data_create_user: Mapped[created_at]
     latitude: Mapped[float]
     longitude: Mapped[float]
+    geohash: Mapped[Optional[str]] = mapped_column(String(12), nullable=True)
     list_grade_history: Mapped[list[Grade]] = (
         relationship("Grade",
                      backref="user",
                      cascade="all, delete-orphan",)
     )
 
+    # составной индекс для поиска пользователей в прямоугольнике координат
+    __table_args__ = (
+        Index('ix_users_latitude_longitude', 'latitude', 'longitude'),
+        # varchar_pattern_ops позволяет использовать индекс для поиска по префиксу geohash
+        Index('ix_users_geohash', 'geohash', postgresql_ops={'geohash': 'varchar_pattern_ops'}),
+        # триграммные индексы имени и фамилии для поиска по имени требуют расширения pg_trgm
+        # и создаются только миграцией a4c7e2d9b815
+    )
 
     extend_existing = True
 
@@ -0,0 +1,146 @@
+"""
+Лента рекомендаций: для каждого пользователя хранится ранжированный список кандидатов (таблица recommendations).
+Лента строится один раз (при регистрации, при первом запросе или пакетной задачей) и дальше обновляется
+по событиям: новый пользователь добавляется в ленты ближайших пользователей, симпатия удаляет получателя
+из ленты и пересчитывает только затронутые составляющие оценки (см. RecommendationsDAO.apply_like).
+Пакетное построение лент для уже существующих пользователей: python -m users.recommendations
+"""
+from users.setting_import.recommendations_import import *
+
+
+def _gender(value) -> str:
+    return Gender(value).value
+
+
+def _feed_row(user_id: int, candidate_id: int, distance: float, gender: float, created, reciprocal: float) -> dict:
+    row = {
+        'user_id': user_id,
+        'candidate_id': candidate_id,
+        'distance_score': distance_score(distance),
+        'gender_score': gender,
+        'recency_score': recency_score(created),
+        'reciprocal_score': reciprocal,
+    }
+    row['score'] = recommendation_score(row['distance_score'], row['gender_score'],
+                                        row['recency_score'], row['reciprocal_score'])
+    return row
+
+
+async def rebuild_feed(user_id: int) -> tuple[Optional[object], list]:
+    """
+    Функция строит ленту пользователя заново: кандидаты в радиусе RECOMMENDATION_RADIUS, кроме тех,
+    кому пользователь уже поставил симпатию. Вероятность ответной симпатии требует симпатий кандидата,
+    поэтому она считается только для предварительно отобранных по остальным составляющим кандидатов.
+    :param user_id: id пользователя
+    :return: кортеж (строка проекции пользователя или None, кандидаты в радиусе с атрибутом distance)
+    """
+    viewer = await UsersDAO.find_by_id(user_id, view=SUserView)
+    if viewer is None:
+        return None, []
+    candidates = await UsersDAO.find_in_radius(viewer.latitude, viewer.longitude, settings.RECOMMENDATION_RADIUS,
+                                               sort_by_date=False, exclude_id=user_id, view=SUserView)
+    liked, likers = await RecommendationsDAO.like_neighbours(user_id)
+    preferences = gender_preferences((await RecommendationsDAO.like_counts([user_id])).get(user_id, {}))
+
+    candidates = [candidate for candidate in candidates if candidate.id not in liked]
+    shortlist = heapq.nlargest(
+        settings.RECOMMENDATION_FEED_SIZE * 2, candidates,
+        key=lambda candidate: recommendation_score(distance_score(candidate.distance),
+                                                   preferences[_gender(candidate.gender)],
+                                                   recency_score(candidate.data_create_user), 0.0)
+    )
+    counts = await RecommendationsDAO.like_counts([candidate.id for candidate in shortlist])
+    viewer_gender = _gender(viewer.gender)
+    rows = [
+        _feed_row(user_id, candidate.id, candidate.distance, preferences[_gender(candidate.gender)],
+                  candidate.data_create_user,
+                  1.0 if candidate.id in likers else gender_preferences(counts.get(candidate.id, {}))[viewer_gender])
+        for candidate in shortlist
+    ]
+    rows = heapq.nlargest(settings.RECOMMENDATION_FEED_SIZE, rows, key=lambda row: row['score'])
+    await RecommendationsDAO.replace_feed(user_id, rows)
+    return viewer, candidates
+
+
+async def on_user_registered(user_id: int) -> None:
+    """
+    Функция для фоновой обработки регистрации: строит ленту нового пользователя
+    и добавляет его в построенные ленты RECOMMENDATION_FANOUT ближайших пользователей
+    :param user_id: id нового пользователя
+    """
+    user, candidates = await rebuild_feed(user_id)
+    if user is None:
+        return
+    nearest = heapq.nsmallest(settings.RECOMMENDATION_FANOUT, candidates, key=lambda candidate: candidate.distance)
+    counts = await RecommendationsDAO.like_counts([user_id, *(candidate.id for candidate in nearest)])
+    preferences = gender_preferences(counts.get(user_id, {}))
+    user_gender = _gender(user.gender)
+    rows = [
+        _feed_row(candidate.id, user_id, candidate.distance,
+                  gender_preferences(counts.get(candidate.id, {}))[user_gender], user.data_create_user,
+                  preferences[_gender(candidate.gender)])
+        for candidate in nearest
+    ]
+    await RecommendationsDAO.push(rows, settings.RECOMMENDATION_FEED_SIZE)
+
+
+async def on_like(liker_id: int, target_id: int) -> None:
+    """
+    Функция для фоновой обработки новой симпатии: обновляет ленты без полного пересчета
+    :param liker_id: id пользователя, который поставил симпатию
+    :param target_id: id пользователя, которому поставлена симпатия
+    """
+    counts = await RecommendationsDAO.like_counts([liker_id])
+    await RecommendationsDAO.apply_like(liker_id, target_id, gender_preferences(counts.get(liker_id, {})))
+
+
+async def find_feed_page(user_id: int, limit: int, cursor: Optional[str] = None) -> Page:
+    """
+    Функция для получения страницы ленты рекомендаций; лента, которая еще не построена (пользователь
+    зарегистрирован до появления рекомендаций), строится при запросе первой страницы.
+    Построенная лента отмечается в recommendation_feeds даже пустой, поэтому не строится повторно
+    :param user_id: id пользователя
+    :param limit: размер страницы
+    :param cursor: курсор предыдущей страницы
+    :return: страница строк проекции SUserView
+    """
+    if cursor is None and not await RecommendationsDAO.feed_built(user_id):
+        await rebuild_feed(user_id)
+    return await RecommendationsDAO.find_feed_page(user_id, limit, cursor, view=SUserView)
+
+
+async def rebuild_all(batch_size: int, workers: int) -> int:
+    """
+    Функция строит ленты всех пользователей пачками
+    :param batch_size: количество пользователей в пачке
+    :param workers: количество лент, которые строятся одновременно
+    :return: количество обработанных пользователей
+    """
+    semaphore = asyncio.Semaphore(workers)
+
+    async def rebuild(user_id: int):
+        async with semaphore:
+            await rebuild_feed(user_id)
+
+    processed, last_id, start = 0, 0, time.perf_counter()
+    while user_ids := await UsersDAO.find_ids(last_id, batch_size):
+        await asyncio.gather(*(rebuild(user_id) for user_id in user_ids))
+        processed += len(user_ids)
+        last_id = user_ids[-1]
+        print(f'ленты построены: {processed} ({processed / (time.perf_counter() - start):.0f} в секунду)')
+    return processed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Построение лент рекомендаций всех пользователей')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=settings.DB_POOL_SIZE)
+    args = parser.parse_args()
+    try:
+        await rebuild_all(args.batch_size, args.workers)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
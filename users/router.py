@@ -5,9 +5,22 @@ router = APIRouter(prefix='/api', tags=['users'])
 # Лимит оценок в день
 DAILY_LIMIT:int = 5
 
+# хранилище счетчиков лимита, если он считается не в БД
+like_quota = create_counter_store()
 
-@router.post('/clients/create/')
+
+async def index_new_user(user_id: int, user_geohash: Optional[str], first_name: str, last_name: str) -> None:
+    """
+    Функция добавляет зарегистрированного пользователя в индексы ячеек и имен в памяти процесса
+    (фоновая задача после фиксации транзакции; выполняется в цикле событий, как и чтения индексов)
+    """
+    spatial_index.add(user_id, user_geohash)
+    name_index.add(user_id, first_name, last_name)
+
+
+@router.post('/clients/create/', response_model=SUserView)
 async def create_users(
+        background_tasks: BackgroundTasks,
         address: str = Form(default='Россия, Москва, ул.Тверская 1',
                             description='Введите свой адрес, в формате: Россия, Москва, ул.Тверская 1'),
         email: EmailStr = Form(...,description='Введите ваш email в формате user@example.com'),
@@ -16,9 +29,11 @@ async def create_users(
         gender: Gender = Form(...,description='Выберите ваш пол'),
         password: str = Form(...,description='Введите пароль'),
         password_confirm: str = Form(...,description='Введите повторно пароль'),
-        avatar: UploadFile = File(default=None,description='Добавьте свой аватар или оставьте поле пустым')) -> dict:
+        avatar: UploadFile = File(default=None,description='Добавьте свой аватар или оставьте поле пустым'),
+        session: AsyncSession = Depends(get_session)) -> dict:
     """
     эндпоинт для регитсрации пользователя
+    :param background_tasks: задачи после ответа (сброс кэша списков после фиксации транзакции)
     :param address: адрес пользователя для определения координат и сохранение их в экземпляре пользователя
     :param email: почта пользователя(должна быть уникальной)
     :param first_name: имя пользователя
@@ -27,49 +42,78 @@ async def create_users(
     :param password: пароль(в бд будет хешированая строка)
     :param password_confirm: проверка введенного пароля пользователем
     :param avatar: аватарка пользователя(по умолчанию ставится стандартная с водяным знаком)
+    :param session: сессия запроса: проверка email и запись пользователя на одном соединении
     :return: возвращает данные зарегистрированого пользователя
     """
-    user = await UsersDAO.find_one_or_none(email=email)
-    if user:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                            detail=f'Пользователь c Email {email} уже существует')
     if password != password_confirm:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT,
                             detail='Пароли не совпадают')
 
-    #шифрование(хеширование) пароля
-    password_hash = get_password_hash(password)
+    # получения широты и долготы (до первого запроса к БД: соединение сессии не занято на время запроса к геокодеру)
+    dict_geo = await get_geo(address)
 
-    # добавление водяного знака
-    output_avatar_path = f'{email}.png'
-    avatar = await watermark_photo(avatar, output_avatar_path) \
-        if avatar else 'users/avatars/default_avatar.png'
+    latitude = dict_geo.get('latitude')
+    longitude = dict_geo.get('longitude')
+    # координаты обязательны (NOT NULL), адрес, который не удалось найти, отклоняется до вставки
+    if latitude is None or longitude is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail='Не удалось определить координаты по указанному адресу')
+    # ячейка geohash для поиска пользователей рядом
+    user_geohash = geohash_encode(latitude, longitude)
 
-    # получения широты и долготы
-    dict_geo = await get_geo(address)
+    # быстрая проверка email по индексу до хеширования и сохранения аватара, в сессии запроса (одно соединение);
+    # одновременные регистрации с одним email все равно отсекает ограничение уникальности при вставке
+    if await UsersDAO.email_exists(email, session=session):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f'Пользователь c Email {email} уже существует')
 
-    await UsersDAO.add(
-        email=email,
-        password=password_hash,
-        first_name=first_name,
-        last_name=last_name,
-        gender=gender,
-        avatar=avatar,
-        latitude=dict_geo['latitude'] if 'latitude' in dict_geo else None,
-        longitude=dict_geo['longitude'] if 'longitude' in dict_geo else None,
-        list_grade_history=[]
-    )
+    #шифрование(хеширование) пароля
+    password_hash = await get_password_hash_async(password)
+
+    # проверка аватара, наложение водяного знака и сохранение вариантов разного размера
+    try:
+        avatar = await ingest_avatar(avatar) if avatar else 'users/avatars/default_avatar.png'
+    except AvatarTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except AvatarRejected as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        new_user = await UsersDAO.add(
+            session=session,
+            email=email,
+            password=password_hash,
+            first_name=first_name,
+            last_name=last_name,
+            gender=gender,
+            avatar=avatar,
+            latitude=latitude,
+            longitude=longitude,
+            geohash=user_geohash
+        )
+    except IntegrityError as e:
+        # 409 только для нарушения уникальности email, остальные ошибки целостности - ошибки сервера
+        if unique_violation(e) != UsersDAO.email_constraint:
+            raise
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f'Пользователь c Email {email} уже существует')
+    # индексы в памяти процесса и кэш списков обновляются после фиксации транзакции,
+    # иначе в них может попасть пользователь из отмененной транзакции или список без нового пользователя
+    background_tasks.add_task(index_new_user, new_user.id, user_geohash, first_name, last_name)
+    background_tasks.add_task(listing_cache.invalidate)
+    # лента нового пользователя и его добавление в ленты соседей, тоже после фиксации транзакции
+    background_tasks.add_task(on_user_registered, new_user.id)
 
-    created_user = await UsersDAO.find_one_or_none(email=email)
+    # INSERT ... RETURNING уже вернул id и дату создания, повторный запрос не нужен
     user_view = SUserView(
-        email=created_user.email,
-        first_name=created_user.first_name,
-        last_name=created_user.last_name,
-        gender=created_user.gender,
-        avatar=created_user.avatar,
-        data_create_user = created_user.data_create_user,
-        latitude=created_user.latitude,
-        longitude=created_user.longitude,
+        email=new_user.email,
+        first_name=new_user.first_name,
+        last_name=new_user.last_name,
+        gender=new_user.gender,
+        avatar=new_user.avatar,
+        data_create_user = new_user.data_create_user,
+        latitude=new_user.latitude,
+        longitude=new_user.longitude,
     )
     return user_view
 
@@ -105,41 +149,59 @@ async def logout_user(response: Response) -> dict:
     return {'message': 'Пользователь успешно вышел из системы'}
 
 @router.get("/me/", response_model=SUserView)
-async def get_profile(current_user: User = Depends(get_current_user)) -> dict:
+async def get_profile(current_user = Depends(get_current_user_view)) -> Response:
     """
     эндпоинт для просмотра профиля пользователя
-    :param current_user: зависимость для получение данных пользователя
-    :return: словарь с данными пользователя
-    """
-    return SUserView(
-        email=current_user.email,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        gender=current_user.gender,
-        avatar=current_user.avatar,
-        data_create_user=current_user.data_create_user,
-        latitude=current_user.latitude,
-        longitude=current_user.longitude,
-    )
+    :param current_user: зависимость для получение данных пользователя (только колонки SUserView)
+    :return: данные пользователя (строка проекции кодируется в JSON напрямую, без валидации pydantic)
+    """
+    return FastJSONResponse(view_dumper(SUserView)(current_user))
+
+@router.get("/avatars/{name}")
+async def get_avatar(name: str, request: Request) -> Response:
+    """
+    эндпоинт для получения файла аватара. Файл отдается FileResponse (с поддержкой Range),
+    ETag строится по sha256 содержимого, при совпадении If-None-Match возвращается 304
+    :param name: имя файла в папке аватаров
+    :param request: запрос для чтения заголовка If-None-Match
+    :return: файл аватара или пустой ответ 304
+    """
+    path = avatar_file(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Аватар не найден")
 
-@router.get("/list/", response_model=List[SUserView])
+    headers, stat = await avatar_headers(path)
+    if etag_matches(request.headers.get('if-none-match'), headers['etag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, headers=headers, stat_result=stat)
+
+@router.get("/list/", response_model=SUserPage)
 async def get_users(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user = Depends(get_current_user_view),
     first_name: Optional[str] = Query(default=None),
     last_name: Optional[str] = Query(default=None),
+    name: Optional[str] = Query(default=None, max_length=100),
     gender: Optional[str] = Query(default=None),
     sort_by_date: Optional[bool] = Query(default=True),
-    distance: Optional[int] = Query(default=None)
+    distance: Optional[int] = Query(default=None),
+    limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(default=None)
 ) -> dict:
     """
     эндпоинт для получение списка пользователей по фильтрам если в них есть необходимость и сортировке по дате регистрации
+    :param request: запрос (Accept-Encoding для сжатия больших страниц)
     :param current_user: получение текущего пользователя
     :param first_name: имя для фильтра по имени
     :param last_name: фамилия для фильтра по фамилии
+    :param name: поиск по имени и фамилии (по началу и с опечатками), пользователи сортируются по сходству
     :param gender: пол для фильтра по гендеру
     :param sort_by_date: сортировка по дате(по убыванию или по возрастанию)
-    :param distance: фильтр для дистаниции
-    :return: список пользователей в фиде словаря
+    :param distance: фильтр для дистаниции, при его указании пользователи сортируются по расстоянию
+    :param limit: количество пользователей на странице
+    :param cursor: курсор следующей страницы из предыдущего ответа
+    :return: страница пользователей и курсор следующей страницы
+    (строки проекции кодируются в JSON напрямую, без валидации pydantic)
     """
     # словарь для использование фильтров
     filters = {}
@@ -150,38 +212,139 @@ async def get_users(
     if gender:
         filters["gender"] = gender
 
-    # Получаем всех пользователей, кроме текущего
-    users = [
-        user for user in await UsersDAO.find_all(sort_by_date=sort_by_date, **filters)
-        if user.id != current_user.id
-    ]
+    try:
+        # поиск по имени: триграммные индексы, с distance - только пользователи в пределах расстояния
+        if name:
+            page = await find_users_page_by_name(viewer=current_user,
+                                                 name=name,
+                                                 limit=limit,
+                                                 cursor=cursor,
+                                                 distance=distance,
+                                                 **filters)
+            if not page.items and cursor is None:
+                raise HTTPException(status_code=404, detail="Пользователи не найдены")
+            return page_response(page, request)
+
+        # реализация для отображение пользователей по расстоянию:
+        # кандидаты из ячеек geohash берутся из кэша или БД, точное расстояние считается только для них
+        if distance is not None:
+            page = await find_users_page_in_radius(viewer=current_user,
+                                                   distance=distance,
+                                                   limit=limit,
+                                                   cursor=cursor,
+                                                   **filters)
+            if not page.items and cursor is None:
+                raise HTTPException(status_code=404,
+                                    detail="В пределах указанного расстояния не найдено ни одного пользователя")
+            return page_response(page, request)
+
+        # Получаем пользователей (из кэша или БД), кроме текущего
+        page = await find_users_page(viewer_id=current_user.id,
+                                     limit=limit,
+                                     cursor=cursor,
+                                     sort_by_date=sort_by_date,
+                                     **filters)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    if not users:
+    if not page.items and cursor is None:
         raise HTTPException(status_code=404, detail="Пользователи не найдены")
 
-    # реализация для отображение пользователей по расстоянию
-    if distance is not None:
-        latlong_a = [current_user.latitude, current_user.longitude]
-        users_within_distance = []
+    return page_response(page, request)
+
+
+@router.get("/recommendations/", response_model=SUserPage)
+async def get_recommendations(
+    request: Request,
+    current_user = Depends(get_current_user_view),
+    limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(default=None)
+) -> dict:
+    """
+    эндпоинт ленты рекомендаций: кандидаты по убыванию оценки (расстояние, предпочтение по полу,
+    новизна, вероятность ответной симпатии), без пользователей, которым уже поставлена симпатия
+    :param request: запрос (Accept-Encoding для сжатия больших страниц)
+    :param current_user: получение текущего пользователя
+    :param limit: количество пользователей на странице
+    :param cursor: курсор следующей страницы из предыдущего ответа
+    :return: страница пользователей и курсор следующей страницы
+    """
+    try:
+        page = await find_feed_page(current_user.id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return page_response(page, request)
+
+
+@router.get("/matches/", response_model=SUserPage)
+async def get_matches(
+    request: Request,
+    current_user = Depends(get_current_user_view),
+    limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(default=None)
+) -> dict:
+    """
+    эндпоинт взаимных симпатий текущего пользователя, от новых к старым
+    :param request: запрос (Accept-Encoding для сжатия больших страниц)
+    :param current_user: получение текущего пользователя
+    :param limit: количество пользователей на странице
+    :param cursor: курсор следующей страницы из предыдущего ответа
+    :return: страница пользователей и курсор следующей страницы
+    """
+    try:
+        page = await MatchesDAO.find_matches_page(current_user.id, limit, cursor, view=SUserView)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return page_response(page, request)
 
-        for user in users:
-            user_distance = await great_circle_distance([user.latitude, user.longitude], latlong_a)
-            if user_distance < distance:
-                user.distance = user_distance
-                users_within_distance.append(user)
 
-        if not users_within_distance:
-            raise HTTPException(status_code=404,
-                                detail="В пределах указанного расстояния не найдено ни одного пользователя")
+def page_response(page, request: Request) -> Response:
+    """
+    Функция формирует ответ со страницей пользователей в формате SUserPage
+    :param page: страница из UsersDAO (строки проекции SUserView)
+    :param request: запрос для выбора сжатия
+    :return: JSON-ответ
+    """
+    return FastJSONResponse({'items': dump_views(page.items, SUserView), 'next_cursor': page.next_cursor},
+                            request=request)
 
-        return users_within_distance
+async def add_like_with_quota(liker_id: int, target_id: int,
+                              session: Optional[AsyncSession] = None) -> tuple[bool, bool]:
+    """
+    Функция для добавления симпатии с соблюдением дневного лимита DAILY_LIMIT.
+    При QUOTA_BACKEND=sql лимит проверяется в транзакции добавления, иначе через хранилище счетчиков.
+    :param liker_id: id пользователя, который ставит симпатию
+    :param target_id: id пользователя, которому ставится симпатия
+    :param session: сессия запроса, None - отдельная транзакция
+    :return: кортеж (симпатия добавлена впервые, симпатия взаимная)
+    """
+    if settings.QUOTA_BACKEND == 'sql':
+        return await LikesDAO.add_like(liker_id=liker_id, target_id=target_id, daily_limit=DAILY_LIMIT,
+                                       session=session)
+
+    window = int(timedelta(days=1).total_seconds())
+    key = f'likes:{liker_id}'
+    hit = await like_quota.hit(key, DAILY_LIMIT, window)
+    if hit is None:
+        raise QuotaExceeded('Лимит оценок в день исчерпан')
+    try:
+        created, mutual = await LikesDAO.add_like(liker_id=liker_id, target_id=target_id, session=session)
+    except BaseException:
+        # симпатия не записана (ошибка БД, отмена запроса) - лимит не расходуется
+        await like_quota.release(key, hit)
+        raise
+    # повторная симпатия не расходует лимит
+    if not created:
+        await like_quota.release(key, hit)
+    return created, mutual
 
-    return users
 
 @router.get("/clients/{user_id}/match/", response_model=dict)
 async def grade_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_user_view),
+    session: AsyncSession = Depends(get_session),
 ) -> dict[str, str]:
     """
     Эндпоинт для создания симпатии. В случае взаимной симпатии
@@ -189,7 +352,9 @@ async def grade_user(
     Сохраняет симпатию для текущего пользователя и проверяет её наличие.
 
     :param user_id: ID пользователя, которому нужно поставить симпатию
+    :param background_tasks: задачи после ответа (обновление лент рекомендаций после фиксации транзакции)
     :param current_user: Зависимость для получения авторизованного пользователя
+    :param session: Сессия запроса: поиск пользователя и запись симпатии в одной транзакции
     :return: Сообщение об установке оценки
     """
     # Проверка, чтобы пользователь не оценивал сам себя
@@ -197,27 +362,23 @@ async def grade_user(
         raise HTTPException(status_code=400, detail="Нельзя поставить симпатию самому себе")
 
     # Получаем пользователя по ID
-    user = await UsersDAO.find_by_id(item_id=user_id)
+    user = await UsersDAO.find_by_id(item_id=user_id, view=SUserView, session=session)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    # Проверка лимита оценок в день
-    now = datetime.utcnow()
-    day_start = now - timedelta(days=1)
-    daily_grades = [grade for grade in current_user.list_grade_history if grade.date >= day_start]
-    if len(daily_grades) > DAILY_LIMIT:
+    # Добавление симпатии с проверкой лимита оценок в день и проверка на взаимную симпатию
+    try:
+        created, mutual = await add_like_with_quota(liker_id=current_user.id, target_id=user_id, session=session)
+    except QuotaExceeded:
         raise HTTPException(status_code=403, detail="Лимит оценок в день исчерпан")
 
-    # Проверка на взаимную симпатию
-    if user_id in [grade.user_id for grade in current_user.list_grade_history] and \
-       current_user.id in [grade.user_id for grade in user.list_grade_history]:
-        await send_email_notification(user1=current_user, user2=user)
-        return {"message": "Взаимная симпатия!"}
+    if created:
+        background_tasks.add_task(on_like, current_user.id, user_id)
 
-    # Добавление симпатии
-    new_grade = Grade(user_id=current_user.id, email=user.email, date=now)
-    async with async_session_maker() as session:
-        session.add(new_grade)
-        await session.commit()
+    if mutual:
+        # письма отправляются только в момент возникновения взаимной симпатии
+        if created:
+            await send_email_notification(user1=current_user, user2=user)
+        return {"message": "Взаимная симпатия!"}
 
-    return {"message": "Оценка добавлена"}
\ No newline at end of file
+    return {"message": "Оценка добавлена"}
@@ -11,5 +11,13 @@ class SUserView(BaseModel):
     distance: Optional[float] = None
     list_grade_history: Optional[list] = []
 
+    @computed_field
+    @property
+    def avatar_variants(self) -> dict[str, str]:
+        """Пути к вариантам аватара: thumb для списков, medium и full для профиля"""
+        return avatar_variants(self.avatar)
 
 
+class SUserPage(BaseModel):
+    items: list[SUserView] = Field(...)
+    next_cursor: Optional[str] = None
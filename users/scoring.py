@@ -0,0 +1,46 @@
+"""
+Оценка кандидата в ленте рекомендаций: взвешенная сумма составляющих расстояния, предпочтения по полу,
+новизны регистрации и вероятности ответной симпатии. Функции работают и с числами, и с колонками
+SQLAlchemy, поэтому оценка пересчитывается в UPDATE по той же формуле.
+"""
+from users.setting_import.scoring_import import *
+
+# начало отсчета новизны: составляющая растет линейно с датой регистрации и не зависит от момента расчета,
+# поэтому сохраненные оценки не устаревают и остаются сравнимыми между собой
+RECENCY_EPOCH = datetime(2024, 1, 1)
+
+
+def distance_score(distance: float) -> float:
+    """Функция оценки расстояния в метрах: 1 рядом, экспоненциально убывает с расстоянием"""
+    return math.exp(-distance / settings.RECOMMENDATION_DISTANCE_SCALE)
+
+
+def recency_score(created: datetime) -> float:
+    """Функция оценки новизны: количество шагов RECOMMENDATION_RECENCY_DAYS от RECENCY_EPOCH до регистрации"""
+    return (created - RECENCY_EPOCH).total_seconds() / 86400 / settings.RECOMMENDATION_RECENCY_DAYS
+
+
+def gender_preferences(counts: dict[str, int]) -> dict[str, float]:
+    """
+    Функция оценивает предпочтение по полу по симпатиям пользователя (сглаживание Лапласа:
+    без симпатий предпочтения равны)
+    :param counts: количество симпатий по полу получателя {'men': 3, 'women': 10}
+    :return: доля симпатий для каждого пола
+    """
+    total = sum(counts.values())
+    return {gender.value: (counts.get(gender.value, 0) + 1) / (total + len(Gender)) for gender in Gender}
+
+
+def recommendation_score(distance, gender, recency, reciprocal):
+    """
+    Функция для расчета итоговой оценки
+    :param distance: оценка расстояния
+    :param gender: предпочтение пользователем пола кандидата
+    :param recency: оценка новизны кандидата
+    :param reciprocal: вероятность ответной симпатии (1, если кандидат уже поставил симпатию)
+    :return: оценка (число или выражение SQL)
+    """
+    return (settings.RECOMMENDATION_WEIGHT_DISTANCE * distance
+            + settings.RECOMMENDATION_WEIGHT_GENDER * gender
+            + settings.RECOMMENDATION_WEIGHT_RECENCY * recency
+            + settings.RECOMMENDATION_WEIGHT_RECIPROCAL * reciprocal)
@@ -6,4 +6,6 @@ from datetime import (
     timezone
 )
 from config import settings
-from users.dao import UsersDAO
\ No newline at end of file
+from users.dao import UsersDAO
+from utils.executor import BoundedExecutor
+from utils.metrics import timed
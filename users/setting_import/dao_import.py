@@ -1,5 +1,23 @@
+import math
+from datetime import datetime, timedelta
+from typing import Optional
 from sqlalchemy.orm import joinedload
 from DAO.base import BaseDAO
-from database import async_session_maker
-from users.models import User
-from sqlalchemy import select, desc
\ No newline at end of file
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import Gender, mark_write
+from users.models import User, Like, Match, Recommendation, RecommendationFeed
+from users.scoring import recommendation_score
+from sqlalchemy import select, desc, or_, and_, exists, func, update, delete, case, tuple_, literal, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from utils.geo import bounding_box, great_circle_distance_batch
+from utils.utils_import.geo_import import EARTH_CIRCUMFERENCE
+from utils.geohash import cells_for_radius
+from utils.spatial_index import spatial_index
+from utils.name_search import name_index
+from config import settings
+from DAO.pagination import (
+    Page,
+    encode_cursor,
+    decode_cursor
+)
+from utils.quota import QuotaExceeded
\ No newline at end of file
@@ -2,4 +2,7 @@ from fastapi import Request, HTTPException, status, Depends
 from jose import jwt, JWTError
 from datetime import datetime, timezone
 from config import settings
-from users.dao import UsersDAO
\ No newline at end of file
+from users.dao import UsersDAO
+from users.schemas import SUserView
+
+from utils.cache import TTLCache
\ No newline at end of file
@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import (
+    Iterator,
+    Optional
+)
+
+from config import settings
+from database import (
+    Gender,
+    dispose_engines
+)
+from users.auth import (
+    get_password_hash_async,
+    hash_executor,
+    pwd_context
+)
+from users.dao import UsersDAO
+from utils.avatars import (
+    ingest_avatar_bytes,
+    AvatarRejected
+)
+from utils.geo import get_geo
+from utils.geocoding import geocoder
+from utils.geohash import encode as geohash_encode
+from utils.img_watermark import image_executor
+from utils.listing_cache import listing_cache
+
+logger = logging.getLogger('users.importer')
+
+DEFAULT_AVATAR = 'users/avatars/default_avatar.png'
+# обязательные поля записи импорта
+REQUIRED_FIELDS = ('email', 'first_name', 'last_name', 'gender')
+# интервал вывода промежуточного отчета, секунды
+REPORT_INTERVAL = 5.0
+# маркер завершения очереди этапа
+DONE = object()
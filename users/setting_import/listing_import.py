@@ -0,0 +1,10 @@
+from typing import Optional
+
+from DAO.pagination import (
+    Page,
+    encode_cursor
+)
+from users.dao import UsersDAO
+from users.schemas import SUserView
+from utils.listing_cache import listing_cache
+from utils.name_search import query_words
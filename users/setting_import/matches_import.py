@@ -0,0 +1,6 @@
+import argparse
+import asyncio
+import time
+
+from database import dispose_engines
+from users.dao import MatchesDAO
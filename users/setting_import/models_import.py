@@ -1,8 +1,11 @@
 from datetime import datetime
+from typing import Optional
 from sqlalchemy import (
     String,
     ForeignKey,
-    DateTime
+    DateTime,
+    Index,
+    UniqueConstraint
 )
 from sqlalchemy.orm import (
     Mapped,
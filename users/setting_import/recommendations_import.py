@@ -0,0 +1,23 @@
+import argparse
+import asyncio
+import heapq
+import time
+from typing import Optional
+
+from config import settings
+from database import (
+    Gender,
+    dispose_engines
+)
+from DAO.pagination import Page
+from users.dao import (
+    RecommendationsDAO,
+    UsersDAO
+)
+from users.schemas import SUserView
+from users.scoring import (
+    distance_score,
+    gender_preferences,
+    recency_score,
+    recommendation_score
+)
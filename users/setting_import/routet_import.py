@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import (
     Optional,
     List
@@ -13,26 +13,65 @@ from fastapi import (
     Form,
     Response,
     Depends,
-    Query
+    Query,
+    Request,
+    BackgroundTasks
 )
 from pydantic import EmailStr
-from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from DAO.pagination import InvalidCursor
+from fastapi.responses import (
+    JSONResponse,
+    FileResponse
+)
 from database import (
     Gender,
-    async_session_maker
+    get_session,
+    unique_violation
 )
 from users.auth import (
-    get_password_hash,
+    get_password_hash_async,
     authenticate_user,
     create_access_token
 )
-from users.dao import UsersDAO
-from users.dependencies import get_current_user
-from users.models import User, Grade
-from users.schemas import SUserView
-from utils.geo import (
-    get_geo,
-    great_circle_distance
+from users.dao import UsersDAO, LikesDAO, MatchesDAO
+from users.dependencies import get_current_user_view
+from users.listing import (
+    find_users_page,
+    find_users_page_in_radius,
+    find_users_page_by_name
+)
+from users.recommendations import (
+    find_feed_page,
+    on_like,
+    on_user_registered
+)
+from users.schemas import (
+    SUserView,
+    SUserPage
+)
+from utils.geo import get_geo
+from utils.geohash import encode as geohash_encode
+from utils.avatars import (
+    ingest_avatar,
+    AvatarRejected,
+    AvatarTooLarge,
+    avatar_file,
+    avatar_headers,
+    etag_matches
+)
+from utils.quota import (
+    QuotaExceeded,
+    create_counter_store
+)
+from utils.send_email import send_email_notification
+from utils.serialization import (
+    FastJSONResponse,
+    dump_views,
+    view_dumper
 )
-from utils.img_watermark import watermark_photo
-from utils.send_email import send_email_notification
\ No newline at end of file
+from utils.listing_cache import listing_cache
+from utils.spatial_index import spatial_index
+from utils.name_search import name_index
\ No newline at end of file
@@ -3,5 +3,8 @@ from pydantic import (
     BaseModel,
     EmailStr,
     Field,
+    computed_field
 )
-from datetime import datetime
\ No newline at end of file
+from datetime import datetime
+
+from utils.avatars import avatar_variants
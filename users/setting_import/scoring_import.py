@@ -0,0 +1,5 @@
+import math
+from datetime import datetime
+
+from config import settings
+from database import Gender
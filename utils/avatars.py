@@ -0,0 +1,180 @@
+from utils.utils_import.avatars_import import *
+
+
+class AvatarRejected(ValueError):
+    """Исключение, если загруженный файл не является допустимым изображением"""
+
+
+class AvatarTooLarge(AvatarRejected):
+    """Исключение, если изображение превышает ограничение по размеру файла или количеству пикселей"""
+
+
+def avatar_url(path: str) -> str:
+    """Функция преобразует путь к файлу в папке аватаров в адрес эндпоинта /api/avatars/"""
+    if path.startswith(f'{AVATARS_URL_PREFIX}/'):
+        return f'{AVATARS_URL}/{path[len(AVATARS_URL_PREFIX) + 1:]}'
+    return path
+
+
+def avatar_variants(avatar: Optional[str]) -> dict[str, str]:
+    """
+    Функция возвращает адреса вариантов аватара разного размера.
+    Для аватаров, сохраненных одним файлом (например, стандартного), все варианты указывают на этот файл.
+    :param avatar: значение User.avatar
+    :return: словарь {название варианта: адрес}
+    """
+    if not avatar:
+        return {}
+    if os.path.splitext(avatar)[1]:
+        return {variant: avatar_url(avatar) for variant in AVATAR_VARIANTS}
+    return {variant: avatar_url(f'{avatar}_{variant}.{AVATAR_FORMAT}') for variant in AVATAR_VARIANTS}
+
+
+def avatar_file(name: str) -> Optional[Path]:
+    """
+    Функция для поиска файла аватара по имени. Имена с подкаталогами и ссылки за пределы папки аватаров не принимаются.
+    :param name: имя файла из адреса запроса
+    :return: путь к файлу или None, если файла нет или имя недопустимо
+    """
+    if not AVATAR_FILE_NAME.fullmatch(name):
+        return None
+    path = (PROJECT_ROOT / name).resolve()
+    if path.parent != PROJECT_ROOT.resolve() or not path.is_file():
+        return None
+    return path
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    """Функция считает sha256 файла; время изменения и размер входят в ключ кеша, чтобы измененный файл пересчитывался"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _avatar_headers(path: Path) -> tuple[dict[str, str], os.stat_result]:
+    """Синхронная часть avatar_headers: stat и sha256 файла (чтение с диска)"""
+    stat = path.stat()
+    headers = {
+        'etag': f'"{_file_digest(str(path), stat.st_mtime_ns, stat.st_size)}"',
+        'cache-control': IMMUTABLE_CACHE_CONTROL if CONTENT_ADDRESSED_NAME.fullmatch(path.name)
+        else REVALIDATE_CACHE_CONTROL,
+    }
+    return headers, stat
+
+
+async def avatar_headers(path: Path) -> tuple[dict[str, str], os.stat_result]:
+    """
+    Асинхронная функция для получения заголовков кеширования файла аватара.
+    Первый расчет sha256 файла читает его целиком, поэтому выполняется в потоке, а не в event loop
+    :param path: путь к файлу
+    :return: кортеж (заголовки ETag и Cache-Control, результат stat файла)
+    """
+    return await asyncio.to_thread(_avatar_headers, path)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Функция проверяет заголовок If-None-Match (слабое сравнение, как требует RFC 9110)
+    :param if_none_match: значение заголовка
+    :param etag: текущий ETag файла
+    :return: True, если у клиента актуальная версия файла
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+async def read_limited(upload: UploadFile, max_bytes: int) -> bytes:
+    """
+    Функция читает загруженный файл частями и прерывает чтение при превышении лимита
+    :param upload: загруженный файл
+    :param max_bytes: максимальный размер в байтах
+    :return: содержимое файла
+    """
+    buffer = bytearray()
+    while chunk := await upload.read(READ_CHUNK_SIZE):
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise AvatarTooLarge(f'Размер аватара превышает {max_bytes // (1024 * 1024)} МБ')
+    return bytes(buffer)
+
+
+def _save_atomic(image: Image.Image, path: str) -> None:
+    """Функция сохраняет изображение во временный файл и переименовывает его, чтобы не отдать недописанный файл"""
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    image.save(tmp_path, format=AVATAR_FORMAT, quality=80, method=4)
+    os.replace(tmp_path, path)
+
+
+def process_avatar(data: bytes, max_pixels: int) -> str:
+    """
+    Функция проверяет изображение, накладывает водяной знак и сохраняет варианты аватара в WebP.
+    Имена файлов строятся по sha256 содержимого, поэтому одинаковые изображения обрабатываются один раз.
+    Выполняется в пуле image_executor.
+    :param data: содержимое загруженного изображения
+    :param max_pixels: максимальное количество пикселей исходного изображения
+    :return: значение для User.avatar (путь без суффикса варианта)
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    avatar = f'{AVATARS_URL_PREFIX}/{digest}'
+    paths = {variant: str(PROJECT_ROOT / f'{digest}_{variant}.{AVATAR_FORMAT}') for variant in AVATAR_VARIANTS}
+    if all(os.path.exists(path) for path in paths.values()):
+        return avatar
+
+    try:
+        image = Image.open(BytesIO(data))
+    except Image.DecompressionBombError as e:
+        raise AvatarTooLarge('Разрешение аватара слишком большое') from e
+    except IMAGE_DECODE_ERRORS as e:
+        raise AvatarRejected('Файл аватара не является изображением') from e
+
+    with image:
+        # размер известен из заголовка, пиксели еще не декодированы
+        if image.width * image.height > max_pixels:
+            raise AvatarTooLarge('Разрешение аватара слишком большое')
+
+        full_size = AVATAR_VARIANTS['full']
+        try:
+            if image.format == 'JPEG':
+                # JPEG декодируется сразу в уменьшенном масштабе (1/2, 1/4, 1/8), если это возможно
+                image.draft('RGB', (full_size, full_size))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        except Image.DecompressionBombError as e:
+            raise AvatarTooLarge('Разрешение аватара слишком большое') from e
+        except IMAGE_DECODE_ERRORS as e:
+            raise AvatarRejected('Файл аватара поврежден') from e
+
+    image.thumbnail((full_size, full_size), Image.LANCZOS)
+    apply_watermark(image)
+
+    for variant, size in sorted(AVATAR_VARIANTS.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+        _save_atomic(image, paths[variant])
+    return avatar
+
+
+@timed('ingest_avatar')
+async def ingest_avatar_bytes(data: bytes) -> str:
+    """
+    Асинхронная функция обработки аватара в пуле image_executor (например, при импорте пользователей)
+    :param data: содержимое изображения
+    :return: значение для User.avatar
+    """
+    if len(data) > settings.AVATAR_MAX_BYTES:
+        raise AvatarTooLarge(f'Размер аватара превышает {settings.AVATAR_MAX_BYTES // (1024 * 1024)} МБ')
+    return await image_executor.run(process_avatar, data, settings.AVATAR_MAX_PIXELS)
+
+
+async def ingest_avatar(upload: UploadFile) -> str:
+    """
+    Асинхронная функция приема аватара: ограниченное чтение файла и обработка в пуле image_executor
+    :param upload: загруженный файл
+    :return: значение для User.avatar
+    """
+    return await ingest_avatar_bytes(await read_limited(upload, settings.AVATAR_MAX_BYTES))
@@ -0,0 +1,65 @@
+from utils.utils_import.cache_import import *
+
+
+class TTLCache:
+    """
+    Кэш в памяти процесса с ограничением по времени жизни записей (TTL) и по размеру (вытеснение LRU).
+    Считает попадания и промахи. Операции защищены блокировкой, поэтому кэш можно использовать
+    и из потоков пула (синхронные зависимости FastAPI), и из цикла событий.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Функция для получения значения из кэша
+        :param key: ключ
+        :param default: значение, которое возвращается при промахе
+        :return: значение из кэша или default, если записи нет или она устарела
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Функция для записи значения в кэш
+        :param key: ключ
+        :param value: значение
+        :param ttl: время жизни записи в секундах, по умолчанию ttl кэша
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Функция для удаления записи из кэша"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Функция для очистки кэша"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        """Функция возвращает счетчики попаданий и промахов и текущий размер кэша"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
@@ -0,0 +1,85 @@
+from utils.utils_import.executor_import import *
+
+
+class ExecutorUnavailable(Exception):
+    """Исключение, если пул не может выполнить задачу сейчас (запрос можно повторить позже)"""
+
+
+class ExecutorOverloaded(ExecutorUnavailable):
+    """Исключение, если очередь задач пула переполнена"""
+
+
+class ExecutorBroken(ExecutorUnavailable):
+    """Исключение, если процесс пула аварийно завершился во время выполнения задачи"""
+
+
+class BoundedExecutor:
+    """
+    Пул потоков или процессов с ограниченной очередью для выполнения блокирующих задач вне event loop.
+    Пул создается при первом обращении. Если задач в работе и в очереди больше, чем workers + queue_size,
+    новая задача не ставится в очередь, а выбрасывается ExecutorOverloaded.
+    Если процесс пула аварийно завершился (например, убит из-за нехватки памяти), пул процессов
+    становится непригодным для всех задач; такой пул заменяется новым, а задачи, выполнявшиеся в нем,
+    завершаются ExecutorBroken без повтора (задача могла сама вызвать падение).
+    """
+
+    def __init__(self, name: str, kind: str, workers: int, queue_size: int,
+                 initializer: Optional[Callable] = None, initargs: tuple = ()):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f'Неизвестный тип пула: {kind}')
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[Executor] = None
+        # количество задач в работе и в очереди
+        self.pending = 0
+
+    @property
+    def executor(self) -> Executor:
+        """Пул, создается при первом обращении"""
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer,
+                                                     initargs=self.initargs)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name,
+                                                    initializer=self.initializer, initargs=self.initargs)
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Функция для выполнения блокирующей функции в пуле
+        :param func: функция (для пула процессов должна быть доступна для pickle)
+        :param args: позиционные аргументы функции
+        :param kwargs: именованные аргументы функции
+        :return: результат функции
+        """
+        if self.pending >= self.workers + self.queue_size:
+            raise ExecutorOverloaded(f'Очередь пула {self.name} переполнена')
+
+        self.pending += 1
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+        except BrokenExecutor as e:
+            self._replace_broken(executor)
+            raise ExecutorBroken(f'Пул {self.name} аварийно остановлен') from e
+        finally:
+            self.pending -= 1
+
+    def _replace_broken(self, executor: Executor) -> None:
+        """Функция сбрасывает непригодный пул, следующая задача создаст новый"""
+        # несколько задач получают ошибку одного пула, заменить его нужно один раз
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Функция для остановки пула"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
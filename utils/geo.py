@@ -1,29 +1,15 @@
 from utils.utils_import.geo_import import *
 
 
+@timed('get_geo')
 async def get_geo(location: str) -> dict:
     """
     Асинхронная функция для получения координат широты и долготы по заданному адресу.
+    Результаты кэшируются, одновременные запросы одного адреса объединяются (см. utils.geocoding).
     :param location: адрес в виде строки
     :return: возвращает словарь с широтой и долготой
     """
-    async with httpx.AsyncClient() as client:
-        # Выполняем асинхронный запрос к Nominatim
-        response = await client.get("https://nominatim.openstreetmap.org/search", params={
-            'q': location,
-            'format': 'json'
-        })
-        response.raise_for_status()  # Проверка на ошибки
-
-        locations = response.json()
-
-        if not locations:
-            return {'latitude': None, 'longitude': None}
-
-        # Извлекаем координаты
-        point = Point(float(locations[0]['lon']), float(locations[0]['lat']))
-
-        return {'latitude': point.y, 'longitude': point.x}
+    return await geocoder.geocode(location)
 
 
 async def great_circle_distance(latlong_a: Union[list, tuple] , latlong_b: Union[list, tuple]) -> float|int:
@@ -49,3 +35,90 @@ async def great_circle_distance(latlong_a: Union[list, tuple] , latlong_b: Union
     # Итоговое расстояние с учетом окружности Земли
     d = EARTH_CIRCUMFERENCE * c
     return d
+
+
+def great_circle_distance_batch(latlong_origin: Union[list, tuple],
+                                coordinates: Sequence[Sequence[Optional[float]]],
+                                radius: Optional[float] = None) -> tuple:
+    """
+    Функция для вычисления расстояния по великой окружности от одной точки до массива точек за один вызов.
+    При наличии numpy вычисление векторизовано, иначе используется реализация на чистом python.
+    Точки с неизвестными координатами (None) получают расстояние nan и не попадают в радиус.
+    :param latlong_origin: Кортеж или список с широтой и долготой исходной точки (lat, lon)
+    :param coordinates: последовательность пар (lat, lon) или массив numpy формы (n, 2)
+    :param radius: радиус в метрах, если передан, то дополнительно вычисляется маска попадания в радиус
+    :return: кортеж (расстояния в метрах, маска расстояние < radius или None)
+    """
+    if np is not None:
+        return _great_circle_distance_numpy(latlong_origin, coordinates, radius)
+    return _great_circle_distance_python(latlong_origin, coordinates, radius)
+
+
+def _great_circle_distance_numpy(latlong_origin, coordinates, radius):
+    """Векторизованная реализация haversine на numpy"""
+    lat1, lon1 = np.radians(latlong_origin[0]), np.radians(latlong_origin[1])
+    points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    lat2 = np.radians(points[:, 0])
+    lon2 = np.radians(points[:, 1])
+
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    distances = EARTH_CIRCUMFERENCE * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    mask = distances < radius if radius is not None else None
+    return distances, mask
+
+
+def _great_circle_distance_python(latlong_origin, coordinates, radius):
+    """Реализация haversine на чистом python для окружения без numpy"""
+    lat1 = math.radians(latlong_origin[0])
+    lon1 = math.radians(latlong_origin[1])
+    cos_lat1 = math.cos(lat1)
+
+    distances = []
+    for lat, lon in coordinates:
+        if lat is None or lon is None:
+            distances.append(math.nan)
+            continue
+        lat2 = math.radians(lat)
+        a = (math.sin((lat2 - lat1) / 2) ** 2 +
+             cos_lat1 * math.cos(lat2) * math.sin((math.radians(lon) - lon1) / 2) ** 2)
+        distances.append(EARTH_CIRCUMFERENCE * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
+
+    mask = [d < radius for d in distances] if radius is not None else None
+    return distances, mask
+
+
+def bounding_box(latitude: float, longitude: float, distance: float) -> tuple[float, float, list[tuple[float, float]]]:
+    """
+    Функция для вычисления прямоугольника широт и долгот, в который гарантированно попадает круг
+    радиусом distance вокруг точки. Используется для предварительной фильтрации пользователей в БД по индексу.
+    :param latitude: широта центра
+    :param longitude: долгота центра
+    :param distance: радиус в метрах
+    :return: минимальная и максимальная широта и список диапазонов долготы
+    (два диапазона, если прямоугольник пересекает 180-й меридиан)
+    """
+    delta_lat = math.degrees(distance / EARTH_CIRCUMFERENCE)
+    min_lat = latitude - delta_lat
+    max_lat = latitude + delta_lat
+
+    # Если круг захватывает полюс, то подходит любая долгота
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    # Ширина градуса долготы уменьшается к полюсам, поэтому берем самую дальнюю от экватора широту
+    max_abs_lat = max(abs(min_lat), abs(max_lat))
+    delta_lon = math.degrees(distance / (EARTH_CIRCUMFERENCE * math.cos(math.radians(max_abs_lat))))
+    if delta_lon >= 180:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+
+    min_lon = longitude - delta_lon
+    max_lon = longitude + delta_lon
+
+    # Обработка пересечения 180-го меридиана
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
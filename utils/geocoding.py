@@ -0,0 +1,237 @@
+from utils.utils_import.geocoding_import import *
+
+
+def normalize_address(address: str) -> str:
+    """
+    Функция для приведения адреса к единому виду, используется как ключ кэша.
+    Регистр, лишние пробелы и пробелы вокруг знаков препинания не влияют на результат.
+    :param address: адрес в виде строки
+    :return: нормализованный адрес
+    """
+    address = address.lower().replace('ё', 'е')
+    address = re.sub(r'\s*([,.;])\s*', r'\1 ', address)
+    return re.sub(r'\s+', ' ', address).strip(' ,.;')
+
+
+class GeoProvider(Protocol):
+    """Интерфейс поставщика координат по адресу"""
+
+    async def geocode(self, address: str) -> dict: ...
+
+    async def close(self) -> None: ...
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов: не больше rate запросов в секунду"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Функция ожидает, пока можно будет выполнить следующий запрос"""
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval
+
+
+class NominatimProvider:
+    """Поставщик координат через Nominatim с общим долгоживущим HTTP-клиентом"""
+
+    def __init__(self, rate: float, user_agent: str):
+        self.rate_limiter = RateLimiter(rate)
+        self.user_agent = user_agent
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP-клиент с пулом соединений, создается при первом обращении"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': self.user_agent},
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._client
+
+    async def geocode(self, address: str) -> dict:
+        """
+        Функция для получения координат адреса в Nominatim
+        :param address: адрес в виде строки
+        :return: словарь с широтой и долготой
+        """
+        await self.rate_limiter.wait()
+        response = await self.client.get(NOMINATIM_URL, params={'q': address, 'format': 'json'})
+        response.raise_for_status()  # Проверка на ошибки
+
+        locations = response.json()
+        if not locations:
+            return dict(EMPTY_RESULT)
+
+        # Извлекаем координаты
+        point = Point(float(locations[0]['lon']), float(locations[0]['lat']))
+        return {'latitude': point.y, 'longitude': point.x}
+
+    async def close(self) -> None:
+        """Функция закрывает HTTP-клиент"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class OfflineProvider:
+    """
+    Поставщик координат без сети для тестов и локального запуска.
+    Координаты берутся из словаря {адрес: [широта, долгота]}, ключи нормализуются.
+    """
+
+    def __init__(self, addresses: Optional[dict] = None):
+        self.addresses = {normalize_address(key): value for key, value in (addresses or {}).items()}
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> 'OfflineProvider':
+        """Функция создает поставщика из JSON-файла с адресами"""
+        if not path:
+            return cls()
+        return cls(json.loads(Path(path).read_text(encoding='utf-8')))
+
+    async def geocode(self, address: str) -> dict:
+        point = self.addresses.get(normalize_address(address))
+        if point is None:
+            return dict(EMPTY_RESULT)
+        return {'latitude': point[0], 'longitude': point[1]}
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteGeoStore:
+    """Постоянное хранилище найденных координат в локальном файле SQLite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS geocode (address TEXT PRIMARY KEY, latitude REAL, longitude REAL)"
+            )
+        return self._connection
+
+    def _get(self, address: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT latitude, longitude FROM geocode WHERE address = ?", (address,)
+            ).fetchone()
+        return {'latitude': row[0], 'longitude': row[1]} if row else None
+
+    def _set(self, address: str, point: dict) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?)",
+                               (address, point['latitude'], point['longitude']))
+            connection.commit()
+
+    async def get(self, address: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get, address)
+
+    async def set(self, address: str, point: dict) -> None:
+        await asyncio.to_thread(self._set, address, point)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class Geocoder:
+    """
+    Сервис получения координат по адресу.
+    Порядок поиска: кэш в памяти (LRU) -> SQLite -> поставщик. Одновременные запросы
+    одного и того же адреса объединяются в один запрос к поставщику.
+    """
+
+    def __init__(self, provider: GeoProvider, store: Optional[SQLiteGeoStore], cache_size: int):
+        self.provider = provider
+        self.store = store
+        # адрес не появится на карте сам по себе, поэтому записи в памяти живут сутки
+        self.cache = TTLCache(maxsize=cache_size, ttl=24 * 60 * 60)
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def geocode(self, address: str) -> dict:
+        """
+        Функция для получения координат адреса
+        :param address: адрес в виде строки
+        :return: словарь с широтой и долготой
+        """
+        key = normalize_address(address)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        # запрос этого адреса уже выполняется, ждем его результат
+        while key in self._in_flight:
+            in_flight = self._in_flight[key]
+            try:
+                return dict(await asyncio.shield(in_flight))
+            except asyncio.CancelledError:
+                # отменен этот запрос, а не тот, результат которого ожидался
+                if not in_flight.cancelled():
+                    raise
+                # первый запрос отменен до результата, адрес ищется заново
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            point = await self._lookup(key, address)
+            future.set_result(point)
+        except Exception as e:
+            future.set_exception(e)
+            # исключение получат ожидающие запросы, здесь оно пробрасывается дальше
+            future.exception()
+            raise
+        except BaseException:
+            # первый запрос отменен (клиент отключился, остановка приложения): ожидающие запросы
+            # не должны зависнуть на future, они повторяют поиск сами
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+        return dict(point)
+
+    async def _lookup(self, key: str, address: str) -> dict:
+        point = await self.store.get(key) if self.store is not None else None
+        if point is None:
+            point = await self.provider.geocode(address)
+            # ненайденные адреса в постоянное хранилище не записываются
+            if self.store is not None and point['latitude'] is not None:
+                await self.store.set(key, point)
+        self.cache.set(key, point)
+        return point
+
+    async def close(self) -> None:
+        """Функция освобождает HTTP-клиент и соединение с SQLite"""
+        await self.provider.close()
+        if self.store is not None:
+            self.store.close()
+
+
+def create_geocoder() -> Geocoder:
+    """Функция создает сервис координат по настройкам приложения"""
+    if settings.GEOCODER_PROVIDER == 'offline':
+        provider = OfflineProvider.from_file(settings.GEOCODER_OFFLINE_PATH)
+    else:
+        provider = NominatimProvider(rate=settings.GEOCODER_RATE_LIMIT, user_agent=settings.GEOCODER_USER_AGENT)
+    store = SQLiteGeoStore(settings.GEOCODER_CACHE_PATH) if settings.GEOCODER_CACHE_PATH else None
+    return Geocoder(provider=provider, store=store, cache_size=settings.GEOCODER_CACHE_SIZE)
+
+
+# объявление переменной для обращения к сервису координат
+geocoder = create_geocoder()
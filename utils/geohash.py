@@ -0,0 +1,139 @@
+from utils.utils_import.geohash_import import *
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Функция для кодирования координат в строку geohash.
+    :param latitude: широта точки
+    :param longitude: долгота точки
+    :param precision: длина geohash (чем длиннее, тем меньше ячейка)
+    :return: строка geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    result = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(result) < precision:
+        # четные биты кодируют долготу, нечетные широту
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            result.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(result)
+
+
+def decode_bbox(geohash: str) -> tuple[float, float, float, float]:
+    """
+    Функция для получения границ ячейки geohash.
+    :param geohash: строка geohash
+    :return: кортеж (минимальная широта, максимальная широта, минимальная долгота, максимальная долгота)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        bits = BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if (bits >> shift) & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            even = not even
+
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def neighbours(geohash: str) -> list[str]:
+    """
+    Функция для получения соседних ячеек geohash той же точности (до 8 ячеек, у полюсов меньше).
+    :param geohash: строка geohash
+    :return: список соседних ячеек
+    """
+    min_lat, max_lat, min_lon, max_lon = decode_bbox(geohash)
+    height = max_lat - min_lat
+    width = max_lon - min_lon
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+
+    result = []
+    for d_lat in (-1, 0, 1):
+        lat = center_lat + d_lat * height
+        if not -90 < lat < 90:
+            continue
+        for d_lon in (-1, 0, 1):
+            if d_lat == 0 and d_lon == 0:
+                continue
+            # долгота переходит через 180-й меридиан
+            lon = (center_lon + d_lon * width + 180) % 360 - 180
+            cell = encode(lat, lon, len(geohash))
+            if cell not in result:
+                result.append(cell)
+    return result
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """
+    Функция для получения размеров ячейки geohash в градусах.
+    :param precision: длина geohash
+    :return: кортеж (высота по широте, ширина по долготе)
+    """
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+
+
+def precision_for_radius(latitude: float, radius: float, max_precision: int = GEOHASH_PRECISION) -> Optional[int]:
+    """
+    Функция для выбора максимальной точности geohash, при которой круг радиусом radius
+    целиком покрывается ячейкой точки и ее соседями.
+    :param latitude: широта центра круга
+    :param radius: радиус в метрах
+    :param max_precision: максимальная допустимая точность
+    :return: точность geohash или None, если радиус слишком большой (или круг захватывает полюс)
+    """
+    radius_deg = math.degrees(radius / EARTH_CIRCUMFERENCE)
+    farthest_lat = abs(latitude) + radius_deg
+    if farthest_lat >= 90:
+        return None
+    lon_scale = math.cos(math.radians(farthest_lat))
+
+    for precision in range(max_precision, 0, -1):
+        height, width = cell_size(precision)
+        if height >= radius_deg and width * lon_scale >= radius_deg:
+            return precision
+    return None
+
+
+def cells_for_radius(latitude: float, longitude: float, radius: float,
+                     max_precision: int = GEOHASH_PRECISION) -> Optional[list[str]]:
+    """
+    Функция для получения набора ячеек geohash, которые покрывают круг радиусом radius.
+    :param latitude: широта центра круга
+    :param longitude: долгота центра круга
+    :param radius: радиус в метрах
+    :param max_precision: максимальная допустимая точность ячеек
+    :return: ячейка центра и ее соседи либо None, если подходящей точности нет
+    """
+    precision = precision_for_radius(latitude, radius, max_precision)
+    if precision is None:
+        return None
+    center = encode(latitude, longitude, precision)
+    return [center, *neighbours(center)]
@@ -1,15 +1,55 @@
 from utils.utils_import.watermark_import import *
 
-async def watermark_photo(input_image: UploadFile, output_image_name: str):
-    loop = asyncio.get_running_loop()
-    output_image_path = PROJECT_ROOT / output_image_name
+# водяной знак, декодируется один раз в каждом процессе (потоке) пула
+_watermark: Optional[Image.Image] = None
 
-    with ThreadPoolExecutor() as pool:
-        base_image = Image.open(input_image.file)
-        watermark = await loop.run_in_executor(pool, Image.open, watermark_image_path)
 
-        # Наложение водяного знака и сохранение
-        base_image.paste(watermark, (0, 0), watermark)
-        await loop.run_in_executor(pool, base_image.save, PROJECT_ROOT / output_image_path)
+def _load_watermark(path: str) -> None:
+    """Функция загружает водяной знак в память, используется как initializer пула"""
+    global _watermark
+    with Image.open(path) as image:
+        _watermark = image.convert('RGBA')
+    _watermark_for_size.cache_clear()
+
+
+@lru_cache(maxsize=64)
+def _watermark_for_size(width: int, height: int) -> Image.Image:
+    """
+    Функция возвращает водяной знак, обрезанный под размер изображения
+    (результат такой же, как при вставке полного знака в угол меньшего изображения)
+    """
+    if _watermark is None:
+        _load_watermark(str(watermark_image_path))
+    if width >= _watermark.width and height >= _watermark.height:
+        return _watermark
+    return _watermark.crop((0, 0, min(width, _watermark.width), min(height, _watermark.height)))
+
+
+def apply_watermark(image: Image.Image) -> None:
+    """
+    Функция накладывает водяной знак в левый верхний угол изображения
+    :param image: изображение, изменяется на месте
+    """
+    watermark = _watermark_for_size(*image.size)
+    image.paste(watermark, (0, 0), watermark)
+
+
+def _warm_up() -> bool:
+    """Функция для запуска процесса пула и загрузки водяного знака заранее"""
+    _watermark_for_size(1, 1)
+    return True
+
+
+# общий пул для обработки изображений
+image_executor = BoundedExecutor(name='image',
+                                 kind=settings.IMAGE_POOL_KIND,
+                                 workers=settings.IMAGE_POOL_WORKERS,
+                                 queue_size=settings.IMAGE_QUEUE_SIZE,
+                                 initializer=_load_watermark,
+                                 initargs=(str(watermark_image_path),))
+
+
+async def start_image_service() -> None:
+    """Функция запускает процессы пула обработки изображений при старте приложения"""
+    await asyncio.gather(*(image_executor.run(_warm_up) for _ in range(image_executor.workers)))
 
-    return str(output_image_path)
\ No newline at end of file
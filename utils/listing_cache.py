@@ -0,0 +1,157 @@
+from utils.utils_import.listing_cache_import import *
+
+
+class ListingCacheBackend(Protocol):
+    """Хранилище кэша списков пользователей"""
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Функция возвращает значение по ключу или None"""
+
+    async def set(self, key: str, value: Any) -> None:
+        """Функция сохраняет значение на время TTL"""
+
+    async def generation(self) -> int:
+        """Функция возвращает текущее поколение кэша (входит в ключи записей)"""
+
+    async def bump_generation(self) -> int:
+        """Функция увеличивает поколение кэша, после чего все прежние записи не используются"""
+
+
+class InMemoryListingBackend:
+    """Кэш в памяти процесса: TTL и ограничение количества записей с вытеснением LRU"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def bump_generation(self) -> int:
+        self._generation += 1
+        # записи прежних поколений больше не читаются, память освобождается сразу
+        self._cache.clear()
+        return self._generation
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+def _encode_value(value: Any) -> Any:
+    """Функция преобразования типов для JSON (даты кодируются так же, как в курсорах пагинации)"""
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    raise TypeError(f'Тип {type(value).__name__} не сериализуется в JSON')
+
+
+def _decode_value(value: dict) -> Any:
+    return datetime.fromisoformat(value['dt']) if value.keys() == {'dt'} else value
+
+
+class RedisListingBackend:
+    """
+    Общий кэш для нескольких процессов в Redis (или FakeRedis для memory://).
+    Значения хранятся в JSON с TTL; ограничение размера обеспечивает политика вытеснения Redis (maxmemory-policy).
+    Поколение хранится в Redis, поэтому сброс кэша виден всем процессам.
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = 'listing:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw, object_hook=_decode_value)
+
+    async def set(self, key: str, value: Any) -> None:
+        raw = json.dumps(value, separators=(',', ':'), default=_encode_value)
+        await self.client.set(self.prefix + key, raw.encode(), ex=max(1, int(self.ttl)))
+
+    async def generation(self) -> int:
+        raw = await self.client.get(self.prefix + 'generation')
+        return int(raw) if raw is not None else 0
+
+    async def bump_generation(self) -> int:
+        return await self.client.incr(self.prefix + 'generation')
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class ListingCache:
+    """
+    Кэш результатов запросов списка пользователей. Ключ строится из нормализованных параметров запроса
+    и текущего поколения; сброс (invalidate) увеличивает поколение.
+    """
+
+    def __init__(self, backend: Optional[ListingCacheBackend]):
+        self.backend = backend
+
+    @staticmethod
+    def make_key(kind: str, **params) -> str:
+        """
+        Функция для построения ключа: пустые параметры отбрасываются, порядок не влияет на ключ
+        :param kind: вид запроса (например, date)
+        :param params: параметры запроса
+        :return: ключ кэша
+        """
+        normalized = {name: value for name, value in params.items() if value not in (None, '', [], ())}
+        return f'{kind}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"))}'
+
+    async def get(self, key: str) -> tuple[Optional[Any], int]:
+        """
+        Функция для поиска значения в текущем поколении
+        :param key: ключ из make_key
+        :return: кортеж (значение или None при промахе или выключенном кэше, поколение, в котором шел поиск).
+        Значение, прочитанное из БД после промаха, сохраняется через set с этим же поколением: если за это время
+        кэш был сброшен, запись попадет в прежнее поколение и не будет прочитана
+        """
+        if self.backend is None:
+            return None, 0
+        generation = await self.backend.generation()
+        return await self.backend.get(f'{generation}:{key}'), generation
+
+    async def set(self, key: str, value: Any, generation: int) -> None:
+        """
+        Функция сохраняет значение для ключа
+        :param key: ключ из make_key
+        :param value: значение
+        :param generation: поколение, полученное из get перед чтением значения из БД
+        """
+        if self.backend is not None:
+            await self.backend.set(f'{generation}:{key}', value)
+
+    async def invalidate(self) -> None:
+        """Функция сбрасывает все записи кэша, вызывается после добавления пользователей"""
+        if self.backend is not None:
+            await self.backend.bump_generation()
+
+    def stats(self) -> dict[str, int]:
+        """Функция возвращает счетчики попаданий и промахов"""
+        return self.backend.stats() if self.backend is not None else {}
+
+
+def create_listing_cache() -> ListingCache:
+    """Функция создает кэш списков по настройке LISTING_CACHE_BACKEND (memory, redis или off)"""
+    if settings.LISTING_CACHE_BACKEND == 'off':
+        return ListingCache(None)
+    if settings.LISTING_CACHE_BACKEND == 'redis':
+        return ListingCache(RedisListingBackend(get_redis(), ttl=settings.LISTING_CACHE_TTL))
+    return ListingCache(InMemoryListingBackend(maxsize=settings.LISTING_CACHE_SIZE, ttl=settings.LISTING_CACHE_TTL))
+
+
+# кэш списков пользователей
+listing_cache = create_listing_cache()
@@ -0,0 +1,246 @@
+from utils.utils_import.metrics_import import *
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Счетчик Prometheus с метками"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f'{self.name}{_format_labels(self.labels, key)} {value}'
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками (корзины, сумма и количество наблюдений)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # метки -> [количество по корзинам (не накопительное, последняя +Inf), сумма, количество]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, f'le="{bound}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labels, key)} {total}'
+            yield f'{self.name}_count{_format_labels(self.labels, key)} {count}'
+
+
+class Registry:
+    """Набор метрик и функций-сборщиков для вывода в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self.metrics: list = []
+        self.collectors: list[Callable[[], Iterable[tuple[str, str, str, float]]]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple[str, str, str, float]]]) -> None:
+        """
+        Функция добавляет сборщик значений, которые считаются в момент запроса /metrics
+        :param collector: функция, возвращающая кортежи (имя, описание, тип gauge/counter, значение)
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Функция формирует текст для /metrics"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        for collector in self.collectors:
+            for name, documentation, kind, value in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса', ('method', 'route', 'status')))
+http_request_db_queries = registry.register(Histogram(
+    'http_request_db_queries', 'Количество SQL-запросов на HTTP-запрос', ('route',), QUERY_COUNT_BUCKETS))
+http_request_db_seconds = registry.register(Histogram(
+    'http_request_db_seconds', 'Суммарное время SQL-запросов на HTTP-запрос', ('route',)))
+db_query_duration = registry.register(Histogram(
+    'db_query_duration_seconds', 'Время выполнения SQL-запроса', ('operation',)))
+span_duration = registry.register(Histogram(
+    'span_duration_seconds', 'Время выполнения операций: геокодирование, хеширование, аватары, письма', ('span',)))
+span_errors = registry.register(Counter(
+    'span_errors_total', 'Количество операций, завершившихся исключением', ('span',)))
+
+
+class RequestStats:
+    """Счетчики SQL-запросов текущего HTTP-запроса"""
+    __slots__ = ('queries', 'db_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+
+def timed(span: str):
+    """
+    Декоратор для измерения времени выполнения функции (обычной или асинхронной) в span_duration_seconds
+    :param span: название операции
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    span_errors.inc(span=span)
+                    raise
+                finally:
+                    span_duration.observe(time.perf_counter() - start, span=span)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                span_errors.inc(span=span)
+                raise
+            finally:
+                span_duration.observe(time.perf_counter() - start, span=span)
+        return wrapper
+
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+    db_query_duration.observe(elapsed, operation=operation)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    # журнал медленных запросов вместо echo: только текст запроса без параметров, с выборкой
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS and random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+        slow_query_logger.warning('Медленный запрос %.1f мс: %s', elapsed * 1000, ' '.join(statement.split()))
+
+
+def _handle_error(exception_context) -> None:
+    # при ошибке after_cursor_execute не вызывается, время начала убирается из стека
+    starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Функция подключает счетчики SQL-запросов к событиям асинхронного движка"""
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(sync_engine, 'handle_error', _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время обработки запроса по шаблону маршрута (не по пути, чтобы не плодить метки),
+    количество и время SQL-запросов, выполненных при обработке запроса.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        finished = False
+
+        def observe_latency():
+            route = scope.get('route')
+            http_request_duration.observe(time.perf_counter() - start, method=scope['method'],
+                                          route=getattr(route, 'path', 'unmatched'), status=status_code)
+
+        async def send_wrapper(message):
+            nonlocal status_code, finished
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+            # время ответа фиксируется после отправки тела, фоновые задачи в него не входят
+            if message['type'] == 'http.response.body' and not message.get('more_body', False) and not finished:
+                finished = True
+                observe_latency()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                observe_latency()
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            http_request_db_queries.observe(stats.queries, route=route)
+            http_request_db_seconds.observe(stats.db_seconds, route=route)
+            _request_stats.reset(token)
@@ -0,0 +1,146 @@
+"""
+Поиск пользователей по имени и фамилии: по префиксу и с опечатками (сходство по триграммам).
+Триграммы и сходство считаются так же, как в расширении pg_trgm: слово дополняется двумя пробелами
+в начале и одним в конце, сходство - доля общих триграмм от всех триграмм двух строк.
+В БД поиск идет по GIN-индексам pg_trgm (миграция a4c7e2d9b815), NameIndex - замена в памяти процесса
+для PostgreSQL без расширения pg_trgm. Другие СУБД не поддерживаются: остальные запросы DAO используют
+возможности PostgreSQL (INSERT ... ON CONFLICT и другие).
+"""
+from utils.utils_import.name_search_import import *
+
+# слова запроса: буквы и цифры, как в pg_trgm
+WORD_PATTERN = re.compile(r'[^\W_]+')
+# количество слов запроса, которые участвуют в поиске
+MAX_QUERY_WORDS = 3
+
+
+def normalize(text: str) -> str:
+    """Функция приводит имя к виду, по которому строятся индексы: нижний регистр, ё заменяется на е"""
+    return text.lower().replace('ё', 'е')
+
+
+def query_words(query: str) -> list[str]:
+    """
+    Функция разбивает строку поиска на слова
+    :param query: строка поиска (имя, фамилия или их начало)
+    :return: нормализованные слова без повторов
+    """
+    return list(dict.fromkeys(WORD_PATTERN.findall(normalize(query))))[:MAX_QUERY_WORDS]
+
+
+def trigrams(text: str) -> set[str]:
+    """Функция возвращает множество триграмм нормализованной строки"""
+    result = set()
+    for word in WORD_PATTERN.findall(text):
+        padded = f'  {word} '
+        result.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return result
+
+
+def similarity(first: set[str], second: set[str]) -> float:
+    """Функция возвращает сходство двух множеств триграмм (0 - нет общих, 1 - совпадают)"""
+    if not first or not second:
+        return 0.0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+class NameIndex:
+    """
+    Индекс имен и фамилий пользователей в памяти процесса: отсортированный список для поиска по префиксу
+    и триграмма -> id пользователей для поиска с опечатками.
+    Используется вместо pg_trgm, если расширение нельзя установить в PostgreSQL (NAME_INDEX_ENABLED).
+    Индекс видит только регистрации, прошедшие через текущий процесс, и заново строится при старте.
+    """
+
+    def __init__(self):
+        self.ready = False
+        # нормализованные имя и фамилия и их триграммы по id пользователя
+        self._names: dict[int, tuple[tuple[str, set[str]], ...]] = {}
+        self._trigrams: dict[str, set[int]] = {}
+        # отсортированные пары (имя или фамилия, id пользователя) для поиска по префиксу
+        self._sorted_names: list[tuple[str, int]] = []
+
+    def _index(self, user_id: int, first_name: str, last_name: str) -> list[tuple[str, int]]:
+        fields = tuple((name, trigrams(name)) for name in (normalize(first_name), normalize(last_name)))
+        self._names[user_id] = fields
+        for _, name_trigrams in fields:
+            for trigram in name_trigrams:
+                self._trigrams.setdefault(trigram, set()).add(user_id)
+        return [(name, user_id) for name, _ in fields]
+
+    def rebuild(self, rows: Iterable[tuple[int, str, str]]) -> None:
+        """
+        Функция для полного построения индекса
+        :param rows: тройки (id пользователя, имя, фамилия)
+        """
+        self._names, self._trigrams = {}, {}
+        sorted_names = []
+        for user_id, first_name, last_name in rows:
+            sorted_names.extend(self._index(user_id, first_name, last_name))
+        self._sorted_names = sorted(sorted_names)
+        self.ready = True
+
+    def add(self, user_id: int, first_name: str, last_name: str) -> None:
+        """
+        Функция для добавления пользователя в индекс
+        :param user_id: id пользователя
+        :param first_name: имя
+        :param last_name: фамилия
+        """
+        for item in self._index(user_id, first_name, last_name):
+            insort(self._sorted_names, item)
+
+    def _word_candidates(self, word: str, word_trigrams: set[str], threshold: float) -> set[int]:
+        """Функция отбирает пользователей, у которых имя или фамилия начинается со слова или похожа на него"""
+        # пары с таким префиксом идут в отсортированном списке подряд
+        result = set()
+        position = bisect_left(self._sorted_names, (word,))
+        while position < len(self._sorted_names) and self._sorted_names[position][0].startswith(word):
+            result.add(self._sorted_names[position][1])
+            position += 1
+
+        # сходство c / (|слово| + |имя| - c) не меньше threshold возможно, только если общих триграмм
+        # c >= threshold * (|слово| + |имя|) / (1 + threshold), а в непустом имени не меньше двух триграмм
+        counts = Counter()
+        for trigram in word_trigrams:
+            counts.update(self._trigrams.get(trigram, ()))
+        required = max(1, ceil(threshold * (len(word_trigrams) + 2) / (1 + threshold) - 1e-9))
+        result.update(user_id for user_id, common in counts.items() if common >= required)
+        return result
+
+    def search(self, words: list[str], threshold: float) -> Optional[list[tuple[float, int]]]:
+        """
+        Функция для поиска пользователей, у которых каждому слову соответствует имя или фамилия
+        (начинается со слова или сходство не меньше threshold)
+        :param words: слова из query_words
+        :param threshold: минимальное сходство для совпадения с опечатками
+        :return: пары (оценка, id) по убыванию оценки либо None, если индекс не готов.
+        Оценка - среднее по словам наибольшее сходство слова с именем или фамилией
+        """
+        if not self.ready:
+            return None
+        if not words:
+            return []
+
+        scores: Optional[dict[int, float]] = None
+        for word in words:
+            word_trigrams = trigrams(word)
+            candidates = self._word_candidates(word, word_trigrams, threshold)
+            if scores is not None:
+                candidates &= scores.keys()
+
+            word_scores = {}
+            for user_id in candidates:
+                fields = self._names[user_id]
+                score = max(similarity(word_trigrams, name_trigrams) for _, name_trigrams in fields)
+                if score >= threshold or any(name.startswith(word) for name, _ in fields):
+                    word_scores[user_id] = score + (scores[user_id] if scores is not None else 0.0)
+            scores = word_scores
+
+        return sorted(((score / len(words), user_id) for user_id, score in scores.items()),
+                      key=lambda item: (-item[0], item[1]))
+
+
+# объявление переменной для обращения к индексу процесса
+name_index = NameIndex()
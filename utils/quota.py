@@ -0,0 +1,126 @@
+from utils.utils_import.quota_import import *
+
+
+class QuotaExceeded(Exception):
+    """Исключение, если лимит действий за период исчерпан"""
+
+
+class CounterStore(Protocol):
+    """Интерфейс хранилища счетчиков для ограничения количества действий за период"""
+
+    async def hit(self, key: str, limit: int, window: int) -> Optional[Hashable]:
+        """
+        Атомарно учитывает действие, если за последние window секунд их было меньше limit
+        :return: метка учтенного действия для release либо None, если действие не разрешено
+        """
+        ...
+
+    async def release(self, key: str, hit: Hashable) -> None:
+        """
+        Отменяет учтенное действие (например, если оно не выполнилось)
+        :param key: ключ, переданный в hit
+        :param hit: метка, которую вернул hit
+        """
+        ...
+
+
+class InMemoryCounterStore:
+    """
+    Скользящее окно в памяти процесса: хранит время каждого действия.
+    Проверка и запись выполняются без переключения корутин, поэтому атомарны в пределах процесса.
+    Ключи без действий в своем окне удаляются: при обращении к ключу и обходом всех ключей
+    не чаще раза в SWEEP_INTERVAL секунд, поэтому память не растет с числом когда-либо активных пользователей.
+    """
+
+    # период обхода всех ключей для удаления устаревших окон, секунды
+    SWEEP_INTERVAL = 60
+
+    def __init__(self):
+        self._hits: dict[str, deque] = {}
+        # длина окна ключа для обхода устаревших окон
+        self._windows: dict[str, int] = {}
+        self._last_sweep = time.monotonic()
+
+    def _prune(self, key: str, now: float) -> Optional[deque]:
+        """Функция удаляет действия ключа вне окна и сам ключ, если действий не осталось"""
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        window = self._windows[key]
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if not hits:
+            del self._hits[key], self._windows[key]
+            return None
+        return hits
+
+    def _sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for key in list(self._hits):
+            self._prune(key, now)
+
+    async def hit(self, key: str, limit: int, window: int) -> Optional[float]:
+        now = time.monotonic()
+        self._sweep(now)
+        hits = self._prune(key, now)
+        if hits is None:
+            hits = self._hits[key] = deque()
+        self._windows[key] = window
+        if len(hits) >= limit:
+            return None
+        hits.append(now)
+        return now
+
+    async def release(self, key: str, hit: float) -> None:
+        hits = self._hits.get(key)
+        # действие могло уже выйти из окна и быть удалено
+        if hits and hit in hits:
+            hits.remove(hit)
+            if not hits:
+                del self._hits[key], self._windows[key]
+
+
+class RedisCounterStore:
+    """
+    Скользящее окно на Redis (или совместимом клиенте) для нескольких процессов.
+    Используется приближение двумя окнами фиксированной длины: счетчик предыдущего окна
+    учитывается с весом оставшейся доли. Увеличение счетчика атомарно (INCR), при превышении
+    лимита счетчик уменьшается обратно, поэтому лимит не может быть превышен одновременными запросами.
+    Метка действия - ключ окна, в котором оно учтено: отмена после смены окна уменьшает тот же счетчик.
+    """
+
+    def __init__(self, client, prefix: str = 'quota'):
+        self.client = client
+        self.prefix = prefix
+
+    def _keys(self, key: str, window: int, now: float) -> tuple[str, str, float]:
+        bucket = int(now // window)
+        elapsed = (now % window) / window
+        return f'{self.prefix}:{key}:{bucket}', f'{self.prefix}:{key}:{bucket - 1}', elapsed
+
+    async def hit(self, key: str, limit: int, window: int) -> Optional[str]:
+        current_key, previous_key, elapsed = self._keys(key, window, time.time())
+        current = await self.client.incr(current_key)
+        if current == 1:
+            await self.client.expire(current_key, window * 2)
+        previous = int(await self.client.get(previous_key) or 0)
+
+        if previous * (1 - elapsed) + current > limit:
+            await self.client.decr(current_key)
+            return None
+        return current_key
+
+    async def release(self, key: str, hit: str) -> None:
+        # если счетчик окна уже истек, DECR создаст его заново со значением -1 и без срока жизни:
+        # такой ключ удаляется (в истекшее окно новые действия не учитываются, удаление безопасно)
+        if await self.client.decr(hit) < 0:
+            await self.client.delete(hit)
+
+
+def create_counter_store() -> CounterStore:
+    """Функция создает хранилище счетчиков по настройке QUOTA_BACKEND (memory или redis)"""
+    if settings.QUOTA_BACKEND == 'redis':
+        return RedisCounterStore(get_redis())
+    return InMemoryCounterStore()
@@ -0,0 +1,79 @@
+from utils.utils_import.redis_import import *
+
+
+class FakeRedis:
+    """
+    Локальная замена Redis в памяти процесса для тестов и запуска без сервера.
+    Поддерживает только команды, которые использует приложение.
+    """
+
+    def __init__(self):
+        self._data: dict[str, Any] = {}
+        self._expires: dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        expire_at = self._expires.get(key)
+        if expire_at is not None and expire_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._data[key] if self._alive(key) else None
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        self._data[key] = value if isinstance(value, bytes) else str(value).encode()
+        self._expires.pop(key, None)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        return True
+
+    async def incrby(self, key: str, amount: int = 1) -> int:
+        value = int(self._data[key]) + amount if self._alive(key) else amount
+        self._data[key] = str(value).encode()
+        return value
+
+    async def incr(self, key: str) -> int:
+        return await self.incrby(key, 1)
+
+    async def decr(self, key: str) -> int:
+        return await self.incrby(key, -1)
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._alive(key):
+                del self._data[key]
+                self._expires.pop(key, None)
+                deleted += 1
+        return deleted
+
+    async def aclose(self) -> None:
+        pass
+
+
+_client = None
+
+
+def get_redis():
+    """
+    Функция возвращает общий клиент Redis по настройке REDIS_URL.
+    Для адреса вида memory:// возвращается FakeRedis, для остальных нужен пакет redis.
+    """
+    global _client
+    if _client is None:
+        if settings.REDIS_URL.startswith('memory://'):
+            _client = FakeRedis()
+        else:
+            try:
+                from redis.asyncio import Redis
+            except ImportError as e:
+                raise RuntimeError('Для REDIS_URL нужен пакет redis: pip install redis') from e
+            _client = Redis.from_url(settings.REDIS_URL)
+    return _client
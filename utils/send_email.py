@@ -1,9 +1,217 @@
 from utils.utils_import.se_import import *
 
 
+class SMTPSession:
+    """
+    Долгоживущее SMTP-соединение: подключение и авторизация выполняются один раз,
+    соединение переиспользуется для всех писем и переоткрывается при разрыве.
+    Методы блокирующие, вызываются из потока.
+    """
+
+    def __init__(self, host: str, port: int, user: Optional[str], password: Optional[str], use_ssl: bool):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=30)
+        if self.user and self.password:
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def _connection(self) -> smtplib.SMTP:
+        # после долгого простоя сервер мог закрыть соединение, проверяем его командой NOOP
+        if self._smtp is not None and time.monotonic() - self._last_used > EMAIL_IDLE_CHECK:
+            try:
+                self._smtp.noop()
+            except smtplib.SMTPException:
+                self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    @timed('send_email')
+    def send(self, message: EmailMessage) -> None:
+        """
+        Функция для отправки письма
+        :param message: письмо
+        """
+        try:
+            self._connection().send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            # SMTPException - подкласс OSError: ответ сервера с ошибкой (например, временной 4xx)
+            # повторяет очередь с задержкой, а не немедленно через новое соединение
+            if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                raise
+            # соединение разорвано, открываем новое и повторяем один раз
+            self.close()
+            self._connection().send_message(message)
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        """Функция закрывает соединение"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class EmailOutbox:
+    """
+    Очередь исходящих писем с фоновым обработчиком.
+    Обработчик забирает письма пачками, отправляет их через одно SMTP-соединение в отдельном потоке
+    и повторяет неудачные отправки с экспоненциальной задержкой.
+    """
+
+    def __init__(self, session: SMTPSession, queue_size: int, batch_size: int, max_retries: int,
+                 retry_delay: float):
+        self.session = session
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._worker: Optional[asyncio.Task] = None
+        # письма, ожидающие повторной отправки вне очереди
+        self._delayed = 0
+        # метрики
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self.send_seconds_total = 0.0
+        self.send_seconds_max = 0.0
+
+    async def enqueue(self, message: EmailMessage) -> None:
+        """
+        Функция для постановки письма в очередь. Не ждет места в очереди: при переполнении
+        письмо отбрасывается (с записью в журнал и счетчиком dropped), чтобы запрос не зависел от SMTP
+        :param message: письмо
+        """
+        try:
+            self.queue.put_nowait((message, 0))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error('Письмо для %s отброшено: очередь переполнена', message['To'])
+
+    def start(self) -> None:
+        """Функция запускает фоновый обработчик очереди"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Функция дожидается отправки писем из очереди (не дольше timeout секунд) и останавливает обработчик
+        :param timeout: время ожидания в секундах
+        """
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Не отправлено писем при остановке: %s', self.queue.qsize() + self._delayed)
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        await asyncio.to_thread(self.session.close)
+
+    async def _drain(self) -> None:
+        """Функция ждет, пока очередь опустеет и не останется писем, ожидающих повторной отправки"""
+        while True:
+            await self.queue.join()
+            if self._delayed == 0:
+                return
+            await asyncio.sleep(0.05)
+
+    def metrics(self) -> dict[str, float]:
+        """Функция возвращает размер очереди и метрики отправки"""
+        return {
+            'queue_depth': self.queue.qsize() + self._delayed,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'dropped': self.dropped,
+            'send_seconds_avg': self.send_seconds_total / self.sent if self.sent else 0.0,
+            'send_seconds_max': self.send_seconds_max,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._send_batch, batch, loop)
+            except Exception:
+                # непредвиденная ошибка не должна останавливать обработчик, иначе письма перестанут уходить
+                self.failed += len(batch)
+                logger.exception('Ошибка отправки пачки из %s писем', len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _send_batch(self, batch: list[tuple[EmailMessage, int]], loop: asyncio.AbstractEventLoop) -> None:
+        for message, attempt in batch:
+            start = time.perf_counter()
+            try:
+                self.session.send(message)
+            except (smtplib.SMTPException, OSError) as e:
+                self.session.close()
+                loop.call_soon_threadsafe(self._schedule_retry, message, attempt, e)
+                continue
+            except Exception:
+                # ошибка самого письма (например, кодирования): повтор не поможет, остальные письма пачки отправляются
+                self.failed += 1
+                logger.exception('Письмо для %s не отправлено', message['To'])
+                continue
+            elapsed = time.perf_counter() - start
+            self.sent += 1
+            self.send_seconds_total += elapsed
+            self.send_seconds_max = max(self.send_seconds_max, elapsed)
+
+    def _schedule_retry(self, message: EmailMessage, attempt: int, error: Exception) -> None:
+        if attempt + 1 >= self.max_retries:
+            self.failed += 1
+            logger.error('Письмо для %s не отправлено: %s', message['To'], error)
+            return
+        self.retries += 1
+        self._delayed += 1
+        delay = self.retry_delay * 2 ** attempt
+        asyncio.get_running_loop().call_later(delay, self._requeue, message, attempt + 1)
+
+    def _requeue(self, message: EmailMessage, attempt: int) -> None:
+        self._delayed -= 1
+        try:
+            self.queue.put_nowait((message, attempt))
+        except asyncio.QueueFull:
+            self.failed += 1
+            logger.error('Письмо для %s не отправлено: очередь переполнена', message['To'])
+
+
+# объявление переменной для обращения к очереди писем
+outbox = EmailOutbox(
+    session=SMTPSession(EMAIL_HOST, EMAIL_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD, EMAIL_USE_SSL),
+    queue_size=EMAIL_QUEUE_SIZE,
+    batch_size=EMAIL_BATCH_SIZE,
+    max_retries=EMAIL_MAX_RETRIES,
+    retry_delay=EMAIL_RETRY_DELAY,
+)
+
+
 async def send_email_notification(user1, user2):
     """
-    Асинхронная функция для отправки письма пользователям, если прохоит условие в роутере
+    Асинхронная функция для отправки письма пользователям, если прохоит условие в роутере.
+    Письма ставятся в очередь и отправляются в фоне.
     """
     await send_email(user1.email,f"Вы понравились {user2.first_name}! Почта участника: {user2.email}")
     await send_email(user2.email,f"Вы понравились {user1.first_name}! Почта участника: {user1.email}")
@@ -11,16 +219,14 @@ async def send_email_notification(user1, user2):
 
 async def send_email(to_email, message):
     """
-    Функция для отправки письма
+    Функция для постановки письма в очередь отправки
     :param to_email: адрес получеталя письма
     :param message: текст сообщения
     """
+    msg = EmailMessage()
     msg['Subject'] = 'Вам пришло оповещение'
     msg['From'] = EMAIL_ADDRESS
     msg['To'] = to_email
     msg.set_content(message)
 
-    with smtplib.SMTP_SSL(EMAIL_HOST, EMAIL_PORT) as smtp:
-        smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-        smtp.send_message(msg)
-
+    await outbox.enqueue(msg)
@@ -0,0 +1,81 @@
+from utils.utils_import.serialization_import import *
+
+_dumpers: dict = {}
+
+
+def _json_default(value: Any) -> Any:
+    """Функция преобразования типов, которые не поддерживает стандартный json"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f'Тип {type(value).__name__} не сериализуется в JSON')
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Функция кодирования в JSON: orjson, если установлен, иначе стандартный json
+    :param content: данные из dict, list, str, чисел, datetime и Enum
+    :return: JSON в байтах
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def view_dumper(view: type[BaseModel]) -> Callable[[Any], dict]:
+    """
+    Функция возвращает преобразователь объекта (строки проекции) в словарь по полям pydantic-схемы без валидации.
+    Вычисляемые поля (computed_field) считаются той же функцией, что и в схеме.
+    :param view: pydantic-схема
+    :return: функция object -> dict
+    """
+    if view not in _dumpers:
+        fields = tuple(view.model_fields)
+        computed = tuple((name, info.wrapped_property.fget) for name, info in view.model_computed_fields.items())
+
+        def dump(item) -> dict:
+            data = {name: getattr(item, name) for name in fields}
+            for name, getter in computed:
+                data[name] = getter(item)
+            return data
+
+        _dumpers[view] = dump
+    return _dumpers[view]
+
+
+def dump_views(items: Iterable, view: type[BaseModel]) -> list[dict]:
+    """Функция преобразует объекты в словари по полям pydantic-схемы"""
+    dump = view_dumper(view)
+    return [dump(item) for item in items]
+
+
+class FastJSONResponse(Response):
+    """Ответ JSON, закодированный orjson (или json), с gzip для больших ответов, если клиент его принимает"""
+    media_type = 'application/json'
+    # ответ зависит от Accept-Encoding (заголовок Vary) / ответ сжат gzip
+    _vary = False
+    _gzip = False
+
+    def __init__(self, content: Any, request: Optional[Request] = None, status_code: int = 200,
+                 headers: Optional[dict] = None):
+        self.request = request
+        super().__init__(content=content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        body = dumps(content)
+        min_size = settings.JSON_GZIP_MIN_SIZE
+        if self.request is None or not min_size or len(body) < min_size:
+            return body
+        self._vary = True
+        if 'gzip' not in self.request.headers.get('accept-encoding', ''):
+            return body
+        self._gzip = True
+        return gzip.compress(body, compresslevel=settings.JSON_GZIP_LEVEL)
+
+    def init_headers(self, headers=None) -> None:
+        super().init_headers(headers)
+        if self._vary:
+            self.raw_headers.append((b'vary', b'Accept-Encoding'))
+        if self._gzip:
+            self.raw_headers.append((b'content-encoding', b'gzip'))
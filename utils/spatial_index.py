@@ -0,0 +1,106 @@
+from utils.utils_import.spatial_index_import import *
+
+
+class SpatialIndex:
+    """
+    Индекс ячейка geohash -> id пользователей в памяти процесса.
+    Позволяет отвечать на запросы поиска по радиусу без сканирования таблицы пользователей.
+    Индекс строится при старте и заново из БД каждые SPATIAL_INDEX_REFRESH_SECONDS (start_refresh);
+    между перестроениями в нем есть только регистрации, прошедшие через текущий процесс, а пользователи,
+    добавленные другими процессами, импортом или BaseDAO.add_many, появляются после следующего перестроения.
+    Поэтому индекс выключен по умолчанию (SPATIAL_INDEX_ENABLED) и используется только для отбора кандидатов
+    ленты рекомендаций, где такая задержка допустима; страницы /api/list/ по расстоянию выбираются из БД.
+    """
+
+    def __init__(self, precision: int):
+        self.precision = precision
+        self.ready = False
+        self._cells: dict[str, set[int]] = {}
+        # отсортированный список ячеек для поиска по префиксу
+        self._sorted_cells: list[str] = []
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def rebuild(self, rows: Iterable[tuple[int, Optional[str]]]) -> None:
+        """
+        Функция для полного построения индекса
+        :param rows: пары (id пользователя, geohash)
+        """
+        cells: dict[str, set[int]] = {}
+        for user_id, geohash in rows:
+            if geohash:
+                cells.setdefault(geohash[:self.precision], set()).add(user_id)
+        self._cells = cells
+        self._sorted_cells = sorted(cells)
+        self.ready = True
+
+    def add(self, user_id: int, geohash: Optional[str]) -> None:
+        """
+        Функция для добавления пользователя в индекс
+        :param user_id: id пользователя
+        :param geohash: geohash координат пользователя
+        """
+        # до построения (индекс выключен) пользователи не накапливаются: индекс не используется,
+        # а при построении все равно заменяется данными из БД
+        if not self.ready or not geohash:
+            return
+        cell = geohash[:self.precision]
+        if cell not in self._cells:
+            self._cells[cell] = set()
+            insort(self._sorted_cells, cell)
+        self._cells[cell].add(user_id)
+
+    def start_refresh(self, load: Callable[[], Awaitable[Iterable[tuple[int, Optional[str]]]]],
+                      interval: float) -> None:
+        """
+        Функция запускает периодическое перестроение индекса в фоне
+        :param load: функция получения пар (id пользователя, geohash) из БД
+        :param interval: период перестроения в секундах, 0 - не перестраивать
+        """
+        if interval > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh(load, interval))
+
+    async def stop_refresh(self) -> None:
+        """Функция останавливает периодическое перестроение"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh(self, load, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.rebuild(await load())
+            except Exception:
+                # индекс остается прежним до следующей попытки
+                logger.exception('Не удалось перестроить индекс ячеек geohash')
+
+    def candidates(self, latitude: float, longitude: float, radius: float) -> Optional[set[int]]:
+        """
+        Функция для получения id пользователей из ячеек, покрывающих круг
+        :param latitude: широта центра
+        :param longitude: долгота центра
+        :param radius: радиус в метрах
+        :return: множество id кандидатов либо None, если индекс не готов или радиус слишком большой
+        """
+        if not self.ready:
+            return None
+        cells = cells_for_radius(latitude, longitude, radius, max_precision=self.precision)
+        if cells is None:
+            return None
+
+        result: set[int] = set()
+        for prefix in cells:
+            # ячейки индекса с таким префиксом идут в отсортированном списке подряд
+            position = bisect_left(self._sorted_cells, prefix)
+            while position < len(self._sorted_cells) and self._sorted_cells[position].startswith(prefix):
+                result |= self._cells[self._sorted_cells[position]]
+                position += 1
+        return result
+
+
+# объявление переменной для обращения к индексу процесса
+spatial_index = SpatialIndex(precision=settings.SPATIAL_INDEX_PRECISION)
@@ -0,0 +1,41 @@
+import asyncio
+import hashlib
+import os
+import re
+import struct
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+from PIL import (
+    Image,
+    ImageOps
+)
+
+from config import settings
+from utils.metrics import timed
+from utils.img_watermark import (
+    PROJECT_ROOT,
+    image_executor,
+    apply_watermark
+)
+
+# путь к аватарам, который сохраняется в User.avatar
+AVATARS_URL_PREFIX = 'users/avatars'
+# варианты аватара: название -> максимальная сторона в пикселях
+AVATAR_VARIANTS = {'thumb': 128, 'medium': 512, 'full': 1600}
+AVATAR_FORMAT = 'webp'
+# адрес эндпоинта, который отдает файлы аватаров
+AVATARS_URL = '/api/avatars'
+# допустимые имена файлов аватаров (без подкаталогов)
+AVATAR_FILE_NAME = re.compile(r'[\w@+-][\w@.+-]*\.(?:png|jpe?g|webp)')
+# имена вариантов, построенные по sha256 содержимого: содержимое файла никогда не меняется
+CONTENT_ADDRESSED_NAME = re.compile(r'[0-9a-f]{64}_[a-z]+\.webp')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+READ_CHUNK_SIZE = 64 * 1024
+# ошибки Pillow при разборе поврежденного файла: кроме OSError модули форматов выбрасывают ValueError
+# (например, недопустимые размеры TIFF), EOFError, struct.error и SyntaxError (ошибки структуры, в том числе EXIF)
+IMAGE_DECODE_ERRORS = (OSError, ValueError, EOFError, SyntaxError, struct.error)
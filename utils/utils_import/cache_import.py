@@ -0,0 +1,8 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Hashable,
+    Optional
+)
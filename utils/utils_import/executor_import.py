@@ -0,0 +1,13 @@
+import asyncio
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Optional
+)
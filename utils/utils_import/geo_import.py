@@ -1,7 +1,17 @@
-import httpx
-from shapely.geometry import Point
 import math
-from typing import Union
+from typing import (
+    Union,
+    Optional,
+    Sequence
+)
 
+from utils.geocoding import geocoder
+from utils.metrics import timed
 
-EARTH_CIRCUMFERENCE = 6378137  # окружность Земли в метрах [1](https://gist.github.com/gabesmed/1826175)
\ No newline at end of file
+try:
+    import numpy as np
+except ImportError:  # numpy необязателен, без него используется реализация на чистом python
+    np = None
+
+
+EARTH_CIRCUMFERENCE = 6378137  # окружность Земли в метрах [1](https://gist.github.com/gabesmed/1826175)
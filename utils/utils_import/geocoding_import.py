@@ -0,0 +1,20 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import (
+    Optional,
+    Protocol
+)
+
+import httpx
+from shapely.geometry import Point
+
+from config import settings
+from utils.cache import TTLCache
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+EMPTY_RESULT = {'latitude': None, 'longitude': None}
@@ -0,0 +1,11 @@
+import math
+from typing import Optional
+
+from utils.utils_import.geo_import import EARTH_CIRCUMFERENCE
+
+# алфавит base32, используемый в geohash
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+BASE32_INDEX = {char: index for index, char in enumerate(BASE32)}
+
+# точность geohash, которая хранится в БД (ячейка ~4.8м x 4.8м)
+GEOHASH_PRECISION = 9
@@ -0,0 +1,11 @@
+import json
+from datetime import datetime
+from typing import (
+    Any,
+    Optional,
+    Protocol
+)
+
+from config import settings
+from utils.cache import TTLCache
+from utils.redis_client import get_redis
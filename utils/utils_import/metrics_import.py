@@ -0,0 +1,22 @@
+import functools
+import inspect
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import (
+    Callable,
+    Iterable,
+    Optional
+)
+
+from config import settings
+
+slow_query_logger = logging.getLogger('sql.slow')
+
+# границы корзин гистограмм времени, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# границы корзин количества SQL-запросов на HTTP-запрос
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
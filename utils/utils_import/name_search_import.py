@@ -0,0 +1,11 @@
+import re
+from bisect import (
+    bisect_left,
+    insort
+)
+from collections import Counter
+from math import ceil
+from typing import (
+    Iterable,
+    Optional
+)
@@ -0,0 +1,10 @@
+import time
+from collections import deque
+from typing import (
+    Hashable,
+    Optional,
+    Protocol
+)
+
+from config import settings
+from utils.redis_client import get_redis
@@ -0,0 +1,4 @@
+import time
+from typing import Any, Optional
+
+from config import settings
@@ -1,12 +1,29 @@
+import asyncio
+import logging
 import smtplib
+import time
 from email.message import EmailMessage
+from typing import Optional
 import os
 import dotenv
 
+from utils.metrics import timed
+
 dotenv.load_dotenv()
 
-msg = EmailMessage()
+logger = logging.getLogger(__name__)
+
 EMAIL_HOST = os.getenv('EMAIL_HOST')
-EMAIL_PORT = os.getenv('EMAIL_HOST')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 465))
 EMAIL_ADDRESS = os.getenv("EMAIL_HOST_USER")
-EMAIL_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
\ No newline at end of file
+EMAIL_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+# false - обычное SMTP-соединение (например, локальный aiosmtpd для тестов)
+EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'true').lower() == 'true'
+
+# настройки очереди отправки писем
+EMAIL_QUEUE_SIZE = int(os.getenv('EMAIL_QUEUE_SIZE', 10000))
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 50))
+EMAIL_MAX_RETRIES = int(os.getenv('EMAIL_MAX_RETRIES', 5))
+EMAIL_RETRY_DELAY = float(os.getenv('EMAIL_RETRY_DELAY', 1.0))
+# через сколько секунд простоя проверять, живо ли SMTP-соединение
+EMAIL_IDLE_CHECK = float(os.getenv('EMAIL_IDLE_CHECK', 30))
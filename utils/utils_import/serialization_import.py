@@ -0,0 +1,24 @@
+import gzip
+import json
+from datetime import (
+    date,
+    datetime
+)
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Optional
+)
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него используется стандартный json
+    orjson = None
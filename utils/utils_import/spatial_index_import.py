@@ -0,0 +1,17 @@
+import asyncio
+import logging
+from bisect import (
+    bisect_left,
+    insort
+)
+from typing import (
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional
+)
+
+from config import settings
+from utils.geohash import cells_for_radius
+
+logger = logging.getLogger('utils.spatial_index')
@@ -1,8 +1,11 @@
+import asyncio
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 from PIL import Image
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from fastapi import UploadFile
 
-PROJECT_ROOT = Path(__file__).parent.parent / 'users/avatars/'
+from config import settings
+from utils.executor import BoundedExecutor
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent / 'users/avatars/'
 watermark_image_path = PROJECT_ROOT / 'watermark.png'